@@ -3,7 +3,10 @@ import sys
 
 from forte.data.data_pack import DataPack
 from fortex.health.readers.xray_image_reader import XrayImageReader
-from fortex.health.processors.xray_image_processor import XrayImageProcessor
+from fortex.health.processors.xray_image_processor import (
+    BatchedXrayImageProcessor,
+    XrayImageProcessor,
+)
 from ft.onto.base_ontology import Classification
 from forte.pipeline import Pipeline
 
@@ -14,11 +17,22 @@ from PIL import Image
 img_folder = "sample_data"
 
 
-def main(image_pth):
+def main(image_pth, batch_size=0):
     # pipeline initialization
     pipeline = Pipeline[DataPack]()
-    pipeline.set_reader(XrayImageReader())
-    pipeline.add(XrayImageProcessor())
+    if batch_size > 0:
+        # decode the next images at the input size of the model while a
+        # batch is classified
+        pipeline.set_reader(
+            XrayImageReader(),
+            config={"prefetch": 2 * batch_size, "target_size": 224},
+        )
+        processor = BatchedXrayImageProcessor()
+        pipeline.add(processor, config={"batcher": {"batch_size": batch_size}})
+    else:
+        processor = None
+        pipeline.set_reader(XrayImageReader())
+        pipeline.add(XrayImageProcessor())
     pipeline.initialize()
 
     for datapack in pipeline.process_dataset(image_pth):
@@ -28,10 +42,16 @@ def main(image_pth):
             # printing the classification result
             print(j.classification_result, end="\n\n")
 
+    if processor is not None:
+        print(processor.throughput_stats)
+
 
 if __name__ == "__main__":
 
-    if len(sys.argv) == 2:
+    if len(sys.argv) == 3:
+        # takes folder path containing the xray images, and a batch size
+        main(sys.argv[1], int(sys.argv[2]))
+    elif len(sys.argv) == 2:
         # takes folder path containing the xray images
         main(sys.argv[1])
     else:
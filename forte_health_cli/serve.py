@@ -0,0 +1,44 @@
+"""
+Serve a ForteHealth pipeline over HTTP, coding the notes of concurrent
+requests in micro-batches, see :mod:`fortex.health.utils.pipeline_server`.
+
+The pipeline is read from a YAML file saved with
+:meth:`~forte.pipeline.Pipeline.save`, whose reader takes a list of strings,
+such as a :class:`~forte.data.readers.StringReader`.
+"""
+import argparse
+from typing import List, Optional
+
+from forte.data.data_pack import DataPack
+from forte.pipeline import Pipeline
+
+from fortex.health.utils.pipeline_server import serve
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("config", help="the YAML file of the pipeline")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=32,
+        help="the maximum number of notes of a micro-batch",
+    )
+    parser.add_argument(
+        "--max-wait",
+        type=float,
+        default=0.01,
+        help="the maximum number of seconds a micro-batch waits for notes",
+    )
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline[DataPack]()
+    pipeline.init_from_config_path(args.config)
+    pipeline.initialize()
+    serve(pipeline, args.host, args.port, args.max_batch_size, args.max_wait)
+
+
+if __name__ == '__main__':
+    main()
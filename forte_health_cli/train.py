@@ -1,5 +1,87 @@
-def main():
-    print('train')
+"""
+Train a sparse linear ICD coder, see
+:class:`~fortex.health.utils.sparse_icd_model.SparseICDModel`.
+
+The labeled notes are read from a JSON lines file, one note per line, e.g.
+``{"text": "...", "icd_code": "I21.4"}``.
+"""
+import argparse
+import json
+import logging
+from typing import List, Optional, Tuple
+
+from fortex.health.utils.sparse_icd_model import SparseICDModel
+
+logger = logging.getLogger(__name__)
+
+
+def read_notes(
+    path: str, text_field: str = "text", label_field: str = "icd_code"
+) -> Tuple[List[str], List[str]]:
+    r"""
+    Read the labeled notes of a JSON lines file.
+
+    Returns: The texts and the ICD codes of the notes.
+    """
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as notes:
+        for line in notes:
+            if not line.strip():
+                continue
+            note = json.loads(line)
+            texts.append(note[text_field])
+            labels.append(note[label_field])
+    return texts, labels
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("data", help="the JSON lines file of labeled notes")
+    parser.add_argument("output", help="the .npz file of the trained model")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--label-field", default="icd_code")
+    parser.add_argument(
+        "--n-features",
+        type=int,
+        default=2**20,
+        help="the number of hashed n-gram features",
+    )
+    parser.add_argument(
+        "--ngram-range",
+        type=int,
+        nargs=2,
+        default=(1, 2),
+        metavar=("MIN_N", "MAX_N"),
+    )
+    parser.add_argument(
+        "--C",
+        type=float,
+        default=10.0,
+        help="the inverse regularization strength",
+    )
+    parser.add_argument(
+        "--min-weight",
+        type=float,
+        default=1e-3,
+        help="the weights with a smaller absolute value are dropped",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    texts, labels = read_notes(args.data, args.text_field, args.label_field)
+    logger.info(
+        "Training on %d notes with %d codes.", len(texts), len(set(labels))
+    )
+    model = SparseICDModel.fit(
+        texts,
+        labels,
+        n_features=args.n_features,
+        ngram_range=tuple(args.ngram_range),
+        C=args.C,
+        min_weight=args.min_weight,
+    )
+    model.save(args.output)
+    logger.info("Saved %d non-zero weights to %s.", model.coef.nnz, args.output)
 
 
 if __name__ == '__main__':
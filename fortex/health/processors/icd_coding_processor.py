@@ -14,22 +14,452 @@
 """
 ICD Coding Processor
 """
-from typing import Dict, Set
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+import hashlib
 import importlib
+import inspect
+import logging
+import os
+import time
 
-from forte.common import Resources
+import torch
+from forte.common import ProcessorConfigError, Resources
 from forte.common.configuration import Config
+from forte.data.batchers import FixedSizeDataPackBatcher, ProcessingBatcher
 from forte.data.data_pack import DataPack
+from forte.data.ontology.top import Annotation
 from forte.processors.base import PackProcessor
-from transformers import AutoTokenizer
+from forte.processors.base.batch_processor import PackingBatchProcessor
+from forte.utils import get_class
+from ft.onto.base_ontology import Classification, Document
+from transformers import AutoConfig, AutoTokenizer
 from transformers import BertForSequenceClassification
+from fortex.health.utils.model_registry import model_registry
+from fortex.health.utils.prediction_cache import PredictionCache
 from ftx.medical.clinical_ontology import MedicalArticle
 
 
 __all__ = [
+    "ClassificationHead",
     "ICDCodingProcessor",
+    "ICDCodingBatcher",
+    "BatchedICDCodingProcessor",
 ]
 
+# The `(code, score)` pairs of a prediction, best first.
+Ranking = List[Tuple[str, float]]
+
+# The prediction of an entry: its ranked ICD codes under `"codes"`, and the
+# label scores of each classification head under `"heads"`.
+Prediction = Dict[str, Any]
+
+
+def _torch_load(path: str) -> Any:
+    r"""
+    Load a file written with `torch.save` by this module, which may hold
+    more than plain tensors. Torch versions before 1.13 have no
+    `weights_only` and always unpickle.
+    """
+    load_kwargs: Dict[str, Any] = {}
+    if "weights_only" in inspect.signature(torch.load).parameters:
+        load_kwargs["weights_only"] = False
+    return torch.load(path, **load_kwargs)
+
+
+def _file_hash(path: str) -> str:
+    r"""
+    Returns: The SHA-256 digest of the content of the file at `path`.
+    """
+    with open(path, "rb") as saved_file:
+        return hashlib.sha256(saved_file.read()).hexdigest()
+
+
+class ClassificationHead(torch.nn.Module):
+    r"""
+    A linear document classifier on top of the encoder of the ICD coding
+    model, so that several classifications of an entry share one encoder
+    pass, see the `heads` config of :class:`ICDCodingProcessor`.
+
+    Args:
+        labels: the class labels, in the order of the outputs.
+        hidden_size: the size of the encoder representation.
+        representation: the input of the classifier, `"pooled"` for the
+            pooler output of the encoder, or `"cls"` for the last hidden
+            state of the `[CLS]` token.
+    """
+
+    def __init__(
+        self, labels: List[str], hidden_size: int, representation="pooled"
+    ):
+        super().__init__()
+        if representation not in ("pooled", "cls"):
+            raise ValueError(
+                f"Unknown representation '{representation}', expecting "
+                "'pooled' or 'cls'."
+            )
+        self.labels = list(labels)
+        self.representation = representation
+        self.linear = torch.nn.Linear(hidden_size, len(self.labels))
+
+    def forward(self, encoder_output) -> torch.Tensor:
+        r"""
+        Returns: The logits of the labels for the encoder output of a batch.
+        """
+        if self.representation == "cls":
+            features = encoder_output.last_hidden_state[:, 0]
+        else:
+            features = encoder_output.pooler_output
+        return self.linear(features)
+
+    def save(self, path: str):
+        r"""
+        Save the labels and weights of the head to `path`.
+        """
+        torch.save(
+            {
+                "labels": self.labels,
+                "representation": self.representation,
+                "state_dict": self.state_dict(),
+            },
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ClassificationHead":
+        r"""
+        Load a head saved with :meth:`save`.
+        """
+        saved = _torch_load(path)
+        head = cls(
+            saved["labels"],
+            saved["state_dict"]["linear.weight"].size(1),
+            saved["representation"],
+        )
+        head.load_state_dict(saved["state_dict"])
+        return head.eval()
+
+
+def _check_window_configs(configs: Config):
+    if configs.top_k < 1:
+        raise ProcessorConfigError("top_k must be at least 1.")
+    if configs.quantize and configs.cuda_devices >= 0:
+        raise ProcessorConfigError(
+            "quantize is only supported for CPU inference, set cuda_devices "
+            "to -1."
+        )
+    if configs.pooling not in ("max", "mean"):
+        raise ProcessorConfigError(
+            f"Unknown pooling '{configs.pooling}', expecting 'max' or 'mean'."
+        )
+    if not 0 <= configs.stride < configs.max_length // 2:
+        raise ProcessorConfigError(
+            "stride must be non-negative and smaller than half of max_length."
+        )
+
+
+def _quantize(model: torch.nn.Module) -> torch.nn.Module:
+    return torch.quantization.quantize_dynamic(
+        model.eval(), {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _pretrained_kwargs(configs: Config) -> Dict[str, Any]:
+    if configs.model_revision:
+        return {"revision": configs.model_revision}
+    return {}
+
+
+def _load_tokenizer(configs: Config):
+    return AutoTokenizer.from_pretrained(
+        configs.model_name, **_pretrained_kwargs(configs)
+    )
+
+
+def _load_model(configs: Config) -> torch.nn.Module:
+    r"""
+    Load the classification model of `configs.model_name`.
+
+    With `quantize`, the linear layers of the model are dynamically
+    quantized to int8 for CPU inference. The quantized weights are cached at
+    `quantized_model_path` if set, and later loads only build the model
+    structure from the model config before restoring them.
+    """
+    if not configs.quantize:
+        return BertForSequenceClassification.from_pretrained(
+            configs.model_name, **_pretrained_kwargs(configs)
+        )
+
+    cache_path = configs.quantized_model_path
+    if cache_path and os.path.exists(cache_path):
+        # The cache holds packed quantized weights, which are not plain
+        # tensors, so it is a full pickle written by this function.
+        cached = _torch_load(cache_path)
+        if (
+            cached.get("model_name") == configs.model_name
+            and cached.get("model_revision") == configs.model_revision
+            and cached.get("torch_version") == torch.__version__
+        ):
+            model = _quantize(
+                BertForSequenceClassification(
+                    AutoConfig.from_pretrained(
+                        configs.model_name, **_pretrained_kwargs(configs)
+                    )
+                )
+            )
+            model.load_state_dict(cached["state_dict"])
+            return model
+
+    model = _quantize(
+        BertForSequenceClassification.from_pretrained(
+            configs.model_name, **_pretrained_kwargs(configs)
+        )
+    )
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        torch.save(
+            {
+                "model_name": configs.model_name,
+                "model_revision": configs.model_revision,
+                "torch_version": torch.__version__,
+                "state_dict": model.state_dict(),
+            },
+            tmp_path,
+        )
+        os.replace(tmp_path, cache_path)
+    return model
+
+
+def _model_id(configs: Config) -> str:
+    if configs.model_revision:
+        return f"{configs.model_name}#{configs.model_revision}"
+    return configs.model_name
+
+
+def _acquire_tokenizer(owner: Any, configs: Config):
+    r"""
+    Returns: The tokenizer of `configs.model_name`, shared through the
+    model registry.
+    """
+    return model_registry.acquire(
+        owner, "tokenizer", _model_id(configs), lambda: _load_tokenizer(configs)
+    )
+
+
+def _acquire_model(
+    owner: Any, configs: Config, device: torch.device = torch.device("cpu")
+) -> torch.nn.Module:
+    r"""
+    Returns: The classification model of `configs.model_name` on `device`
+    in evaluation mode, shared through the model registry.
+    """
+
+    def load() -> torch.nn.Module:
+        return _load_model(configs).to(device).eval()
+
+    kind = "bert-sequence-classification"
+    if configs.quantize:
+        kind += "-int8"
+    return model_registry.acquire(
+        owner, kind, _model_id(configs), load, device=str(device)
+    )
+
+
+def _rank_codes(
+    logits: torch.Tensor, id2label: Dict[int, str], top_k: int
+) -> List[Ranking]:
+    r"""
+    Select the `top_k` most likely codes of every row of `logits` at once,
+    with a partial sort instead of sorting the whole label space.
+
+    Returns: The ranked codes of each row, with their softmax scores.
+    """
+    top = logits.softmax(dim=-1).topk(min(top_k, logits.size(-1)), dim=-1)
+    return [
+        [(id2label[label_id], score) for label_id, score in zip(ids, scores)]
+        for ids, scores in zip(top.indices.tolist(), top.values.tolist())
+    ]
+
+
+def _load_heads(configs: Config) -> Dict[str, ClassificationHead]:
+    return {
+        name: ClassificationHead.load(path)
+        for name, path in configs.heads.items()
+    }
+
+
+def _classify(
+    model: torch.nn.Module,
+    heads: Dict[str, ClassificationHead],
+    inputs: Dict[str, torch.Tensor],
+) -> Tuple[torch.Tensor, Dict[str, torch.Tensor]]:
+    r"""
+    Classify a batch of windows. With classification heads, the encoder of
+    `model` runs once, and its output feeds both the ICD classifier of
+    `model` and every head.
+
+    Returns: The ICD logits, and the logits of each head.
+    """
+    with torch.no_grad():
+        if not heads:
+            return model(**inputs).logits, {}
+        encoder_output = model.base_model(**inputs)
+        logits = model.classifier(model.dropout(encoder_output.pooler_output))
+        return logits, {
+            name: head(encoder_output) for name, head in heads.items()
+        }
+
+
+def _make_predictions(
+    logits: torch.Tensor,
+    head_logits: Dict[str, torch.Tensor],
+    id2label: Dict[int, str],
+    heads: Dict[str, ClassificationHead],
+    top_k: int,
+) -> List[Prediction]:
+    head_scores = {
+        name: values.softmax(dim=-1).tolist()
+        for name, values in head_logits.items()
+    }
+    return [
+        {
+            "codes": ranking,
+            "heads": {
+                name: dict(zip(heads[name].labels, scores[i]))
+                for name, scores in head_scores.items()
+            },
+        }
+        for i, ranking in enumerate(_rank_codes(logits, id2label, top_k))
+    ]
+
+
+def _write_heads(entry: Annotation, prediction: Prediction):
+    r"""
+    Store the label scores of each head in the `classifications` of
+    `entry`, under the name of the head.
+    """
+    for name, scores in prediction["heads"].items():
+        classification = Classification(entry.pack)
+        classification.classification_result.update(scores)
+        entry.classifications[name] = classification
+
+
+def _record_heads(configs: Config, record_meta: Dict[str, Set[str]]):
+    if not configs.heads:
+        return
+    record_meta["ft.onto.base_ontology.Classification"] = {
+        "classification_result"
+    }
+    record_meta.setdefault(configs.entry_type, set()).add("classifications")
+
+
+def _open_cache(configs: Config) -> Optional[PredictionCache]:
+    if not configs.cache_path:
+        return None
+    return PredictionCache(configs.cache_path, configs.cache_max_size)
+
+
+def _model_key(configs: Config) -> str:
+    r"""
+    Returns: A string identifying everything that affects the predictions
+    besides the input text, used to key the prediction cache. Heads are
+    identified by the hash of their file, so that a head retrained to the
+    same path does not reuse the cached scores of the old one.
+    """
+    return "|".join(
+        str(value)
+        for value in (
+            configs.model_name,
+            configs.model_revision,
+            configs.quantize,
+            configs.max_length,
+            configs.stride,
+            configs.pooling,
+            configs.top_k,
+            sorted(
+                (name, _file_hash(path)) for name, path in configs.heads.items()
+            ),
+        )
+    )
+
+
+def _predict_with_cache(
+    cache: Optional[PredictionCache],
+    model_key: str,
+    texts: List[str],
+    predict: Callable[[List[str]], List[Prediction]],
+) -> List[Prediction]:
+    r"""
+    Look up the predictions of all `texts` in `cache` at once, and only run
+    `predict` on the texts that are not cached, adding their predictions to
+    the cache.
+
+    Returns: The prediction of each text.
+    """
+    if cache is None:
+        return predict(texts)
+
+    keys = [PredictionCache.make_key(model_key, text) for text in texts]
+    predictions: Dict[str, Prediction] = cache.get_many(keys)
+    missing = {
+        key: text for key, text in zip(keys, texts) if key not in predictions
+    }
+    if missing:
+        new_predictions = dict(zip(missing, predict(list(missing.values()))))
+        cache.put_many(new_predictions)
+        predictions.update(new_predictions)
+    return [predictions[key] for key in keys]
+
+
+def _encode_windows(tokenizer, texts: List[str], configs: Config):
+    r"""
+    Split each text into windows of at most `max_length` tokens, where
+    consecutive windows of a text share `stride` tokens. The fast tokenizer
+    cuts the windows on its token offsets, so every token is kept.
+
+    Returns: The encodings of all windows, and the index of the text each
+    window comes from.
+    """
+    encodings = tokenizer(
+        texts,
+        truncation=True,
+        max_length=configs.max_length,
+        stride=configs.stride,
+        return_overflowing_tokens=True,
+    )
+    sample_ids = encodings.pop("overflow_to_sample_mapping")
+    return encodings, sample_ids
+
+
+def _pool_windows(
+    window_logits: torch.Tensor,
+    sample_ids: List[int],
+    num_samples: int,
+    pooling: str,
+) -> torch.Tensor:
+    r"""
+    Pool the logits of the windows of each text into one row per text, with
+    the element-wise `"max"` or the `"mean"` of its windows.
+    """
+    index = torch.tensor(sample_ids, device=window_logits.device)
+    pooled = []
+    for sample in range(num_samples):
+        windows = window_logits[index == sample]
+        if pooling == "max":
+            pooled.append(windows.max(0)[0])
+        else:
+            pooled.append(windows.mean(0))
+    return torch.stack(pooled)
+
 
 class ICDCodingProcessor(PackProcessor):
     r"""
@@ -39,23 +469,130 @@ class ICDCodingProcessor(PackProcessor):
 
     Referred repository link:
     https://huggingface.co/AkshatSurolia/ICD-10-Code-Prediction
+
+    Entries longer than the model input are split into overlapping token
+    windows, whose logits are pooled into one prediction per entry.
+
+    With `quantize` enabled, a dynamically int8 quantized copy of the model
+    runs on CPU. :meth:`quantization_agreement` compares its predictions to
+    those of the original model.
+
+    With `cache_path` set, predictions are cached on disk by entry text and
+    model, and entries already coded in an earlier run skip the model.
+
+    The tokenizer and model are shared with the other processors of the
+    process using the same model, through
+    :class:`~fortex.health.utils.model_registry.ModelRegistry`.
+
+    With `heads`, more document-level classifiers, such as the note type or
+    the readmission risk, run on the same encoder pass as the ICD coding.
+    Each :class:`ClassificationHead` stores its label scores in the
+    `classifications` of the entry, under the name of the head.
     """
 
     def __init__(self):
         super().__init__()
         self.tokenizer = None
         self.model = None
+        self.heads: Dict[str, ClassificationHead] = {}
+        self.cache: Optional[PredictionCache] = None
+        self._model_key = ""
 
     def set_up(self):  # , configs: Config
-        self.tokenizer = AutoTokenizer.from_pretrained(self.configs.model_name)
-        self.model = BertForSequenceClassification.from_pretrained(
-            self.configs.model_name
-        )
+        _check_window_configs(self.configs)
+        model_registry.release(self)
+        self.tokenizer = _acquire_tokenizer(self, self.configs)
+        self.model = _acquire_model(self, self.configs)
+        self.heads = _load_heads(self.configs)
+        self.cache = _open_cache(self.configs)
+        self._model_key = _model_key(self.configs)
 
     def initialize(self, resources: Resources, configs: Config):
         super().initialize(resources, configs)
         self.set_up()
 
+    def _predict(
+        self, model: torch.nn.Module, texts: List[str]
+    ) -> List[Prediction]:
+        r"""
+        Returns: The prediction of each text of `texts` by `model` and the
+        classification heads.
+        """
+        if not texts:
+            return []
+        entry_logits = []
+        entry_head_logits: Dict[str, List[torch.Tensor]] = {
+            name: [] for name in self.heads
+        }
+        for text in texts:
+            # All windows of the entry are classified in one forward pass.
+            encodings, sample_ids = _encode_windows(
+                self.tokenizer, [text], self.configs
+            )
+            encoded_input = self.tokenizer.pad(encodings, return_tensors="pt")
+            logits, head_logits = _classify(model, self.heads, encoded_input)
+            entry_logits.append(
+                _pool_windows(logits, sample_ids, 1, self.configs.pooling)
+            )
+            for name, values in head_logits.items():
+                entry_head_logits[name].append(
+                    _pool_windows(values, sample_ids, 1, self.configs.pooling)
+                )
+        return _make_predictions(
+            torch.cat(entry_logits),
+            {
+                name: torch.cat(values)
+                for name, values in entry_head_logits.items()
+            },
+            model.config.id2label,
+            self.heads,
+            self.configs.top_k,
+        )
+
+    def quantization_agreement(self, texts: List[str]) -> Dict[str, Any]:
+        r"""
+        Compare the top-1 codes predicted by the model in use, usually
+        quantized with `quantize`, to those of the fp32 model of
+        `model_name`, to check the accuracy cost of quantization on a sample
+        set before switching a deployment.
+
+        Args:
+            texts: the sample texts to be coded by both models.
+
+        Returns: A dictionary with the number of `samples`, the `agreement`
+        rate of the top-1 codes, the `disagreements` as
+        `(index, fp32_code, code)` tuples, and the seconds spent by the
+        `fp32_seconds` and current `seconds` models.
+        """
+        fp32_model = BertForSequenceClassification.from_pretrained(
+            self.configs.model_name, **_pretrained_kwargs(self.configs)
+        ).eval()
+
+        codes = []
+        seconds = []
+        for model in (fp32_model, self.model):
+            start = time.perf_counter()
+            codes.append(
+                [
+                    prediction["codes"][0][0]
+                    for prediction in self._predict(model, texts)
+                ]
+            )
+            seconds.append(time.perf_counter() - start)
+
+        disagreements = [
+            (i, fp32_code, code)
+            for i, (fp32_code, code) in enumerate(zip(*codes))
+            if fp32_code != code
+        ]
+        return {
+            "samples": len(texts),
+            "agreement": 1 - len(disagreements) / len(texts) if texts else 1.0,
+            "disagreements": disagreements,
+            "fp32_seconds": seconds[0],
+            "seconds": seconds[1],
+        }
+
     def _process(self, input_pack: DataPack):
         r"""
         ICDCodingProcessor is done on the basis of
@@ -68,18 +605,16 @@ class ICDCodingProcessor(PackProcessor):
 
         mod = importlib.import_module(path_str)
         entry = getattr(mod, module_str)
-        for entry_specified in input_pack.get(entry_type=entry):
-            if len(entry_specified.text) > 512:
-                print("Found an entry greater than 512 in length, skipping..")
-                continue
-
-            encoded_input = self.tokenizer(
-                entry_specified.text, return_tensors="pt"
-            )
-            output = self.model(**encoded_input)
-            result = output.logits.detach().cpu().numpy()[0].argsort()[::-1][:5]
-
-            icd_code = self.model.config.id2label[result[0]]
+        entries = list(input_pack.get(entry_type=entry))
+        predictions = _predict_with_cache(
+            self.cache,
+            self._model_key,
+            [entry_specified.text for entry_specified in entries],
+            lambda texts: self._predict(self.model, texts),
+        )
+        for entry_specified, prediction in zip(entries, predictions):
+            ranking = prediction["codes"]
+            icd_code = ranking[0][0]
             article = MedicalArticle(
                 pack=input_pack,
                 begin=entry_specified.span.begin,
@@ -87,6 +622,17 @@ class ICDCodingProcessor(PackProcessor):
             )
             article.icd_version = 10  # For ICD-10 coding
             article.icd_code = icd_code
+            article.icd_codes = [code for code, _ in ranking]
+            article.icd_scores = [score for _, score in ranking]
+            _write_heads(entry_specified, prediction)
+
+    def finish(self, resource: Resources):
+        if self.cache is not None:
+            logging.info("ICD prediction cache stats: %s", self.cache.stats())
+            self.cache.close()
+            self.cache = None
+        model_registry.release(self)
+        super().finish(resource)
 
     @classmethod
     def default_configs(cls):
@@ -97,6 +643,29 @@ class ICDCodingProcessor(PackProcessor):
          - `entry_type`: input entry type,
          - `model_name`: the higgingface transformer model name to be
                          used for classification,
+         - `model_revision`: the revision of the model to be used, the
+                             default revision when empty,
+         - `max_length`: the maximum number of tokens of a window,
+         - `stride`: the number of tokens shared by consecutive windows of
+                     an entry longer than `max_length`,
+         - `pooling`: how the logits of the windows of an entry are
+                      combined, `"max"` or `"mean"`,
+         - `top_k`: the number of ranked codes, with their softmax scores,
+                    set as `icd_codes` and `icd_scores` of the
+                    `MedicalArticle`. `icd_code` is the first of them,
+         - `quantize`: whether to apply dynamic int8 quantization to the
+                       linear layers of the model, for CPU inference,
+         - `quantized_model_path`: the file caching the quantized model,
+                                   so that later starts skip quantizing,
+         - `cache_path`: the SQLite file caching the ranked codes of each
+                         entry text, disabled when empty,
+         - `cache_max_size`: the maximum number of cached entries, the
+                             least recently used ones are evicted beyond
+                             it. 0 means unbounded,
+         - `heads`: the classification heads sharing the encoder pass, as a
+                    dictionary from the head name to the file of a
+                    :class:`ClassificationHead`. The entry type must have
+                    `classifications`, such as `Document`,
 
         Returns: A dictionary with the default config for this processor.
         """
@@ -105,7 +674,18 @@ class ICDCodingProcessor(PackProcessor):
             "attribute_name": "classification",
             "multi_class": True,
             "model_name": "AkshatSurolia/ICD-10-Code-Prediction",
+            "model_revision": "",
             "cuda_devices": -1,
+            "max_length": 512,
+            "stride": 128,
+            "pooling": "max",
+            "top_k": 5,
+            "quantize": False,
+            "quantized_model_path": "",
+            "cache_path": "",
+            "cache_max_size": 100000,
+            "heads": {},
+            "@no_typecheck": ["heads"],
         }
 
     def expected_types_and_attributes(self):
@@ -125,7 +705,7 @@ class ICDCodingProcessor(PackProcessor):
         r"""
         Method to add output type record of `ICDCodeProcessor` which
         is `"ftx.medical.clinical_ontology.MedicalArticle"` with attributes:
-         `icd_version` and `icd_code`
+         `icd_version`, `icd_code`, `icd_codes` and `icd_scores`
         to :attr:`forte.data.data_pack.Meta.record`.
 
         Args:
@@ -135,10 +715,313 @@ class ICDCodingProcessor(PackProcessor):
         record_meta["ftx.medical.clinical_ontology.MedicalArticle"] = {
             "icd_version",
             "icd_code",
+            "icd_codes",
+            "icd_scores",
         }
+        _record_heads(self.configs, record_meta)
         if self.configs.entry_type in record_meta:
             record_meta[self.configs.entry_type].add(
                 self.configs.attribute_name
             )
         else:
             record_meta[self.configs.entry_type] = {self.configs.attribute_name}
+
+
+class ICDCodingBatcher(FixedSizeDataPackBatcher):
+    r"""
+    Gathers the entries to be coded from consecutive data packs into
+    batches of `batch_size` entries.
+
+    With a positive `max_wait`, a partial batch is also released once its
+    oldest entry has waited `max_wait` seconds. The wait is checked when
+    new entries arrive, so it bounds how long a slow stream of packs is
+    held back; the last partial batch is released when the pipeline is
+    flushed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entry_type: Type[Annotation] = Document
+        self._batch_start: Optional[float] = None
+
+    def initialize(self, config: Config):
+        super().initialize(config)
+        self._batch_start = None
+
+    def _should_yield(self) -> bool:
+        if self.batch_is_full:
+            return True
+        return (
+            self.configs.max_wait > 0
+            and self._batch_start is not None
+            and time.monotonic() - self._batch_start >= self.configs.max_wait
+        )
+
+    def _get_instance(self, data_pack: DataPack) -> Iterator[Dict[str, Any]]:
+        for entry in data_pack.get(self.entry_type):
+            if self._batch_start is None:
+                self._batch_start = time.monotonic()
+            yield {
+                "tid": entry.tid,
+                "text": entry.text,
+                "begin": entry.begin,
+                "end": entry.end,
+            }
+
+    def get_batch(self, input_pack: DataPack):
+        for batch in super().get_batch(input_pack):
+            self._batch_start = None
+            yield batch
+
+    def flush(self):
+        yield from super().flush()
+        self._batch_start = None
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        The configuration of the batcher.
+
+        Following are the keys for this dictionary:
+
+            - `batch_size`: the number of entries gathered before running
+              the model.
+            - `max_wait`: the number of seconds after which a partial batch
+              is released, 0 to wait for full batches.
+
+        Returns: A dictionary with the default config for this batcher.
+        """
+        return {
+            "batch_size": 32,
+            "max_wait": 0.0,
+        }
+
+
+class BatchedICDCodingProcessor(PackingBatchProcessor[DataPack]):
+    r"""
+    A batched variant of :class:`ICDCodingProcessor`, which codes the
+    entries of several data packs together with :class:`ICDCodingBatcher`.
+
+    The entries of a batch are split into token windows as in
+    :class:`ICDCodingProcessor`. The windows are sorted by their number of
+    tokens and split into buckets of `bucket_size` windows. Each bucket is
+    padded to its own longest window and classified with one forward pass,
+    so short entries are not padded to the length of the longest one of the
+    batch. The pooled results are then added back to the packs the entries
+    came from.
+
+    With `cache_path` set, the whole batch is looked up in the prediction
+    cache first, and only the entries that are not cached are classified.
+
+    The classification `heads` share the encoder pass of each bucket, as in
+    :class:`ICDCodingProcessor`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.tokenizer = None
+        self.model = None
+        self.heads: Dict[str, ClassificationHead] = {}
+        self.device = torch.device("cpu")
+        self.cache: Optional[PredictionCache] = None
+        self._model_key = ""
+
+    def initialize(self, resources: Resources, configs: Config):
+        super().initialize(resources, configs)
+        _check_window_configs(configs)
+        self.batcher.entry_type = get_class(configs.entry_type)
+        if configs.cuda_devices >= 0:
+            self.device = torch.device("cuda", configs.cuda_devices)
+        model_registry.release(self)
+        self.tokenizer = _acquire_tokenizer(self, configs)
+        self.model = _acquire_model(self, configs, self.device)
+        self.heads = _load_heads(configs)
+        for head in self.heads.values():
+            head.to(self.device)
+        self.cache = _open_cache(configs)
+        self._model_key = _model_key(configs)
+
+    @classmethod
+    def define_batcher(cls) -> ProcessingBatcher:
+        return ICDCodingBatcher()
+
+    def predict(self, data_batch: Dict) -> Dict[str, List[Any]]:
+        r"""
+        Classify the entries of `data_batch`, one forward pass per bucket.
+
+        Args:
+            data_batch: the `tid`, `text`, `begin` and `end` of the entries.
+
+        Returns: The `tid`, `begin`, `end`, ranked `icd_codes` and
+        `icd_scores`, and the scores of the classification `heads` of the
+        entries, in the order of `data_batch`.
+        """
+        predictions = _predict_with_cache(
+            self.cache, self._model_key, data_batch["text"], self._predict
+        )
+        return {
+            "tid": data_batch["tid"],
+            "begin": data_batch["begin"],
+            "end": data_batch["end"],
+            "icd_codes": [
+                [code for code, _ in prediction["codes"]]
+                for prediction in predictions
+            ],
+            "icd_scores": [
+                [score for _, score in prediction["codes"]]
+                for prediction in predictions
+            ],
+            "heads": [prediction["heads"] for prediction in predictions],
+        }
+
+    def _predict(self, texts: List[str]) -> List[Prediction]:
+        r"""
+        Returns: The prediction of each text of `texts`.
+        """
+        encodings, sample_ids = _encode_windows(
+            self.tokenizer, texts, self.configs
+        )
+        input_ids = encodings["input_ids"]
+        order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+
+        window_logits = torch.empty(
+            (len(input_ids), self.model.config.num_labels), device=self.device
+        )
+        window_head_logits = {
+            name: torch.empty(
+                (len(input_ids), len(head.labels)), device=self.device
+            )
+            for name, head in self.heads.items()
+        }
+        bucket_size = self.configs.bucket_size
+        for start in range(0, len(order), bucket_size):
+            bucket = order[start : start + bucket_size]
+            padded = self.tokenizer.pad(
+                [{key: encodings[key][i] for key in encodings} for i in bucket],
+                return_tensors="pt",
+            ).to(self.device)
+            logits, head_logits = _classify(self.model, self.heads, padded)
+            window_logits[bucket] = logits
+            for name, values in head_logits.items():
+                window_head_logits[name][bucket] = values
+
+        return _make_predictions(
+            _pool_windows(
+                window_logits, sample_ids, len(texts), self.configs.pooling
+            ),
+            {
+                name: _pool_windows(
+                    values, sample_ids, len(texts), self.configs.pooling
+                )
+                for name, values in window_head_logits.items()
+            },
+            self.model.config.id2label,
+            self.heads,
+            self.configs.top_k,
+        )
+
+    def pack(
+        self,
+        pack: DataPack,
+        predict_results: Dict[str, List[Any]],
+        context: Optional[Annotation] = None,
+    ):
+        for tid, begin, end, icd_codes, icd_scores, heads in zip(
+            predict_results["tid"],
+            predict_results["begin"],
+            predict_results["end"],
+            predict_results["icd_codes"],
+            predict_results["icd_scores"],
+            predict_results["heads"],
+        ):
+            article = MedicalArticle(pack=pack, begin=begin, end=end)
+            article.icd_version = 10  # For ICD-10 coding
+            article.icd_code = icd_codes[0]
+            article.icd_codes = icd_codes
+            article.icd_scores = icd_scores
+            _write_heads(pack.get_entry(tid), {"heads": heads})
+
+    def finish(self, resource: Resources):
+        if self.cache is not None:
+            logging.info("ICD prediction cache stats: %s", self.cache.stats())
+            self.cache.close()
+            self.cache = None
+        model_registry.release(self)
+        super().finish(resource)
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        This defines a basic config structure for
+        `BatchedICDCodingProcessor`.
+
+        Following are the keys for this dictionary:
+         - `entry_type`: input entry type,
+         - `model_name`: the huggingface transformer model name to be
+                         used for classification,
+         - `model_revision`: the revision of the model to be used,
+         - `cuda_devices`: the GPU to run the model on, -1 for the CPU,
+         - `max_length`, `stride`, `pooling`: the token windows of long
+                          entries, as for :class:`ICDCodingProcessor`,
+         - `top_k`: the number of ranked codes, as for
+                    :class:`ICDCodingProcessor`,
+         - `quantize`, `quantized_model_path`: int8 CPU inference, as for
+                          :class:`ICDCodingProcessor`,
+         - `cache_path`, `cache_max_size`: the prediction cache, as for
+                          :class:`ICDCodingProcessor`,
+         - `heads`: the classification heads sharing the encoder pass, as
+                    for :class:`ICDCodingProcessor`,
+         - `bucket_size`: the maximum number of windows padded together
+                          and classified in one forward pass,
+         - `batcher`: the configuration of :class:`ICDCodingBatcher`, with
+                      the `batch_size` and `max_wait` of the batches.
+
+        Returns: A dictionary with the default config for this processor.
+        """
+        return {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "AkshatSurolia/ICD-10-Code-Prediction",
+            "model_revision": "",
+            "cuda_devices": -1,
+            "max_length": 512,
+            "stride": 128,
+            "pooling": "max",
+            "top_k": 5,
+            "quantize": False,
+            "quantized_model_path": "",
+            "cache_path": "",
+            "cache_max_size": 100000,
+            "heads": {},
+            "bucket_size": 8,
+            "batcher": ICDCodingBatcher.default_configs(),
+            "@no_typecheck": ["heads"],
+        }
+
+    def expected_types_and_attributes(self):
+        r"""
+        Method to add user specified expected type which would be checked
+        before running the processor if the pipeline is initialized with
+        `enforce_consistency=True` or
+        :meth:`~forte.pipeline.Pipeline.enforce_consistency` was enabled for
+        the pipeline.
+        """
+        return {self.configs.entry_type: set()}
+
+    def record(self, record_meta: Dict[str, Set[str]]):
+        r"""
+        Method to add output type record of `BatchedICDCodingProcessor`
+        which is `"ftx.medical.clinical_ontology.MedicalArticle"` with
+        attributes `icd_version`, `icd_code`, `icd_codes` and `icd_scores`
+        to :attr:`forte.data.data_pack.Meta.record`.
+
+        Args:
+            record_meta: the field in the datapack for type record that need to
+                fill in for consistency checking.
+        """
+        record_meta["ftx.medical.clinical_ontology.MedicalArticle"] = {
+            "icd_version",
+            "icd_code",
+            "icd_codes",
+            "icd_scores",
+        }
+        _record_heads(self.configs, record_meta)
@@ -14,22 +14,224 @@
 """
 Negation Context Analyser
 """
+import hashlib
+import logging
+import math
 import os
+import pickle
 import re
-from typing import Dict, List, Set
-
-from ft.onto.base_ontology import Sentence, EntityMention
-from forte.common import Resources
+import time
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+from ft.onto.base_ontology import Sentence, EntityMention, Token
+from forte.common import ProcessorConfigError, Resources
 from forte.common.configuration import Config
 from forte.data.data_pack import DataPack
+from forte.data.ontology.top import Annotation
 from forte.processors.base import PackProcessor
+from forte.utils import get_class
 
+from fortex.health.utils.lru_cache import LRUCache
+from fortex.health.utils.trigger_matcher import (
+    TriggerMatcher,
+    tokenize_with_spans,
+)
 from ftx.medical.clinical_ontology import NegationContext
 
 __all__ = [
     "NegationContextAnalyzer",
+    "compile_negation_rules",
 ]
 
+# Bump this when the layout of the compiled rule artifact or of
+# `TriggerMatcher` changes, so that stale artifacts are recompiled.
+RULES_ARTIFACT_VERSION = 2
+
+_WHITESPACE_TABLE = str.maketrans("\t\n\r\f\v", "     ")
+
+# In `"window"` mode, these tokens end every scope like a `[CONJ]` phrase
+# when they are followed by whitespace, standing in for sentence boundaries.
+_WINDOW_TERMINATORS = frozenset(".!?;")
+
+# The scope window of NegEx, in tokens, used by the `"window"` mode when no
+# `scope_window` is configured.
+NEGEX_SCOPE_WINDOW = 5
+
+# The tags of the rule phrases that open a scope forwards and backwards for
+# each ConText attribute, as used in `resources/context_triggers.txt`.
+# Negation uses the `[PREN]` and `[POST]` tags of the NegEx rules.
+CONTEXT_TAGS = {
+    "historical": ("[PREH]", "[POSH]"),
+    "hypothetical": ("[PREC]", "[POSC]"),
+    "experiencer": ("[PREE]", "[POSE]"),
+}
+
+# The result of an entity: (begin, end, polarity, context), where context is
+# (historical, hypothetical, experiencer) with `context_analysis` enabled.
+_Result = Tuple[int, int, bool, Optional[Tuple[bool, bool, str]]]
+
+
+def _sort_rules(rule_list: List[str]) -> List[Tuple[str, str]]:
+    rule_list.sort(key=len, reverse=True)
+    sorted_rules = []
+
+    for rule in rule_list:
+        rule_tokens = rule.strip().split("\t")
+        if len(rule_tokens[0].split()) == 0:
+            continue
+        sorted_rules.append((rule_tokens[0], rule_tokens[-1].strip()))
+
+    return sorted_rules
+
+
+def _build_matcher(all_rules: List[str], word_tokens: bool) -> TriggerMatcher:
+    # Token annotations are matched as lowercased words.
+    return TriggerMatcher(
+        _sort_rules(all_rules), lowercase=word_tokens, word_tokens=word_tokens
+    )
+
+
+def _read_rules(
+    rules_paths: Sequence[str],
+    pre_negation_rules: Iterable[str],
+    post_negation_rules: Iterable[str],
+) -> Tuple[List[str], str]:
+    r"""
+    Read the rules of negex-format trigger files and the additional rules
+    given in the configs.
+
+    Returns: The rule lines, and a hash of their content that identifies
+    the rule set.
+    """
+    all_rules: List[str] = []
+    rules_hash = hashlib.sha256()
+    for rules_path in rules_paths:
+        with open(rules_path, "rb") as rules_file:
+            content = rules_file.read()
+        all_rules.extend(content.decode("utf8").splitlines())
+        rules_hash.update(content + b"\0")
+
+    # Rules given in the configs may leave out the tag column.
+    config_rules = [
+        rule if "\t" in rule else rule + "\t\t[PREN]"
+        for rule in pre_negation_rules
+    ] + [
+        rule if "\t" in rule else rule + "\t\t[POST]"
+        for rule in post_negation_rules
+    ]
+    all_rules.extend(config_rules)
+    for rule in config_rules:
+        rules_hash.update(b"\n" + rule.encode("utf8"))
+    return all_rules, rules_hash.hexdigest()
+
+
+def _load_artifact(
+    artifact_path: str, rules_hash: str, word_tokens: bool
+) -> Optional[TriggerMatcher]:
+    r"""
+    Load a compiled rule set, if the artifact exists and was compiled from
+    the rule set identified by `rules_hash` for the same kind of matching,
+    with the current artifact version.
+    """
+    if not os.path.isfile(artifact_path):
+        return None
+    try:
+        with open(artifact_path, "rb") as artifact_file:
+            artifact = pickle.load(artifact_file)
+    except (
+        OSError,
+        EOFError,
+        AttributeError,
+        ImportError,
+        pickle.UnpicklingError,
+    ) as e:
+        logging.warning("Cannot read rule artifact %s: %s", artifact_path, e)
+        return None
+    if not isinstance(artifact, dict):
+        return None
+    matcher = artifact.get("matcher")
+    if (
+        artifact.get("version") != RULES_ARTIFACT_VERSION
+        or artifact.get("rules_hash") != rules_hash
+        or not isinstance(matcher, TriggerMatcher)
+        or matcher.word_tokens != word_tokens
+    ):
+        return None
+    return matcher
+
+
+def _save_artifact(artifact_path: str, rules_hash: str, matcher):
+    # Write to a temporary file first so that readers never see a partially
+    # written artifact.
+    tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as artifact_file:
+        pickle.dump(
+            {
+                "version": RULES_ARTIFACT_VERSION,
+                "rules_hash": rules_hash,
+                "matcher": matcher,
+            },
+            artifact_file,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(tmp_path, artifact_path)
+
+
+def compile_negation_rules(
+    rules_path: str,
+    artifact_path: str,
+    pre_negation_rules: Iterable[str] = (),
+    post_negation_rules: Iterable[str] = (),
+    context_rules_path: str = "",
+    *,
+    token_matching: bool = False,
+) -> str:
+    r"""
+    Compile a negex-format trigger file into a binary rule artifact that
+    :class:`NegationContextAnalyzer` loads through its
+    `compiled_rules_path` config, skipping the parsing and sorting of the
+    rules at start up.
+
+    The artifact records the artifact version and a hash of the rule set it
+    was compiled from. It is only used by an analyzer configured with the
+    same rule files and additional rules.
+
+    Args:
+        rules_path: the path of the trigger file.
+        artifact_path: where to write the artifact.
+        pre_negation_rules: the `pre_negation_rules` of the analyzer config.
+        post_negation_rules: the `post_negation_rules` of the analyzer
+            config.
+        context_rules_path: the path of the ConText trigger file, if the
+            analyzer runs with `context_analysis` enabled.
+        token_matching: whether the analyzer runs with `scoping_mode`
+            `"token"`, which matches rules against `Token` entries.
+
+    Returns: The hash of the compiled rule set.
+    """
+    rules_paths = [rules_path]
+    if context_rules_path:
+        rules_paths.append(context_rules_path)
+    all_rules, rules_hash = _read_rules(
+        rules_paths, pre_negation_rules, post_negation_rules
+    )
+    _save_artifact(
+        artifact_path, rules_hash, _build_matcher(all_rules, token_matching)
+    )
+    return rules_hash
+
 
 class NegationContextAnalyzer(PackProcessor):
     r"""
@@ -41,27 +243,55 @@ class NegationContextAnalyzer(PackProcessor):
 
     Referred repository link: https://github.com/chapmanbe/negex
     Paper link: https://pubmed.ncbi.nlm.nih.gov/12123149/
+
+    With `context_analysis` enabled, the analyzer is extended to the ConText
+    algorithm, which also decides whether an entity is historical,
+    hypothetical, or experienced by someone other than the patient, in the
+    same scan as negation.
+
+    ConText paper link: https://pubmed.ncbi.nlm.nih.gov/19435614/
     """
 
     def __init__(self):
         super().__init__()
-        self.__rules = None
-
-    def __sort_rules(self, rule_list: List[str]) -> List:
-        rule_list.sort(key=len, reverse=True)
-        sorted_rules = []
+        self.__matcher = None
+        self.__cache = LRUCache(0)
+        self.__sentence_stats = {
+            "sentences": 0,
+            "no_entity": 0,
+            "no_trigger": 0,
+        }
+        self.__scope_tags: List[Tuple[str, str]] = []
+        self.__span_type: Type[Annotation] = Sentence
+        self.__scope_window = 0
+        self.__rules_paths: List[str] = []
+        self.__rules_mtimes: List[float] = []
+        self.__next_rules_check = 0.0
 
-        for rule in rule_list:
-            rule_tokens = rule.strip().split("\t")
-            rule_phrase_tokens = rule_tokens[0].split()
-            rule_phrase = r"\s+".join(rule_phrase_tokens)
-            pattern = r"\b(" + rule_phrase + r")(?!(\[PREN\])|(\[POST\]))\b"
-            rule_tokens.append(pattern)
-            sorted_rules.append(rule_tokens)
+    def set_up(self, configs: Config):
+        if configs.scoping_mode not in ("text", "offset", "token", "window"):
+            raise ProcessorConfigError(
+                f"Unknown scoping_mode '{configs.scoping_mode}', expecting "
+                "'text', 'offset', 'token' or 'window'."
+            )
+        if configs.context_analysis and configs.scoping_mode == "text":
+            raise ProcessorConfigError(
+                "context_analysis requires scoping_mode to be 'offset', "
+                "'token' or 'window'."
+            )
 
-        return sorted_rules
+        self.__span_type = Sentence
+        self.__scope_window = configs.scope_window
+        if configs.scoping_mode == "window":
+            self.__span_type = get_class(configs.window_span_type)
+            if not issubclass(self.__span_type, Annotation):
+                raise ProcessorConfigError(
+                    f"window_span_type '{configs.window_span_type}' is not "
+                    "an Annotation type."
+                )
+            if self.__scope_window <= 0:
+                self.__scope_window = NEGEX_SCOPE_WINDOW
 
-    def set_up(self, configs: Config):
         if len(configs.negation_rules_path) > 0:
             negation_rules_path = configs.negation_rules_path
         else:
@@ -71,11 +301,77 @@ class NegationContextAnalyzer(PackProcessor):
             )
             negation_rules_path = dir_path
 
-        with open(negation_rules_path, "r", encoding="utf8") as rules_file:
-            all_rules = rules_file.readlines()
-            all_rules.extend(configs.pre_negation_rules)
-            all_rules.extend(configs.post_negation_rules)
-            self.__rules = self.__sort_rules(all_rules)
+        self.__rules_paths = [negation_rules_path]
+        self.__scope_tags = [("[PREN]", "[POST]")]
+        if configs.context_analysis:
+            if len(configs.context_rules_path) > 0:
+                self.__rules_paths.append(configs.context_rules_path)
+            else:
+                self.__rules_paths.append(
+                    os.path.join(
+                        os.path.dirname(os.path.dirname(__file__)),
+                        "resources/context_triggers.txt",
+                    )
+                )
+            self.__scope_tags.extend(CONTEXT_TAGS.values())
+
+        self.__cache = LRUCache(configs.cache_size)
+        self.__load_rules(configs)
+
+    def __load_rules(self, configs: Config):
+        r"""
+        Load the rule set from the compiled artifact if it is up to date, or
+        compile it from the rule files otherwise.
+        """
+        rules_mtimes = [os.stat(path).st_mtime for path in self.__rules_paths]
+        all_rules, rules_hash = _read_rules(
+            self.__rules_paths,
+            configs.pre_negation_rules,
+            configs.post_negation_rules,
+        )
+
+        word_tokens = configs.scoping_mode == "token"
+        matcher = None
+        if configs.compiled_rules_path:
+            matcher = _load_artifact(
+                configs.compiled_rules_path, rules_hash, word_tokens
+            )
+        if matcher is None:
+            matcher = _build_matcher(all_rules, word_tokens)
+            if configs.compiled_rules_path:
+                _save_artifact(configs.compiled_rules_path, rules_hash, matcher)
+
+        # Results of the previous rule set are no longer valid.
+        self.__matcher = matcher
+        self.__cache.clear()
+        self.__rules_mtimes = rules_mtimes
+
+    def __check_rules_update(self):
+        r"""
+        Reload the rule set when a rule file has been modified, checking at
+        most once every `watch_interval` seconds.
+        """
+        now = time.monotonic()
+        if now < self.__next_rules_check:
+            return
+        self.__next_rules_check = now + self.configs.watch_interval
+
+        try:
+            rules_mtimes = [
+                os.stat(path).st_mtime for path in self.__rules_paths
+            ]
+            if rules_mtimes == self.__rules_mtimes:
+                return
+            self.__load_rules(self.configs)
+        except (OSError, UnicodeDecodeError) as e:
+            logging.warning(
+                "Failed to reload negation rules from %s, keeping the "
+                "current rules: %s",
+                self.__rules_paths,
+                e,
+            )
+            return
+        logging.info("Reloaded negation rules from %s", self.__rules_paths)
 
     def initialize(self, resources: Resources, configs: Config):
         super().initialize(resources, configs)
@@ -120,109 +416,406 @@ class NegationContextAnalyzer(PackProcessor):
         On negation detection, we replace those with [NEGATED]..[NEGATED].
         These tags are then used to define NegationContext annotations in the
         `input_pack` with corresponding polarity.
+
+        With `scoping_mode` set to `"offset"`, the sentence text is not
+        tagged. The same scope rules are applied to the character offsets of
+        the rule phrases and the entity mentions instead, see
+        :meth:`scope_negations`. If `context_analysis` is enabled, the
+        historical, hypothetical and experiencer attributes are decided in
+        the same pass, see :meth:`scope_context`.
+
+        With `scoping_mode` set to `"window"`, the spans of
+        `window_span_type`, such as `Body` or `Document`, are analyzed
+        instead of sentences, so no sentence segmentation is needed. As in
+        NegEx, a scope then ends after `scope_window` tokens, at a
+        conjunction, or at sentence-ending punctuation.
+
+        Sentences without entity mentions are skipped. Sentences where no
+        rule phrase can match, judged by their first words, get a positive
+        NegationContext for every entity without further analysis. Results of
+        the other sentences are cached per sentence text and relative entity
+        offsets, so repeated boilerplate sentences are only analyzed once.
+        The spans of the `"window"` mode are not cached, and not counted in
+        :attr:`sentence_stats`.
         """
 
-        for sentence in input_pack.get(Sentence):
-            filler = "_"
-            tagged_sentence = sentence.text
-            for rule in self.__rules:
-                reformat_rule = re.sub(r"\s+", filler, rule[0].strip())
-                tagged_sentence = re.sub(
-                    rule[3],
-                    rule[2].strip() + reformat_rule + rule[2].strip(),
-                    tagged_sentence,
+        if self.configs.watch_rules:
+            self.__check_rules_update()
+
+        # The spans of the "window" mode are whole notes or sections, which
+        # rarely repeat, so they are neither cached nor counted as sentences.
+        by_sentence = self.configs.scoping_mode != "window"
+        stats = (
+            self.__sentence_stats
+            if by_sentence
+            else dict.fromkeys(self.__sentence_stats, 0)
+        )
+        for segment in input_pack.get(self.__span_type):
+            stats["sentences"] += 1
+            entity_spans = sorted(
+                {
+                    (em.begin - segment.begin, em.end - segment.begin)
+                    for em in input_pack.get(EntityMention, segment)
+                }
+            )
+            if not entity_spans:
+                stats["no_entity"] += 1
+                continue
+
+            # Whitespace characters are all treated alike by the rules, so
+            # they are unified to let more sentences share a cache entry.
+            text = segment.text.translate(_WHITESPACE_TABLE)
+            token_spans: Optional[Tuple[Tuple[int, int], ...]] = None
+            if self.configs.scoping_mode == "token":
+                token_spans = tuple(
+                    (token.begin - segment.begin, token.end - segment.begin)
+                    for token in input_pack.get(Token, segment)
+                )
+                may_match = self.__matcher.may_match_tokens(
+                    [text[begin:end] for begin, end in token_spans]
+                )
+            else:
+                may_match = self.__matcher.may_match(text)
+
+            if not may_match:
+                # No rule phrase can match, so every entity is positive.
+                stats["no_trigger"] += 1
+                context = (
+                    (False, False, "patient")
+                    if self.configs.context_analysis
+                    else None
                 )
+                results = tuple(
+                    (begin, end, False, context) for begin, end in entity_spans
+                )
+            elif not by_sentence:
+                results = self.__analyze_offsets(text, entity_spans)
+            else:
+                cache_key = (text, tuple(entity_spans), token_spans)
+                results = self.__cache.get(cache_key)
+                if results is None:
+                    if self.configs.scoping_mode == "text":
+                        results = self.__analyze_tagged_text(text, entity_spans)
+                    else:
+                        results = self.__analyze_offsets(
+                            text, entity_spans, token_spans
+                        )
+                    self.__cache.put(cache_key, results)
+
+            for begin, end, polarity, context in results:
+                negation_context = NegationContext(
+                    input_pack, segment.begin + begin, segment.begin + end
+                )
+                negation_context.polarity = polarity
+                if context is not None:
+                    (
+                        negation_context.historical,
+                        negation_context.hypothetical,
+                        negation_context.experiencer,
+                    ) = context
+
+    def __analyze_tagged_text(
+        self, text: str, entity_spans: List[Tuple[int, int]]
+    ) -> Tuple[_Result, ...]:
+        r"""
+        Find the negation polarity of the entities of a sentence by tagging
+        the rule phrases and entities in the sentence text.
 
-            entities = [
-                em.text for em in input_pack.get(EntityMention, sentence)
-            ]
-            entities = set(entities)
-
-            for entity in entities:
-
-                # Precede all ].,?+(){^* with a '\' so the special characters
-                # dont interfere with the regex execution.
-                entity = re.sub(r"([.^$*+?{\\|()[\]])", r"\\\1", entity)
-                split_entity = entity.split()
-                joiner = r"\W+"
-                pattern = r"\b" + joiner.join(split_entity) + r"\b"
-                entityPattern = re.compile(pattern, re.IGNORECASE)
-                match = entityPattern.search(tagged_sentence)
-                if match:
-                    tagged_sentence = tagged_sentence.replace(
-                        match.group(0),
-                        "[ENTITY]"
-                        + re.sub(r"\s+", filler, match.group(0).strip())
-                        + "[ENTITY]",
-                    )
+        Returns: `(begin, end, polarity, None)` of the entities found in the
+        tagged text, relative to the sentence.
+        """
+        filler = "_"
+        tagged_sentence = self.__tag_triggers(text, filler)
+
+        entities = {text[begin:end] for begin, end in entity_spans}
+
+        for entity in entities:
+
+            # Precede all ].,?+(){^* with a '\' so the special characters
+            # dont interfere with the regex execution.
+            entity = re.sub(r"([.^$*+?{\\|()[\]])", r"\\\1", entity)
+            split_entity = entity.split()
+            joiner = r"\W+"
+            pattern = r"\b" + joiner.join(split_entity) + r"\b"
+            entityPattern = re.compile(pattern, re.IGNORECASE)
+            match = entityPattern.search(tagged_sentence)
+            if match:
+                tagged_sentence = tagged_sentence.replace(
+                    match.group(0),
+                    "[ENTITY]"
+                    + re.sub(r"\s+", filler, match.group(0).strip())
+                    + "[ENTITY]",
+                )
 
-            overlap_flag = 0
-            pre_negation_flag = 0
-            post_negation_flag = 0
+        overlap_flag = 0
+        pre_negation_flag = 0
+        post_negation_flag = 0
 
-            sentence_tokens = tagged_sentence.split()
+        sentence_tokens = tagged_sentence.split()
 
-            for i, _ in enumerate(sentence_tokens):
-                if sentence_tokens[i][:6] == "[PREN]":
-                    pre_negation_flag = 1
-                    overlap_flag = 0
+        for i, _ in enumerate(sentence_tokens):
+            if sentence_tokens[i][:6] == "[PREN]":
+                pre_negation_flag = 1
+                overlap_flag = 0
 
-                if sentence_tokens[i][:6] in ["[CONJ]", "[POST]"]:
-                    overlap_flag = 1
+            if sentence_tokens[i][:6] in ["[CONJ]", "[POST]"]:
+                overlap_flag = 1
 
-                if pre_negation_flag == 1 and overlap_flag == 0:
-                    sentence_tokens[i] = sentence_tokens[i].replace(
-                        "[ENTITY]", "[NEGATED]"
-                    )
+            if pre_negation_flag == 1 and overlap_flag == 0:
+                sentence_tokens[i] = sentence_tokens[i].replace(
+                    "[ENTITY]", "[NEGATED]"
+                )
 
-            sentence_tokens.reverse()
+        sentence_tokens.reverse()
 
-            for i, _ in enumerate(sentence_tokens):
-                if sentence_tokens[i][:6] == "[POST]":
-                    post_negation_flag = 1
-                    overlap_flag = 0
+        for i, _ in enumerate(sentence_tokens):
+            if sentence_tokens[i][:6] == "[POST]":
+                post_negation_flag = 1
+                overlap_flag = 0
 
-                if sentence_tokens[i][:6] in ["[CONJ]", "[PREN]"]:
-                    overlap_flag = 1
+            if sentence_tokens[i][:6] in ["[CONJ]", "[PREN]"]:
+                overlap_flag = 1
 
-                if post_negation_flag == 1 and overlap_flag == 0:
-                    sentence_tokens[i] = sentence_tokens[i].replace(
-                        "[ENTITY]", "[NEGATED]"
-                    )
+            if post_negation_flag == 1 and overlap_flag == 0:
+                sentence_tokens[i] = sentence_tokens[i].replace(
+                    "[ENTITY]", "[NEGATED]"
+                )
 
-            sentence_tokens.reverse()
-            tagged_sentence = " ".join(sentence_tokens)
-            tagged_sentence = tagged_sentence.replace(filler, " ")
-
-            r = re.compile(r"(\[NEGATED\][\w|\s]*\[NEGATED\])")
-            neg_matches = r.findall(tagged_sentence)
-
-            r = re.compile(r"(\[ENTITY\][\w|\s]*\[ENTITY\])")
-            pos_matches = r.findall(tagged_sentence)
-
-            for match in pos_matches:
-                substring = re.sub(r"(\[\w*\])", "", match)  # type: ignore
-                pattern = r"\b" + substring + r"\b"
-                result = re.search(pattern, sentence.text)
-                if result:
-                    negation_context = NegationContext(
-                        input_pack,
-                        sentence.span.begin + result.span()[0],
-                        sentence.span.begin + result.span()[1],
-                    )
-                    negation_context.polarity = False
-
-            for match in neg_matches:
-                substring = re.sub(r"(\[\w*\])", "", match)  # type: ignore
-                pattern = r"\b" + substring + r"\b"
-                result = re.search(pattern, sentence.text)
-                if result:
-                    negation_context = NegationContext(
-                        input_pack,
-                        sentence.span.begin + result.span()[0],
-                        sentence.span.begin + result.span()[1],
-                    )
-                    negation_context.polarity = True
+        sentence_tokens.reverse()
+        tagged_sentence = " ".join(sentence_tokens)
+        tagged_sentence = tagged_sentence.replace(filler, " ")
+
+        r = re.compile(r"\[(ENTITY|NEGATED)\]([\w|\s]*)\[\1\]")
+
+        # The tagged entities are in sentence order, so each one is the
+        # next occurrence of its text in the sentence.
+        results = []
+        next_begins: Dict[str, int] = {}
+        for match in r.finditer(tagged_sentence):
+            substring = match.group(2)
+            pattern = r"\b" + substring + r"\b"
+            result = re.compile(pattern).search(
+                text, next_begins.get(substring, 0)
+            )
+            if result:
+                next_begins[substring] = result.end()
+                polarity = match.group(1) == "NEGATED"
+                results.append(result.span() + (polarity, None))
+        return tuple(results)
+
+    def __analyze_offsets(
+        self,
+        text: str,
+        entity_spans: List[Tuple[int, int]],
+        token_spans: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> Tuple[_Result, ...]:
+        r"""
+        Find the negation polarity, and the ConText attributes if enabled,
+        of every entity span of a sentence, computed from offsets only.
+
+        Scopes are resolved over token positions. The tokens are given by
+        `token_spans`, taken from the `Token` entries in `"token"` mode, or
+        found with :func:`tokenize_with_spans` otherwise.
+
+        Returns: `(begin, end, polarity, context)` of each entity, relative
+        to the sentence.
+        """
+        if not entity_spans:
+            return ()
+        if token_spans is None:
+            token_spans = tokenize_with_spans(text)
+            token_begins = [begin for begin, _ in token_spans]
+            triggers = [
+                (
+                    bisect_left(token_begins, begin),
+                    bisect_left(token_begins, end),
+                    tag,
+                )
+                for begin, end, tag in self.__matcher.find(
+                    text, list(token_spans)
+                )
+            ]
+            if self.configs.scoping_mode == "window":
+                triggers.extend(
+                    (i, i + 1, "[CONJ]")
+                    for i, (begin, end) in enumerate(token_spans)
+                    if text[begin:end] in _WINDOW_TERMINATORS
+                    and text[end : end + 1] in ("", " ")
+                )
+        else:
+            token_begins = [begin for begin, _ in token_spans]
+            triggers = self.__matcher.find_tokens(
+                [text[begin:end] for begin, end in token_spans]
+            )
+        token_ends = [end for _, end in token_spans]
+        entity_tokens = [
+            (bisect_right(token_ends, begin), bisect_left(token_begins, end))
+            for begin, end in entity_spans
+        ]
+
+        scopes = self.scope_context(
+            triggers,
+            entity_tokens,
+            self.__scope_tags,
+            self.__scope_window,
+        )
+        if not self.configs.context_analysis:
+            return tuple(
+                (begin, end, polarity, None)
+                for (begin, end), polarity in zip(entity_spans, scopes[0])
+            )
+        return tuple(
+            (
+                begin,
+                end,
+                negated,
+                (historical, hypothetical, "other" if other else "patient"),
+            )
+            for (begin, end), negated, historical, hypothetical, other in zip(
+                entity_spans, *scopes
+            )
+        )
+
+    @classmethod
+    def scope_negations(
+        cls,
+        triggers: List[Tuple[int, int, str]],
+        entity_spans: List[Tuple[int, int]],
+    ) -> List[bool]:
+        r"""
+        Decide the negation polarity of entities from the positions of the
+        rule phrases around them.
+
+        A `[PREN]` phrase negates the entities after it, and a `[POST]`
+        phrase negates the entities before it. The scope of a `[PREN]` phrase
+        ends at the next `[CONJ]` or `[POST]` phrase, and the scope of a
+        `[POST]` phrase ends at the previous `[CONJ]` or `[PREN]` phrase.
+        Rule phrases that overlap an entity are ignored.
+
+        Args:
+            triggers: `(begin, end, tag)` of the rule phrases, sorted and
+                non-overlapping, as returned by the trigger matcher.
+            entity_spans: `(begin, end)` of the entities, sorted.
+
+        Returns: The negation polarity of each entity in `entity_spans`.
+        """
+        return cls.scope_context(
+            triggers, entity_spans, [("[PREN]", "[POST]")]
+        )[0]
+
+    @staticmethod
+    def scope_context(
+        triggers: List[Tuple[int, int, str]],
+        entity_spans: List[Tuple[int, int]],
+        scope_tags: Sequence[Tuple[str, str]],
+        window: int = 0,
+    ) -> List[List[bool]]:
+        r"""
+        Decide for several context categories at once which entities are in
+        the scope of a rule phrase, with one forward and one backward pass
+        over the rule phrases and entities.
+
+        For each category, given as a `(pre_tag, post_tag)` pair, a
+        `pre_tag` phrase covers the entities after it until the next `[CONJ]`
+        or `post_tag` phrase, and a `post_tag` phrase covers the entities
+        before it until the previous `[CONJ]` or `pre_tag` phrase, as for
+        negation in :meth:`scope_negations`. Rule phrases that overlap an
+        entity are ignored.
+
+        Args:
+            triggers: `(begin, end, tag)` of the rule phrases, sorted and
+                non-overlapping, as returned by the trigger matcher.
+            entity_spans: `(begin, end)` of the entities, sorted.
+            scope_tags: the `(pre_tag, post_tag)` pair of each category.
+            window: if positive, a scope only covers the entities with at
+                most `window` positions between them and its rule phrase.
+                Positions can be characters or tokens, the window is counted
+                in the same unit.
+
+        Returns: For each category, whether each entity in `entity_spans` is
+        in its scope.
+        """
+        entity_begins = [begin for begin, _ in entity_spans]
+        max_ends = list(accumulate((end for _, end in entity_spans), max))
+
+        # Events are (begin, end, tag, entity index), entities have no tag.
+        events: List[Tuple[int, int, str, int]] = [
+            (begin, end, "", i) for i, (begin, end) in enumerate(entity_spans)
+        ]
+        for begin, end, tag in triggers:
+            i = bisect_left(entity_begins, end)
+            if i == 0 or max_ends[i - 1] <= begin:
+                events.append((begin, end, tag, -1))
+        events.sort()
+
+        in_scope = [[False] * len(entity_spans) for _ in scope_tags]
+        for direction, ordered_events in ((0, events), (1, reversed(events))):
+            # The categories each tag opens or closes a scope of.
+            starts: Dict[str, List[int]] = {}
+            stops: Dict[str, List[int]] = {}
+            for category, tags in enumerate(scope_tags):
+                starts.setdefault(tags[direction], []).append(category)
+                stops.setdefault(tags[1 - direction], []).append(category)
+
+            # The last position covered by the open scope of each category,
+            # or None. Positions are negated in the backward pass, so that
+            # scopes always extend towards larger positions.
+            limits: List[Optional[float]] = [None] * len(scope_tags)
+            for begin, end, tag, index in ordered_events:
+                if direction == 1:
+                    begin, end = -end, -begin
+                if not tag:
+                    for category, limit in enumerate(limits):
+                        if limit is not None and begin <= limit:
+                            in_scope[category][index] = True
+                elif tag == "[CONJ]":
+                    limits = [None] * len(scope_tags)
+                else:
+                    for category in starts.get(tag, ()):
+                        limits[category] = end + window if window else math.inf
+                    for category in stops.get(tag, ()):
+                        limits[category] = None
+        return in_scope
+
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        r"""
+        Usage counters of the sentence result cache: `hits`, `misses`,
+        `evictions`, `hit_rate`, `size` and `max_size`.
+        """
+        return self.__cache.stats()
+
+    @property
+    def sentence_stats(self) -> Dict[str, int]:
+        r"""
+        The number of processed `sentences`, and how many of them were
+        short-circuited because they had no entity (`no_entity`) or no
+        possible rule phrase (`no_trigger`). Not counted in `"window"` mode.
+        """
+        return dict(self.__sentence_stats)
+
+    def finish(self, resource: Resources):
+        logging.info(
+            "NegationContextAnalyzer sentence stats: %s, cache stats: %s",
+            self.__sentence_stats,
+            self.__cache.stats(),
+        )
+        super().finish(resource)
+
+    def __tag_triggers(self, text: str, filler: str) -> str:
+        r"""
+        Wrap every rule phrase found in `text` with its tag, joining the
+        words of the phrase with `filler`, e.g. `[PREN]absence_of[PREN]`.
+        All rule phrases are found in one pass of the trigger matcher.
+        """
+        pieces = []
+        last_end = 0
+        for begin, end, tag in self.__matcher.find(text):
+            pieces.append(text[last_end:begin])
+            pieces.append(tag + re.sub(r"\s+", filler, text[begin:end]) + tag)
+            last_end = end
+        pieces.append(text[last_end:])
+        return "".join(pieces)
 
     @classmethod
     def default_configs(cls):
@@ -236,20 +829,86 @@ class NegationContextAnalyzer(PackProcessor):
               in sentences.
             - `pre_negation_rules`: an additional set of pre negation rules
               that are to be considered along with the default rules that
-              processor uses. Example: `"pre_negation_rules": ["absence of",
+              processor uses. Rules without a tag column are tagged as
+              `[PREN]`. Example: `"pre_negation_rules": ["absence of",
               "no"]`
 
             - `post_negation_rules`: an additional set of post negation rules
               that are to be considered along with the default rules that
-              processor uses. Example: `"post_negation_rules": ["is absent",
+              processor uses. Rules without a tag column are tagged as
+              `[POST]`. Example: `"post_negation_rules": ["is absent",
               "not present"]"`
 
+            - `scoping_mode`: how the scope of the rule phrases is resolved.
+              `"text"` tags the rule phrases and entities in the sentence
+              text, and finds the occurrences of the entity texts in it.
+              `"offset"` works on the offsets of the rule phrases and of
+              every `EntityMention`, without re-tagging the text.
+              `"token"` works like `"offset"`, but reuses the `Token`
+              entries of the pack instead of splitting the sentence, and
+              matches the rule phrases case-insensitively against them.
+              `"window"` works like `"offset"` on the `window_span_type`
+              spans instead of sentences, ending scopes at sentence-ending
+              punctuation and after `scope_window` tokens.
+
+            - `scope_window`: the maximum number of tokens between a rule
+              phrase and an entity in its scope, for the `"offset"`,
+              `"token"` and `"window"` modes. Tokens are the `Token` entries
+              in `"token"` mode. 0 means the scope can cover the whole
+              sentence, or 5 tokens as in NegEx for the `"window"` mode.
+
+            - `window_span_type`: the type of the spans analyzed in
+              `"window"` mode, e.g. `"ftx.medical.clinical_ontology.Body"`.
+
+            - `context_analysis`: if `True`, the `historical`, `hypothetical`
+              and `experiencer` attributes of the NegationContext are
+              decided as well, following the ConText algorithm. The
+              triggers of these attributes are loaded from
+              `context_rules_path`, in the same tab-delimited format with
+              the tags `[PREH]`/`[POSH]` (historical), `[PREC]`/`[POSC]`
+              (hypothetical) and `[PREE]`/`[POSE]` (experienced by someone
+              other than the patient). Requires a `scoping_mode` other than
+              `"text"`.
+
+            - `context_rules_path`: provides the location of the ConText
+              trigger file. The bundled `context_triggers.txt` is used when
+              empty.
+
+            - `cache_size`: the number of sentence results kept in a
+              least-recently-used cache. A sentence with the same text and
+              the same relative entity offsets as a cached one reuses its
+              result. Set to 0 to disable the cache. Not used in `"window"`
+              mode.
+
+            - `compiled_rules_path`: the path of a rule artifact written by
+              :func:`compile_negation_rules`. It is loaded instead of
+              parsing the rule file when it matches the current rules, and
+              is (re)written from the rule file when it does not. Disabled
+              when empty.
+
+            - `watch_rules`: if `True`, the rule file is checked for
+              modifications before processing a pack, and the rule set is
+              swapped for the recompiled rules without restarting the
+              pipeline.
+
+            - `watch_interval`: the minimum number of seconds between two
+              checks of the rule file when `watch_rules` is enabled.
+
         Returns: A dictionary with the default config for this processor.
         """
         return {
             "negation_rules_path": "",
             "pre_negation_rules": [],
             "post_negation_rules": [],
+            "scoping_mode": "text",
+            "scope_window": 0,
+            "window_span_type": "ft.onto.base_ontology.Document",
+            "context_analysis": False,
+            "context_rules_path": "",
+            "cache_size": 4096,
+            "compiled_rules_path": "",
+            "watch_rules": False,
+            "watch_interval": 5.0,
         }
 
     def expected_types_and_attributes(self):
@@ -260,15 +919,23 @@ class NegationContextAnalyzer(PackProcessor):
         :meth:`~forte.pipeline.Pipeline.enforce_consistency` was enabled for
         the pipeline.
         """
-        return {
-            "ft.onto.base_ontology.Sentence": set(),
+        expectation = {
             "ft.onto.base_ontology.EntityMention": {"ner_type"},
         }
+        if self.configs.scoping_mode == "window":
+            expectation[self.configs.window_span_type] = set()
+        else:
+            expectation["ft.onto.base_ontology.Sentence"] = set()
+        if self.configs.scoping_mode == "token":
+            expectation["ft.onto.base_ontology.Token"] = set()
+        return expectation
 
     def record(self, record_meta: Dict[str, Set[str]]):
         r"""
         Method to add output type record of `NegationContext` which
-        is `"ftx.onto.clinical.NegationContext"` with attribute `polarity`
+        is `"ftx.onto.clinical.NegationContext"` with attribute `polarity`,
+        and `historical`, `hypothetical` and `experiencer` if
+        `context_analysis` is enabled,
         to :attr:`forte.data.data_pack.Meta.record`.
 
         Args:
@@ -276,3 +943,7 @@ class NegationContextAnalyzer(PackProcessor):
                 fill in for consistency checking.
         """
         record_meta["ftx.onto.clinical.NegationContext"] = {"polarity"}
+        if self.configs.context_analysis:
+            record_meta["ftx.onto.clinical.NegationContext"].update(
+                CONTEXT_TAGS.keys()
+            )
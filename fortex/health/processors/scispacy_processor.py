@@ -14,25 +14,136 @@
 """
 SciSpacy Processor
 """
-from typing import Dict, Set
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 import importlib
 
 import spacy
-from forte.common import Resources
+from forte.common import ProcessorConfigError, Resources
 from forte.common.configuration import Config
+from forte.data.batchers import FixedSizeDataPackBatcher, ProcessingBatcher
 from forte.data.data_pack import DataPack
+from forte.data.ontology.top import Annotation
 from forte.processors.base import PackProcessor
+from forte.processors.base.batch_processor import PackingBatchProcessor
+from forte.utils import get_class
+from ft.onto.base_ontology import Document
 
 # pylint: disable=unused-import
 from scispacy.abbreviation import AbbreviationDetector
 from scispacy.hyponym_detector import HyponymDetector
 
 from ftx.medical.clinical_ontology import Hyponym, Abbreviation, Phrase
+from fortex.health.utils.model_registry import model_registry
+from fortex.health.utils.spacy_pipeline import load_pruned_pipeline
 
 __all__ = [
     "ScispaCyProcessor",
+    "ScispaCyBatcher",
+    "BatchedScispaCyProcessor",
 ]
 
+# The `(begin, end)` character offsets of a span.
+Offsets = Tuple[int, int]
+
+_PIPE_NAMES = ("abbreviation_detector", "hyponym_detector")
+
+# The components of the scispaCy models each pipe depends on. The
+# abbreviation detector only matches tokens, while the Hearst patterns of the
+# hyponym detector match on part-of-speech tags, lemmas and dependencies.
+_REQUIRED_COMPONENTS: Dict[str, Tuple[str, ...]] = {
+    "abbreviation_detector": (),
+    "hyponym_detector": (
+        "tok2vec",
+        "tagger",
+        "morphologizer",
+        "attribute_ruler",
+        "lemmatizer",
+        "parser",
+    ),
+}
+
+
+def _pipe_names(configs: Config) -> List[str]:
+    r"""
+    Returns: The pipes of `configs.pipe_name`, a pipe name or a list of pipe
+    names.
+    """
+    pipe_names = configs.pipe_name
+    if isinstance(pipe_names, str):
+        pipe_names = [pipe_names]
+    pipe_names = list(dict.fromkeys(pipe_names))
+    for pipe_name in pipe_names:
+        if pipe_name not in _PIPE_NAMES:
+            raise ProcessorConfigError(
+                f"Unknown pipe_name '{pipe_name}', expecting one of "
+                f"{', '.join(_PIPE_NAMES)}."
+            )
+    return pipe_names
+
+
+def _acquire_extractor(owner: Any, configs: Config, serializable=False):
+    r"""
+    Returns: The spaCy pipeline of `configs.model_name` with the pipes of
+    `configs.pipe_name`, shared through the model registry. The components
+    of the model the pipes do not depend on are excluded. With
+    `serializable`, the abbreviations are stored in a form that can be sent
+    between processes.
+    """
+    pipe_names = _pipe_names(configs)
+    on_gpu = False
+    if configs.require_gpu:
+        on_gpu = spacy.require_gpu(configs.gpu_id)
+    if configs.prefer_gpu:
+        on_gpu = spacy.prefer_gpu(configs.gpu_id)
+
+    def load():
+        extractor = load_pruned_pipeline(
+            configs.model_name,
+            (
+                component
+                for pipe_name in pipe_names
+                for component in _REQUIRED_COMPONENTS[pipe_name]
+            ),
+        )
+        if "abbreviation_detector" in pipe_names:
+            extractor.add_pipe(
+                "abbreviation_detector",
+                config={"make_serializable": True} if serializable else {},
+            )
+        if "hyponym_detector" in pipe_names:
+            extractor.add_pipe(
+                "hyponym_detector", last=True, config={"extended": False}
+            )
+        return extractor
+
+    kind = "spacy+" + "+".join(sorted(pipe_names))
+    if serializable:
+        kind += "+serializable"
+    # The pipeline is shared with the processors using the same model and
+    # pipes.
+    return model_registry.acquire(
+        owner,
+        kind,
+        configs.model_name,
+        load,
+        device=f"gpu:{configs.gpu_id}" if on_gpu else "cpu",
+    )
+
+
+def _record(configs: Config, record_meta: Dict[str, Set[str]]):
+    pipe_names = _pipe_names(configs)
+    if "abbreviation_detector" in pipe_names:
+        record_meta["ftx.medical.clinical_ontology.Abbreviation"] = {
+            "long_form",
+        }
+    if "hyponym_detector" in pipe_names:
+        record_meta["ftx.medical.clinical_ontology.Hyponym"] = {
+            "hyponym_link",
+            "parent",
+            "child",
+        }
+        record_meta["ft.onto.base_ontology.Phrase"] = set()
+
 
 class ScispaCyProcessor(PackProcessor):
     r"""
@@ -42,24 +153,20 @@ class ScispaCyProcessor(PackProcessor):
 
     Referred repository link:
     https://pythonlang.dev/repo/allenai-scispacy/
+
+    With several pipes in `pipe_name`, each entry is parsed once by a
+    single pipeline holding all of them.
     """
 
     def __init__(self):
         super().__init__()
         self.extractor = None
+        self.pipe_names: List[str] = []
 
     def set_up(self):
-        if self.configs.require_gpu:
-            spacy.require_gpu(self.configs.gpu_id)
-        if self.configs.prefer_gpu:
-            spacy.prefer_gpu(self.configs.gpu_id)
-        self.extractor = spacy.load(self.configs.model_name)
-        if self.configs.pipe_name == "abbreviation_detector":
-            self.extractor.add_pipe(self.configs.pipe_name)
-        elif self.configs.pipe_name == "hyponym_detector":
-            self.extractor.add_pipe(
-                self.configs.pipe_name, last=True, config={"extended": False}
-            )
+        self.pipe_names = _pipe_names(self.configs)
+        model_registry.release(self)
+        self.extractor = _acquire_extractor(self, self.configs)
 
     def initialize(self, resources: Resources, configs: Config):
         super().initialize(resources, configs)
@@ -79,7 +186,7 @@ class ScispaCyProcessor(PackProcessor):
         for entry_specified in input_pack.get(entry_type=entry):
 
             doc = self.extractor(entry_specified.text)
-            if self.configs.pipe_name == "abbreviation_detector":
+            if "abbreviation_detector" in self.pipe_names:
                 list_of_abrvs = []
                 for abrv in doc._.abbreviations:
                     tmp_abrv = Abbreviation(
@@ -90,7 +197,7 @@ class ScispaCyProcessor(PackProcessor):
                     tmp_abrv.long_form = abrv._.long_form
                     list_of_abrvs.append(tmp_abrv)
 
-            elif self.configs.pipe_name == "hyponym_detector":
+            if "hyponym_detector" in self.pipe_names:
                 for item in doc._.hearst_patterns:
 
                     general_concept: Phrase = Phrase(
@@ -112,6 +219,10 @@ class ScispaCyProcessor(PackProcessor):
                     hlink.general = item[1].text
                     hlink.specific = item[2].text
 
+    def finish(self, resource: Resources):
+        model_registry.release(self)
+        super().finish(resource)
+
     @classmethod
     def default_configs(cls):
         r"""
@@ -125,7 +236,8 @@ class ScispaCyProcessor(PackProcessor):
                          "Available models" sections for detail
          - `pipe_name`: the Spacy model pipe name for
                          classification, only 2 options here:
-                         abbreviation_detector or hyponym_detector
+                         abbreviation_detector or hyponym_detector,
+                         or a list of both to run them on one parse
          - `prefer_gpu`: the flag if prefer using gpu
          - `require_gpu`: the flag if require using gpu
          - `gpu_id`: the id of gpu
@@ -139,6 +251,7 @@ class ScispaCyProcessor(PackProcessor):
             "prefer_gpu": True,
             "require_gpu": False,
             "gpu_id": 0,
+            "@no_typecheck": ["pipe_name"],
         }
 
     def expected_types_and_attributes(self):
@@ -164,14 +277,215 @@ class ScispaCyProcessor(PackProcessor):
             record_meta: the field in the datapack for type record that need to
                 fill in for consistency checking.
         """
-        if self.configs.pipe_name == "abbreviation_detector":
-            record_meta["ftx.medical.clinical_ontology.Abbreviation"] = {
-                "long_form",
-            }
-        elif self.configs.pipe_name == "hyponym_detector":
-            record_meta["ftx.medical.clinical_ontology.Hyponym"] = {
-                "hyponym_link",
-                "parent",
-                "child",
-            }
-            record_meta["ft.onto.base_ontology.Phrase"] = {}  # type: ignore
+        _record(self.configs, record_meta)
+
+
+def _abbreviations(doc, offset: int) -> List[Tuple[int, int, str]]:
+    r"""
+    Returns: The `(begin, end, long_form)` of the abbreviations of `doc`,
+    shifted by `offset` characters.
+    """
+    abbreviations = []
+    for abrv in doc._.abbreviations:
+        if isinstance(abrv, dict):
+            # Made serializable to leave a worker process, see
+            # `make_serializable` of the scispaCy `AbbreviationDetector`.
+            long_form = abrv["long_text"]
+            abrv = doc[abrv["short_start"] : abrv["short_end"]]
+        else:
+            long_form = abrv._.long_form.text
+        abbreviations.append(
+            (offset + abrv.start_char, offset + abrv.end_char, long_form)
+        )
+    return abbreviations
+
+
+def _hyponyms(doc, offset: int) -> List[Tuple[str, Offsets, Offsets, str, str]]:
+    r"""
+    Returns: The `(hyponym_link, general_offsets, specific_offsets, general,
+    specific)` of the Hearst patterns of `doc`, with the offsets shifted by
+    `offset` characters, as added by :class:`ScispaCyProcessor`.
+    """
+    return [
+        (
+            link,
+            (offset + second.start_char, offset + second.end_char),
+            (offset + first.start_char, offset + first.end_char),
+            first.text,
+            second.text,
+        )
+        for link, first, second in doc._.hearst_patterns
+    ]
+
+
+class ScispaCyBatcher(FixedSizeDataPackBatcher):
+    r"""
+    Gathers the entries of consecutive data packs into batches of
+    `batch_size` entries for :class:`BatchedScispaCyProcessor`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entry_type: Type[Annotation] = Document
+
+    def _get_instance(self, data_pack: DataPack) -> Iterator[Dict[str, Any]]:
+        for entry in data_pack.get(self.entry_type):
+            yield {"text": entry.text, "begin": entry.begin}
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        The configuration of the batcher.
+
+        Following are the keys for this dictionary:
+
+            - `batch_size`: the number of entries gathered before running
+              the spaCy pipeline.
+
+        Returns: A dictionary with the default config for this batcher.
+        """
+        return {"batch_size": 1024}
+
+
+class BatchedScispaCyProcessor(PackingBatchProcessor[DataPack]):
+    r"""
+    A batched variant of :class:`ScispaCyProcessor`. The entries of several
+    data packs are gathered with :class:`ScispaCyBatcher`, and streamed
+    through `nlp.pipe` of spaCy, which processes `spacy_batch_size` texts at
+    once, in `n_process` processes. The abbreviations and hyponyms found are
+    then added to the packs the entries came from, at their offsets in the
+    pack.
+
+    Unlike :class:`ScispaCyProcessor`, the `long_form` of an
+    `Abbreviation` holds the text of the long form, as declared by the
+    ontology, since spaCy spans cannot leave a worker process.
+
+    With `n_process` above 1, spaCy starts its worker processes for every
+    batch, so `batcher.batch_size` should be large, and the hyponym
+    detector, whose results cannot be serialized, is not supported.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.extractor = None
+        self.pipe_names: List[str] = []
+
+    def initialize(self, resources: Resources, configs: Config):
+        super().initialize(resources, configs)
+        self.pipe_names = _pipe_names(configs)
+        if configs.n_process != 1 and "hyponym_detector" in self.pipe_names:
+            raise ProcessorConfigError(
+                "The hyponym detector can only run with `n_process` 1."
+            )
+        self.batcher.entry_type = get_class(configs.entry_type)
+        model_registry.release(self)
+        self.extractor = _acquire_extractor(
+            self, configs, serializable=configs.n_process != 1
+        )
+
+    @classmethod
+    def define_batcher(cls) -> ProcessingBatcher:
+        return ScispaCyBatcher()
+
+    def predict(self, data_batch: Dict) -> Dict[str, List[Any]]:
+        r"""
+        Run the spaCy pipeline on the entries of `data_batch`.
+
+        Args:
+            data_batch: the `text` and `begin` of the entries.
+
+        Returns: The `abbreviations` or `hyponyms` found in each entry, with
+        offsets in its pack, in the order of `data_batch`.
+        """
+        docs = self.extractor.pipe(
+            data_batch["text"],
+            batch_size=self.configs.spacy_batch_size,
+            n_process=self.configs.n_process,
+        )
+        results: Dict[str, List[Any]] = {"abbreviations": [], "hyponyms": []}
+        for doc, begin in zip(docs, data_batch["begin"]):
+            if "abbreviation_detector" in self.pipe_names:
+                results["abbreviations"].append(_abbreviations(doc, begin))
+            if "hyponym_detector" in self.pipe_names:
+                results["hyponyms"].append(_hyponyms(doc, begin))
+        return results
+
+    def pack(
+        self,
+        pack: DataPack,
+        predict_results: Dict[str, List[Any]],
+        context: Optional[Any] = None,
+    ):
+        for abbreviations in predict_results["abbreviations"]:
+            for begin, end, long_form in abbreviations:
+                abbreviation = Abbreviation(pack=pack, begin=begin, end=end)
+                abbreviation.long_form = long_form
+
+        for hyponyms in predict_results["hyponyms"]:
+            for hyponym in hyponyms:
+                link, general, specific, general_text, specific_text = hyponym
+                hlink = Hyponym(
+                    pack=pack,
+                    parent=Phrase(pack=pack, begin=general[0], end=general[1]),
+                    child=Phrase(pack=pack, begin=specific[0], end=specific[1]),
+                )
+                hlink.hyponym_link = link
+                hlink.general = general_text
+                hlink.specific = specific_text
+
+    def finish(self, resource: Resources):
+        model_registry.release(self)
+        super().finish(resource)
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        This defines a basic config structure for
+        `BatchedScispaCyProcessor`.
+
+        Following are the keys for this dictionary:
+         - `entry_type`, `model_name`, `pipe_name`, `prefer_gpu`,
+           `require_gpu`, `gpu_id`: as for :class:`ScispaCyProcessor`,
+         - `spacy_batch_size`: the number of texts processed at once by
+                               `nlp.pipe`,
+         - `n_process`: the number of processes of `nlp.pipe`, -1 for one
+                        per CPU,
+         - `batcher`: the configuration of :class:`ScispaCyBatcher`.
+
+        Returns: A dictionary with the default config for this processor.
+        """
+        return {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "en_core_sci_sm",
+            "pipe_name": "abbreviation_detector",
+            "prefer_gpu": True,
+            "require_gpu": False,
+            "gpu_id": 0,
+            "spacy_batch_size": 64,
+            "n_process": 1,
+            "batcher": ScispaCyBatcher.default_configs(),
+            "@no_typecheck": ["pipe_name"],
+        }
+
+    def expected_types_and_attributes(self):
+        r"""
+        Method to add user specified expected type which would be checked
+        before running the processor if the pipeline is initialized with
+        `enforce_consistency=True` or
+        :meth:`~forte.pipeline.Pipeline.enforce_consistency` was enabled for
+        the pipeline.
+        """
+        return {
+            self.configs.entry_type: set(),
+        }
+
+    def record(self, record_meta: Dict[str, Set[str]]):
+        r"""
+        Method to add output type record of `BatchedScispaCyProcessor`,
+        the same as :class:`ScispaCyProcessor`.
+
+        Args:
+            record_meta: the field in the datapack for type record that need to
+                fill in for consistency checking.
+        """
+        _record(self.configs, record_meta)
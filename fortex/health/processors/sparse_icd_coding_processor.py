@@ -0,0 +1,163 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Sparse Linear ICD Coding Processor
+"""
+from typing import Any, Dict, List, Optional, Set
+
+from forte.common import Resources
+from forte.common.configuration import Config
+from forte.common.exception import ProcessorConfigError
+from forte.data.batchers import ProcessingBatcher
+from forte.data.data_pack import DataPack
+from forte.processors.base import PackingBatchProcessor
+from forte.utils import get_class
+
+from ftx.medical.clinical_ontology import MedicalArticle
+from fortex.health.processors.icd_coding_processor import ICDCodingBatcher
+from fortex.health.utils.sparse_icd_model import SparseICDModel
+
+
+__all__ = [
+    "SparseICDCodingProcessor",
+]
+
+
+class SparseICDCodingProcessor(PackingBatchProcessor[DataPack]):
+    r"""
+    A fast ICD coder using a :class:`SparseICDModel`, a hashed n-gram TF-IDF
+    and one-vs-rest linear model trained with the `train` command of
+    `forte_health_cli`. It is orders of magnitude faster than
+    :class:`~fortex.health.processors.icd_coding_processor.ICDCodingProcessor`
+    on CPU, and can be used to triage large backlogs of notes, or as a
+    fallback.
+
+    The entries of several data packs are gathered into batches with
+    :class:`~fortex.health.processors.icd_coding_processor.ICDCodingBatcher`,
+    and each batch is coded with one sparse matrix product. A
+    `MedicalArticle` holding the codes is added over each entry.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.model = None
+
+    def initialize(self, resources: Resources, configs: Config):
+        super().initialize(resources, configs)
+        if not configs.model_path:
+            raise ProcessorConfigError(
+                "The `model_path` of the trained sparse ICD model is required."
+            )
+        if configs.top_k < 1:
+            raise ProcessorConfigError(
+                f"top_k must be at least 1, got {configs.top_k}."
+            )
+        self.batcher.entry_type = get_class(configs.entry_type)
+        self.model = SparseICDModel.load(configs.model_path)
+
+    @classmethod
+    def define_batcher(cls) -> ProcessingBatcher:
+        return ICDCodingBatcher()
+
+    def predict(self, data_batch: Dict) -> Dict[str, List[Any]]:
+        r"""
+        Code the entries of `data_batch` at once.
+
+        Args:
+            data_batch: the `text`, `begin` and `end` of the entries.
+
+        Returns: The `begin`, `end` and ranked `icd_codes` and `icd_scores`
+        of the entries, in the order of `data_batch`.
+        """
+        rankings = self.model.rank(data_batch["text"], self.configs.top_k)
+        return {
+            "begin": data_batch["begin"],
+            "end": data_batch["end"],
+            "icd_codes": [
+                [code for code, _ in ranking] for ranking in rankings
+            ],
+            "icd_scores": [
+                [score for _, score in ranking] for ranking in rankings
+            ],
+        }
+
+    def pack(
+        self,
+        pack: DataPack,
+        predict_results: Dict[str, List[Any]],
+        context: Optional[Any] = None,
+    ):
+        for begin, end, icd_codes, icd_scores in zip(
+            predict_results["begin"],
+            predict_results["end"],
+            predict_results["icd_codes"],
+            predict_results["icd_scores"],
+        ):
+            article = MedicalArticle(pack=pack, begin=begin, end=end)
+            article.icd_version = 10  # For ICD-10 coding
+            article.icd_code = icd_codes[0]
+            article.icd_codes = icd_codes
+            article.icd_scores = icd_scores
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        This defines a basic config structure for
+        `SparseICDCodingProcessor`.
+
+        Following are the keys for this dictionary:
+         - `entry_type`: the type of the entries to be coded,
+         - `model_path`: the `.npz` file of the model saved by the `train`
+                         command of `forte_health_cli`,
+         - `top_k`: the number of best codes stored in `icd_codes` and
+                    `icd_scores`,
+         - `batcher`: the configuration of :class:`ICDCodingBatcher`.
+
+        Returns:
+            A dictionary with the default config for this processor.
+        """
+        return {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_path": "",
+            "top_k": 5,
+            "batcher": {"batch_size": 1024, "max_wait": 0.0},
+        }
+
+    def expected_types_and_attributes(self):
+        r"""
+        Method to add user specified expected type which would be checked
+        before running the processor if the pipeline is initialized with
+        `enforce_consistency=True` or
+        :meth:`~forte.pipeline.Pipeline.enforce_consistency` was enabled for
+        the pipeline.
+        """
+        return {self.configs.entry_type: set()}
+
+    def record(self, record_meta: Dict[str, Set[str]]):
+        r"""
+        Method to add output type record of `SparseICDCodingProcessor`
+        which is `"ftx.medical.clinical_ontology.MedicalArticle"` with
+        attributes `icd_version`, `icd_code`, `icd_codes` and `icd_scores`
+        to :attr:`forte.data.data_pack.Meta.record`.
+
+        Args:
+            record_meta: the field in the datapack for type record that need to
+                fill in for consistency checking.
+        """
+        record_meta["ftx.medical.clinical_ontology.MedicalArticle"] = {
+            "icd_version",
+            "icd_code",
+            "icd_codes",
+            "icd_scores",
+        }
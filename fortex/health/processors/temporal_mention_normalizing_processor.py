@@ -14,8 +14,9 @@
 """
 Temporal Mention Normalizer
 """
-from typing import Dict, Set
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 import importlib
+import logging
 import re
 
 import spacy
@@ -25,15 +26,167 @@ from timexy import Timexy
 
 from forte.common import Resources
 from forte.common.configuration import Config
+from forte.data.batchers import FixedSizeDataPackBatcher, ProcessingBatcher
 from forte.data.data_pack import DataPack
+from forte.data.ontology.top import Annotation
 from forte.processors.base import PackProcessor
+from forte.processors.base.batch_processor import PackingBatchProcessor
+from forte.utils import get_class
+from ft.onto.base_ontology import Document
 
 from ftx.medical.clinical_ontology import NormalizedTemporalForm
+from fortex.health.utils.lru_cache import LRUCache
+from fortex.health.utils.model_registry import model_registry
+from fortex.health.utils.spacy_pipeline import load_pruned_pipeline
 
 __all__ = [
     "TemporalMentionNormalizingProcessor",
+    "TemporalMentionBatcher",
+    "BatchedTemporalMentionNormalizingProcessor",
 ]
 
+# The fields of the TIMEX3 annotations timexy stores in the `kb_id_` of its
+# entities, e.g. `TIMEX3 type="DURATION" value="P10D"`.
+_TYPE_PATTERN = re.compile(r'type="(.*?)"')
+_VALUE_PATTERN = re.compile(r'value="(.*?)"')
+
+# The `(begin, end, type, value)` of a normalized temporal mention.
+NormalizedForm = Tuple[int, int, Optional[str], Optional[str]]
+
+# Entries are normalized, and cached, segment by segment. A segment ends at
+# sentence-ending punctuation followed by a word, which keeps dates such as
+# "Oct. 10" or "10.10.2010" whole, or at a blank line.
+_SEGMENT_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[^\W\d])|\n\s*\n")
+
+
+def _acquire_extractor(owner: Any, configs: Config):
+    r"""
+    Returns: The spaCy pipeline of `configs.model_name` with the
+    `configs.pipe_name` pipe and the `configs.keep_components`, shared
+    through the model registry.
+    """
+    on_gpu = False
+    if configs.require_gpu:
+        on_gpu = spacy.require_gpu(configs.gpu_id)
+    if configs.prefer_gpu:
+        on_gpu = spacy.prefer_gpu(configs.gpu_id)
+
+    def load():
+        # Timexy matches the tokens with its own rules, so none of the
+        # trained components of the model are needed.
+        extractor = load_pruned_pipeline(
+            configs.model_name, configs.keep_components
+        )
+        if "ner" in extractor.pipe_names:
+            extractor.add_pipe(configs.pipe_name, before="ner")
+        else:
+            extractor.add_pipe(configs.pipe_name)
+        return extractor
+
+    # The pipeline is shared with the processors using the same model and
+    # components.
+    return model_registry.acquire(
+        owner,
+        "+".join(
+            ["spacy", configs.pipe_name] + sorted(configs.keep_components)
+        ),
+        configs.model_name,
+        load,
+        device=f"gpu:{configs.gpu_id}" if on_gpu else "cpu",
+    )
+
+
+def _normalized_forms(doc) -> List[NormalizedForm]:
+    r"""
+    Returns: The `(begin, end, type, value)` of the entities of `doc`, with
+    offsets in the text of `doc`. The `type` and `value` are `None` when the
+    entity has no TIMEX3 annotation.
+    """
+    forms = []
+    for entity in doc.ents:
+        kb_id = entity.kb_id_
+        match_type = _TYPE_PATTERN.search(kb_id)
+        match_value = _VALUE_PATTERN.search(kb_id)
+        forms.append(
+            (
+                entity.start_char,
+                entity.end_char,
+                match_type.group(1) if match_type else None,
+                match_value.group(1) if match_value else None,
+            )
+        )
+    return forms
+
+
+def _segments(text: str) -> List[Tuple[int, str]]:
+    r"""
+    Returns: The `(offset, text)` of the non-empty segments of `text`.
+    """
+    segments = []
+    begin = 0
+    for boundary in _SEGMENT_BOUNDARY.finditer(text):
+        segments.append((begin, text[begin : boundary.start()]))
+        begin = boundary.end()
+    segments.append((begin, text[begin:]))
+    return [(offset, segment) for offset, segment in segments if segment]
+
+
+def _cached_forms(
+    extractor,
+    cache: LRUCache,
+    texts: List[str],
+    batch_size: Optional[int] = None,
+) -> List[List[NormalizedForm]]:
+    r"""
+    Normalize `texts` segment by segment. Segments found in `cache` are
+    reused, and every other distinct segment is run once through `nlp.pipe`
+    of the spaCy pipeline `extractor`, then cached.
+
+    Args:
+        extractor: the spaCy pipeline with the timexy pipe.
+        cache: the normalized forms of segments, keyed by segment text.
+        texts: the texts to normalize.
+        batch_size: the number of segments processed at once by `nlp.pipe`.
+
+    Returns: The normalized forms of each text, with offsets in the text.
+    """
+    text_segments = [_segments(text) for text in texts]
+    results: Dict[str, List[NormalizedForm]] = {}
+    missing = []
+    for segment in dict.fromkeys(
+        segment for segments in text_segments for _, segment in segments
+    ):
+        forms = cache.get(segment)
+        if forms is None:
+            missing.append(segment)
+        else:
+            results[segment] = forms
+    docs = extractor.pipe(missing, batch_size=batch_size)
+    for segment, doc in zip(missing, docs):
+        results[segment] = _normalized_forms(doc)
+        cache.put(segment, results[segment])
+    return [
+        [
+            (offset + begin, offset + end, timex_type, value)
+            for offset, segment in segments
+            for begin, end, timex_type, value in results[segment]
+        ]
+        for segments in text_segments
+    ]
+
+
+def _add_normalized_forms(
+    pack: DataPack, forms: List[NormalizedForm], offset: int
+):
+    for begin, end, timex_type, value in forms:
+        normalized_form = NormalizedTemporalForm(
+            pack=pack, begin=offset + begin, end=offset + end
+        )
+        if timex_type is not None:
+            normalized_form.type = timex_type
+        if value is not None:
+            normalized_form.value = value
+
 
 class TemporalMentionNormalizingProcessor(PackProcessor):
     r"""
@@ -49,14 +202,12 @@ class TemporalMentionNormalizingProcessor(PackProcessor):
     def __init__(self):
         super().__init__()
         self.extractor = None
+        self.__cache = LRUCache(0)
 
     def set_up(self):
-        if self.configs.require_gpu:
-            spacy.require_gpu(self.configs.gpu_id)
-        if self.configs.prefer_gpu:
-            spacy.prefer_gpu(self.configs.gpu_id)
-        self.extractor = spacy.load(self.configs.model_name)
-        self.extractor.add_pipe(self.configs.pipe_name, before="ner")
+        model_registry.release(self)
+        self.extractor = _acquire_extractor(self, self.configs)
+        self.__cache = LRUCache(self.configs.cache_size)
 
     def initialize(self, resources: Resources, configs: Config):
         super().initialize(resources, configs)
@@ -71,20 +222,28 @@ class TemporalMentionNormalizingProcessor(PackProcessor):
         path_str, module_str = self.configs.entry_type.rsplit(".", 1)
         mod = importlib.import_module(path_str)
         entry = getattr(mod, module_str)
-        for entry_specified in input_pack.get(entry_type=entry):
-            doc = self.extractor(entry_specified.text)
-            normalized_text = []
-            for entities in doc.ents:
-                tmp_txt = NormalizedTemporalForm(
-                    pack=input_pack, begin=0, end=len(entities.text)
-                )
-                matches = re.findall(r'type="(.*?)"', entities.kb_id_)
-                if matches:
-                    tmp_txt.type = matches[0]
-                matches = re.findall(r'value="(.*?)"', entities.kb_id_)
-                if matches:
-                    tmp_txt.value = matches[0]
-                normalized_text.append(tmp_txt)
+        entries = list(input_pack.get(entry_type=entry))
+        entry_forms = _cached_forms(
+            self.extractor, self.__cache, [e.text for e in entries]
+        )
+        for entry_specified, forms in zip(entries, entry_forms):
+            _add_normalized_forms(input_pack, forms, entry_specified.begin)
+
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        r"""
+        Usage counters of the normalization cache: `hits`, `misses`,
+        `evictions`, `hit_rate`, `size` and `max_size`.
+        """
+        return self.__cache.stats()
+
+    def finish(self, resource: Resources):
+        logging.info(
+            "TemporalMentionNormalizingProcessor cache stats: %s",
+            self.__cache.stats(),
+        )
+        model_registry.release(self)
+        super().finish(resource)
 
     @classmethod
     def default_configs(cls):
@@ -97,15 +256,30 @@ class TemporalMentionNormalizingProcessor(PackProcessor):
          - `pipe_name`: the Spacy model pipe name for
                          normalization, here:
                          timexy
+         - `keep_components`: the components of the spaCy model kept
+                         besides the tokenizer, all the others are
+                         excluded when loading it. With `ner`, the
+                         named entities are kept in the document, and
+                         their mentions are normalized as well
+         - `cache_size`: the number of segment results kept in a
+                         least-recently-used cache, keyed by the
+                         segment text. Entries are normalized segment
+                         by segment, split at sentence-ending
+                         punctuation followed by a word and at blank
+                         lines, so a sentence repeated in the same or
+                         another note reuses its result. Set to 0 to
+                         disable the cache.
         Returns: A dictionary with the default config for this processor.
         """
         return {
             "entry_type": "ft.onto.base_ontology.Document",
             "model_name": "en_core_web_sm",
             "pipe_name": "timexy",
+            "keep_components": [],
             "prefer_gpu": True,
             "require_gpu": False,
             "gpu_id": 0,
+            "cache_size": 4096,
         }
 
     def expected_types_and_attributes(self):
@@ -132,3 +306,171 @@ class TemporalMentionNormalizingProcessor(PackProcessor):
             "type",
             "value",
         }
+
+
+class TemporalMentionBatcher(FixedSizeDataPackBatcher):
+    r"""
+    Gathers the entries of consecutive data packs into batches of
+    `batch_size` entries for
+    :class:`BatchedTemporalMentionNormalizingProcessor`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entry_type: Type[Annotation] = Document
+
+    def _get_instance(self, data_pack: DataPack) -> Iterator[Dict[str, Any]]:
+        for entry in data_pack.get(self.entry_type):
+            yield {"text": entry.text, "begin": entry.begin}
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        The configuration of the batcher.
+
+        Following are the keys for this dictionary:
+
+            - `batch_size`: the number of entries gathered before running
+              the spaCy pipeline.
+
+        Returns: A dictionary with the default config for this batcher.
+        """
+        return {"batch_size": 1024}
+
+
+class BatchedTemporalMentionNormalizingProcessor(
+    PackingBatchProcessor[DataPack]
+):
+    r"""
+    A batched variant of :class:`TemporalMentionNormalizingProcessor`. The
+    entries of several data packs are gathered with
+    :class:`TemporalMentionBatcher`, and streamed through `nlp.pipe` of
+    spaCy, which processes `spacy_batch_size` segments at once. The
+    normalized temporal forms are then added to the packs the entries came
+    from, at their offsets in the pack.
+
+    With the default `keep_components`, the pipeline only runs the
+    tokenizer and the rules of timexy, so normalizing costs about as much
+    as tokenizing. Segments found in the normalization cache, and repeated
+    segments of a batch, are not run through the pipeline again.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.extractor = None
+        self.__cache = LRUCache(0)
+
+    def initialize(self, resources: Resources, configs: Config):
+        super().initialize(resources, configs)
+        self.batcher.entry_type = get_class(configs.entry_type)
+        model_registry.release(self)
+        self.extractor = _acquire_extractor(self, configs)
+        self.__cache = LRUCache(configs.cache_size)
+
+    @classmethod
+    def define_batcher(cls) -> ProcessingBatcher:
+        return TemporalMentionBatcher()
+
+    def predict(self, data_batch: Dict) -> Dict[str, List[Any]]:
+        r"""
+        Run the spaCy pipeline on the entries of `data_batch`.
+
+        Args:
+            data_batch: the `text` and `begin` of the entries.
+
+        Returns: The normalized `forms` found in each entry, with offsets in
+        the entry, and the `begin` of the entries, in the order of
+        `data_batch`.
+        """
+        return {
+            "forms": _cached_forms(
+                self.extractor,
+                self.__cache,
+                data_batch["text"],
+                self.configs.spacy_batch_size,
+            ),
+            "begin": data_batch["begin"],
+        }
+
+    def pack(
+        self,
+        pack: DataPack,
+        predict_results: Dict[str, List[Any]],
+        context: Optional[Any] = None,
+    ):
+        for forms, begin in zip(
+            predict_results["forms"], predict_results["begin"]
+        ):
+            _add_normalized_forms(pack, forms, begin)
+
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        r"""
+        Usage counters of the normalization cache, see
+        :attr:`TemporalMentionNormalizingProcessor.cache_stats`.
+        """
+        return self.__cache.stats()
+
+    def finish(self, resource: Resources):
+        logging.info(
+            "BatchedTemporalMentionNormalizingProcessor cache stats: %s",
+            self.__cache.stats(),
+        )
+        model_registry.release(self)
+        super().finish(resource)
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        This defines a basic config structure for
+        `BatchedTemporalMentionNormalizingProcessor`.
+
+        Following are the keys for this dictionary:
+         - `entry_type`, `model_name`, `pipe_name`, `keep_components`,
+           `prefer_gpu`, `require_gpu`, `gpu_id`, `cache_size`: as for
+           :class:`TemporalMentionNormalizingProcessor`,
+         - `spacy_batch_size`: the number of segments processed at once by
+                               `nlp.pipe`,
+         - `batcher`: the configuration of :class:`TemporalMentionBatcher`.
+
+        Returns: A dictionary with the default config for this processor.
+        """
+        return {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "en_core_web_sm",
+            "pipe_name": "timexy",
+            "keep_components": [],
+            "prefer_gpu": True,
+            "require_gpu": False,
+            "gpu_id": 0,
+            "cache_size": 4096,
+            "spacy_batch_size": 256,
+            "batcher": TemporalMentionBatcher.default_configs(),
+        }
+
+    def expected_types_and_attributes(self):
+        r"""
+        Method to add user specified expected type which would be checked
+        before running the processor if the pipeline is initialized with
+        `enforce_consistency=True` or
+        :meth:`~forte.pipeline.Pipeline.enforce_consistency` was enabled for
+        the pipeline.
+        """
+        return {
+            self.configs.entry_type: set(),
+        }
+
+    def record(self, record_meta: Dict[str, Set[str]]):
+        r"""
+        Method to add output type record of
+        `BatchedTemporalMentionNormalizingProcessor`, the same as
+        :class:`TemporalMentionNormalizingProcessor`.
+
+        Args:
+            record_meta: the field in the datapack for type record that need to
+                fill in for consistency checking.
+        """
+        record_meta["ftx.medical.clinical_ontology.NormalizedTemporalForm"] = {
+            "type",
+            "value",
+        }
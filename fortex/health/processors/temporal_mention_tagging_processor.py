@@ -14,22 +14,224 @@
 """
 Temporal Mention Tagger
 """
-from typing import Dict, Set
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 import importlib
 
-from transformers import pipeline
-from forte.common import Resources
+import numpy as np
+import torch
+from forte.common import ProcessorConfigError, Resources
 from forte.common.configuration import Config
+from forte.data.batchers import FixedSizeDataPackBatcher, ProcessingBatcher
 from forte.data.data_pack import DataPack
+from forte.data.ontology.top import Annotation
 from forte.processors.base import PackProcessor
+from forte.processors.base.batch_processor import PackingBatchProcessor
+from forte.utils import get_class
+from ft.onto.base_ontology import Document
+from transformers import AutoModelForTokenClassification, AutoTokenizer
 
 from ftx.medical.clinical_ontology import TemporalTag
+from fortex.health.utils.model_registry import model_registry
 
 
 __all__ = [
     "TemporalMentionTaggingProcessor",
+    "TemporalMentionTaggingBatcher",
+    "BatchedTemporalMentionTaggingProcessor",
 ]
 
+# The `(begin, end)` character offsets of a span.
+Offsets = Tuple[int, int]
+
+
+def _check_window_configs(configs: Config):
+    if not 0 <= configs.stride < configs.max_length // 2:
+        raise ProcessorConfigError(
+            "stride must be non-negative and smaller than half of max_length."
+        )
+    if configs.bucket_size < 1:
+        raise ProcessorConfigError("bucket_size must be at least 1.")
+
+
+def _acquire_tagger(owner: Any, configs: Config, device: torch.device):
+    r"""
+    Returns: The fast tokenizer and the token classification model of
+    `configs.model_name` on `device`, shared through the model registry.
+    """
+    tokenizer = model_registry.acquire(
+        owner,
+        "tokenizer",
+        configs.model_name,
+        lambda: AutoTokenizer.from_pretrained(configs.model_name),
+    )
+    if not tokenizer.is_fast:
+        raise ProcessorConfigError(
+            f"The tokenizer of {configs.model_name} has no offset mapping, "
+            "a fast tokenizer is required."
+        )
+    model = model_registry.acquire(
+        owner,
+        "token-classification",
+        configs.model_name,
+        lambda: AutoModelForTokenClassification.from_pretrained(
+            configs.model_name
+        )
+        .to(device)
+        .eval(),
+        device=str(device),
+    )
+    return tokenizer, model
+
+
+def _tag_windows(
+    tokenizer,
+    model: torch.nn.Module,
+    texts: List[str],
+    configs: Config,
+    device: torch.device,
+) -> List[List[Offsets]]:
+    r"""
+    Find the temporal mentions of `texts`.
+
+    Each text is split into windows of at most `max_length` tokens, where
+    consecutive windows share `stride` tokens, so texts of any length are
+    tagged in full. The windows are sorted by their number of tokens and
+    split into buckets of `bucket_size` windows, each padded to its own
+    longest window and tagged with one forward pass.
+
+    Returns: The character offsets of the mentions of each text.
+    """
+    encodings = tokenizer(
+        texts,
+        truncation=True,
+        max_length=configs.max_length,
+        stride=configs.stride,
+        return_overflowing_tokens=True,
+        return_offsets_mapping=True,
+        return_special_tokens_mask=True,
+    )
+    sample_ids = encodings.pop("overflow_to_sample_mapping")
+    offset_mapping = encodings.pop("offset_mapping")
+    special_tokens_mask = encodings.pop("special_tokens_mask")
+    input_ids = encodings["input_ids"]
+    order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+
+    window_labels: List[Optional[np.ndarray]] = [None] * len(input_ids)
+    with torch.no_grad():
+        for start in range(0, len(order), configs.bucket_size):
+            bucket = order[start : start + configs.bucket_size]
+            padded = tokenizer.pad(
+                [{key: encodings[key][i] for key in encodings} for i in bucket],
+                return_tensors="pt",
+            ).to(device)
+            labels = model(**padded).logits.argmax(-1).cpu().numpy()
+            for i, window in enumerate(bucket):
+                length = len(input_ids[window])
+                window_labels[window] = (
+                    labels[i, -length:]
+                    if tokenizer.padding_side == "left"
+                    else labels[i, :length]
+                )
+
+    # The tokens of all windows, without special tokens, as flat arrays.
+    samples, begins, ends, labels, centrality = [], [], [], [], []
+    for window, window_label in enumerate(window_labels):
+        keep = np.asarray(special_tokens_mask[window]) == 0
+        offsets = np.asarray(offset_mapping[window]).reshape(-1, 2)[keep]
+        position = np.arange(len(offsets))
+        samples.append(np.full(len(offsets), sample_ids[window]))
+        begins.append(offsets[:, 0])
+        ends.append(offsets[:, 1])
+        labels.append(np.asarray(window_label)[keep])
+        # The distance of a token to the closest edge of its window.
+        centrality.append(np.minimum(position, len(offsets) - 1 - position))
+
+    return _merge_tokens(
+        np.concatenate(samples),
+        np.concatenate(begins),
+        np.concatenate(ends),
+        np.concatenate(labels),
+        np.concatenate(centrality),
+        id2label=model.config.id2label,
+        num_samples=len(texts),
+    )
+
+
+def _merge_tokens(
+    samples: np.ndarray,
+    begins: np.ndarray,
+    ends: np.ndarray,
+    labels: np.ndarray,
+    centrality: np.ndarray,
+    *,
+    id2label: Dict[int, str],
+    num_samples: int,
+) -> List[List[Offsets]]:
+    r"""
+    Merge the tagged tokens of overlapping windows into mentions.
+
+    A token seen in several windows keeps the label of the window where it
+    is farthest from the edges, i.e. has the most context. Consecutive
+    tagged tokens are merged into a mention, unless a token labelled as the
+    beginning (`B-`) of a mention is separated from the previous one by
+    other characters, so the word pieces of a word always stay together.
+
+    Args:
+        samples: the text of each token.
+        begins: the first character of each token in its text.
+        ends: the character after each token in its text.
+        labels: the label id of each token.
+        centrality: the distance of each token to the edge of its window.
+        id2label: the label of each label id.
+        num_samples: the number of texts.
+
+    Returns: The character offsets of the mentions of each text.
+    """
+    order = np.lexsort((-centrality, begins, samples))
+    samples, begins, ends, labels = (
+        samples[order],
+        begins[order],
+        ends[order],
+        labels[order],
+    )
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (samples[1:] != samples[:-1]) | (begins[1:] != begins[:-1])
+    samples, begins, ends, labels = (
+        samples[first],
+        begins[first],
+        ends[first],
+        labels[first],
+    )
+
+    label_names = np.array(
+        [id2label[i] for i in range(len(id2label))], dtype=object
+    )[labels]
+    tagged = label_names != "O"
+    opens = np.char.startswith(label_names.astype(str), "B-")
+    continues = np.zeros(len(tagged), dtype=bool)
+    continues[1:] = (
+        tagged[1:]
+        & tagged[:-1]
+        & (samples[1:] == samples[:-1])
+        & ~(opens[1:] & (begins[1:] > ends[:-1]))
+    )
+    starts = np.flatnonzero(tagged & ~continues)
+    # A mention ends before the next untagged token or mention start.
+    stops = np.flatnonzero(tagged & ~np.append(continues[1:], False))
+
+    mentions: List[List[Offsets]] = [[] for _ in range(num_samples)]
+    for start, stop in zip(starts, stops):
+        mentions[samples[start]].append((int(begins[start]), int(ends[stop])))
+    return mentions
+
+
+def _add_tags(pack: DataPack, text: str, offset: int, mentions: List[Offsets]):
+    for begin, end in mentions:
+        temporal_context = TemporalTag(
+            pack=pack, begin=offset + begin, end=offset + end
+        )
+        temporal_context.entity = text[begin:end]
+
 
 class TemporalMentionTaggingProcessor(PackProcessor):
     r"""
@@ -38,24 +240,29 @@ class TemporalMentionTaggingProcessor(PackProcessor):
     (of huggingface transformers)
     Reference:
     https://huggingface.co/models?sort=downloads&search=temporal
+
+    The entries of a pack are tagged together, over overlapping token
+    windows, so entries longer than the model limit are tagged in full.
     """
 
     def __init__(self):
         super().__init__()
-        self.extractor = None
+        self.tokenizer = None
+        self.model = None
+        self.device = torch.device("cpu")
 
     def set_up(self):
         device_num = self.configs["cuda_devices"]
-        self.extractor = pipeline(
-            "ner",
-            model=self.configs.model_name,
-            tokenizer=self.configs.model_name,
-            framework="pt",
-            device=device_num,
+        if device_num >= 0:
+            self.device = torch.device("cuda", device_num)
+        model_registry.release(self)
+        self.tokenizer, self.model = _acquire_tagger(
+            self, self.configs, self.device
         )
 
     def initialize(self, resources: Resources, configs: Config):
         super().initialize(resources, configs)
+        _check_window_configs(configs)
         self.set_up()
 
     def _process(self, input_pack: DataPack):
@@ -69,30 +276,21 @@ class TemporalMentionTaggingProcessor(PackProcessor):
 
         mod = importlib.import_module(path_str)
         entry = getattr(mod, module_str)
-        for entry_specified in input_pack.get(entry_type=entry):
-            result = self.extractor(inputs=entry_specified.text)
-            words = [[result[0]["word"], result[0]["start"], result[0]["end"]]]
-            for i in range(1, len(result)):
-                if result[i]["index"] == result[i - 1]["index"] + 1:
-                    words[-1][0] += " " + result[i]["word"]
-                    words[-1][2] = result[i]["end"]
-                else:
-                    words.append(
-                        [
-                            result[i]["word"],
-                            result[i]["start"],
-                            result[i]["end"],
-                        ]
-                    )
-            temporal_mentions = []
-            for word, begin, end in words:
-                temporal_context = TemporalTag(
-                    pack=input_pack,
-                    begin=begin,
-                    end=end,
-                )
-                temporal_context.entity = word
-                temporal_mentions.append(temporal_context)
+        entries = list(input_pack.get(entry_type=entry))
+        if not entries:
+            return
+        texts = [entry_specified.text for entry_specified in entries]
+        all_mentions = _tag_windows(
+            self.tokenizer, self.model, texts, self.configs, self.device
+        )
+        for entry_specified, text, mentions in zip(
+            entries, texts, all_mentions
+        ):
+            _add_tags(input_pack, text, entry_specified.begin, mentions)
+
+    def finish(self, resource: Resources):
+        model_registry.release(self)
+        super().finish(resource)
 
     @classmethod
     def default_configs(cls):
@@ -102,12 +300,21 @@ class TemporalMentionTaggingProcessor(PackProcessor):
          - `entry_type`: input entry type,
          - `model_name`: the huggingface transformer model name to be
                          used for classification,
+         - `cuda_devices`: the GPU to run the model on, -1 for the CPU,
+         - `max_length`: the maximum number of tokens of a window,
+         - `stride`: the number of tokens shared by consecutive windows of
+                     a long entry, less than half of `max_length`,
+         - `bucket_size`: the maximum number of windows padded together
+                          and tagged in one forward pass,
         Returns: A dictionary with the default config for this processor.
         """
         return {
             "entry_type": "ft.onto.base_ontology.Document",
             "model_name": "satyaalmasian/temporal_tagger_BERT_tokenclassifier",
             "cuda_devices": -1,
+            "max_length": 512,
+            "stride": 128,
+            "bucket_size": 8,
         }
 
     def expected_types_and_attributes(self):
@@ -132,3 +339,150 @@ class TemporalMentionTaggingProcessor(PackProcessor):
         record_meta["ftx.medical.clinical_ontology.TemporalTag"] = {
             "entity",
         }
+
+
+class TemporalMentionTaggingBatcher(FixedSizeDataPackBatcher):
+    r"""
+    Gathers the entries of consecutive data packs into batches of
+    `batch_size` entries for :class:`BatchedTemporalMentionTaggingProcessor`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entry_type: Type[Annotation] = Document
+
+    def _get_instance(self, data_pack: DataPack) -> Iterator[Dict[str, Any]]:
+        for entry in data_pack.get(self.entry_type):
+            yield {"text": entry.text, "begin": entry.begin}
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        The configuration of the batcher.
+
+        Following are the keys for this dictionary:
+
+            - `batch_size`: the number of entries gathered before running
+              the model.
+
+        Returns: A dictionary with the default config for this batcher.
+        """
+        return {"batch_size": 32}
+
+
+class BatchedTemporalMentionTaggingProcessor(PackingBatchProcessor[DataPack]):
+    r"""
+    A batched variant of :class:`TemporalMentionTaggingProcessor`. The
+    entries of several data packs are gathered with
+    :class:`TemporalMentionTaggingBatcher`, split into overlapping token
+    windows, and tagged in buckets of windows of similar length. The
+    mentions are then added to the packs the entries came from, at their
+    offsets in the pack.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.tokenizer = None
+        self.model = None
+        self.device = torch.device("cpu")
+
+    def initialize(self, resources: Resources, configs: Config):
+        super().initialize(resources, configs)
+        _check_window_configs(configs)
+        self.batcher.entry_type = get_class(configs.entry_type)
+        if configs.cuda_devices >= 0:
+            self.device = torch.device("cuda", configs.cuda_devices)
+        model_registry.release(self)
+        self.tokenizer, self.model = _acquire_tagger(self, configs, self.device)
+
+    @classmethod
+    def define_batcher(cls) -> ProcessingBatcher:
+        return TemporalMentionTaggingBatcher()
+
+    def predict(self, data_batch: Dict) -> Dict[str, List[Any]]:
+        r"""
+        Tag the entries of `data_batch` together.
+
+        Args:
+            data_batch: the `text` and `begin` of the entries.
+
+        Returns: The `text`, `begin` and the `mentions` offsets in the text
+        of the entries, in the order of `data_batch`.
+        """
+        return {
+            "text": data_batch["text"],
+            "begin": data_batch["begin"],
+            "mentions": _tag_windows(
+                self.tokenizer,
+                self.model,
+                data_batch["text"],
+                self.configs,
+                self.device,
+            ),
+        }
+
+    def pack(
+        self,
+        pack: DataPack,
+        predict_results: Dict[str, List[Any]],
+        context: Optional[Annotation] = None,
+    ):
+        for text, begin, mentions in zip(
+            predict_results["text"],
+            predict_results["begin"],
+            predict_results["mentions"],
+        ):
+            _add_tags(pack, text, begin, mentions)
+
+    def finish(self, resource: Resources):
+        model_registry.release(self)
+        super().finish(resource)
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        This defines a basic config structure for
+        `BatchedTemporalMentionTaggingProcessor`.
+
+        Following are the keys for this dictionary:
+         - `entry_type`, `model_name`, `cuda_devices`, `max_length`,
+           `stride`, `bucket_size`: as for
+           :class:`TemporalMentionTaggingProcessor`,
+         - `batcher`: the configuration of
+                      :class:`TemporalMentionTaggingBatcher`.
+
+        Returns: A dictionary with the default config for this processor.
+        """
+        return {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "satyaalmasian/temporal_tagger_BERT_tokenclassifier",
+            "cuda_devices": -1,
+            "max_length": 512,
+            "stride": 128,
+            "bucket_size": 8,
+            "batcher": TemporalMentionTaggingBatcher.default_configs(),
+        }
+
+    def expected_types_and_attributes(self):
+        r"""
+        Method to add user specified expected type which would be checked
+        before running the processor if the pipeline is initialized with
+        `enforce_consistency=True` or
+        :meth:`~forte.pipeline.Pipeline.enforce_consistency` was enabled for
+        the pipeline.
+        """
+        return {self.configs.entry_type: set()}
+
+    def record(self, record_meta: Dict[str, Set[str]]):
+        r"""
+        Method to add output type record of
+        `BatchedTemporalMentionTaggingProcessor`, the same as
+        :class:`TemporalMentionTaggingProcessor`.
+
+        Args:
+            record_meta: the field in the datapack for type record that need to
+                fill in for consistency checking.
+        """
+        record_meta["ftx.medical.clinical_ontology.TemporalTag"] = {
+            "entity",
+        }
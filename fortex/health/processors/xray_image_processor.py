@@ -14,21 +14,55 @@
 """
 XrayImageProcessor
 """
-from typing import Dict, Set
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+import logging
+import time
+
+import numpy as np
 import PIL
+import torch
 from transformers import pipeline
+from forte.data.batchers import FixedSizeDataPackBatcher, ProcessingBatcher
 from forte.data.data_pack import DataPack
+from forte.data.ontology.top import Annotation
+from forte.common import ProcessorConfigError
 from forte.common.resources import Resources
 from forte.common.configuration import Config
 from forte.processors.base import PackProcessor
+from forte.processors.base.batch_processor import PackingBatchProcessor
 from ft.onto.base_ontology import Classification
+from fortex.health.utils.model_registry import model_registry
 
 
 __all__ = [
     "XrayImageProcessor",
+    "XrayImageBatcher",
+    "BatchedXrayImageProcessor",
 ]
 
 
+def _acquire_extractor(owner: Any, configs: Config):
+    r"""
+    Returns: The image classification pipeline of `configs.model_name`,
+    shared through the model registry.
+    """
+    device_num = configs.cuda_devices
+    return model_registry.acquire(
+        owner,
+        "image-classification-pipeline",
+        configs.model_name,
+        lambda: pipeline(
+            "image-classification",
+            model=configs.model_name,
+            feature_extractor=configs.model_name,
+            framework="pt",
+            device=device_num,
+        ),
+        device=f"cuda:{device_num}" if device_num >= 0 else "cpu",
+    )
+
+
 class XrayImageProcessor(PackProcessor):
     r"""
     Implementation of this XrayImageProcessor has been based on the fine-tuned
@@ -50,15 +84,8 @@ class XrayImageProcessor(PackProcessor):
         self.extractor = None
 
     def set_up(self):
-
-        device_num = self.configs["cuda_devices"]
-        self.extractor = pipeline(
-            "image-classification",
-            model=self.configs.model_name,
-            feature_extractor=self.configs.model_name,
-            framework="pt",
-            device=device_num,
-        )
+        model_registry.release(self)
+        self.extractor = _acquire_extractor(self, self.configs)
 
     def initialize(self, resources: Resources, configs: Config):
         super().initialize(resources, configs)
@@ -80,6 +107,10 @@ class XrayImageProcessor(PackProcessor):
         class_labels: Classification = Classification(pack=input_pack)
         class_labels.classification_result = result_dict
 
+    def finish(self, resource: Resources):
+        model_registry.release(self)
+        super().finish(resource)
+
     @classmethod
     def default_configs(cls):
         r"""
@@ -123,3 +154,220 @@ class XrayImageProcessor(PackProcessor):
         record_meta["ft.onto.base_ontology.Classification"] = {
             "classification_result",
         }
+
+
+class XrayImageBatcher(FixedSizeDataPackBatcher):
+    r"""
+    Gathers the images of consecutive data packs into batches of
+    `batch_size` images for :class:`BatchedXrayImageProcessor`.
+
+    Each image is handed to `preprocess` as soon as its pack arrives, and
+    the batch holds what `preprocess` returns, such as the future of the
+    preprocessing running in a worker thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.preprocess: Callable[[np.ndarray], Any] = lambda image: image
+
+    def _get_instance(self, data_pack: DataPack) -> Iterator[Dict[str, Any]]:
+        yield {"pixel_values": self.preprocess(data_pack.image)}
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        The configuration of the batcher.
+
+        Following are the keys for this dictionary:
+
+            - `batch_size`: the number of images classified in one forward
+              pass.
+
+        Returns: A dictionary with the default config for this batcher.
+        """
+        return {"batch_size": 16}
+
+
+class BatchedXrayImageProcessor(PackingBatchProcessor[DataPack]):
+    r"""
+    A batched variant of :class:`XrayImageProcessor`, which classifies the
+    images of `batcher.batch_size` data packs in one forward pass.
+
+    The image of each pack is resized and normalized by `num_workers`
+    worker threads as soon as the pack arrives, while the reader decodes the
+    next images, so only the forward pass waits for the batch to fill. Used
+    with the `prefetch` of
+    :class:`~fortex.health.readers.xray_image_reader.XrayImageReader`, the
+    decoding of the upcoming images also overlaps with the forward pass.
+
+    The number of classified images per second is reported by
+    :attr:`throughput_stats`, and logged when the pipeline finishes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.extractor = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._images = 0
+        self._start: Optional[float] = None
+        self._end: Optional[float] = None
+
+    def initialize(self, resources: Resources, configs: Config):
+        super().initialize(resources, configs)
+        if configs.num_workers < 1:
+            raise ProcessorConfigError(
+                f"num_workers must be at least 1, got {configs.num_workers}."
+            )
+        model_registry.release(self)
+        self.extractor = _acquire_extractor(self, configs)
+        if self._executor is not None:
+            self._executor.shutdown()
+        self._executor = ThreadPoolExecutor(max_workers=configs.num_workers)
+        self.batcher.preprocess = self._submit_preprocess
+        self._images = 0
+        self._start = self._end = None
+
+    @classmethod
+    def define_batcher(cls) -> ProcessingBatcher:
+        return XrayImageBatcher()
+
+    def _submit_preprocess(self, image: np.ndarray) -> Future:
+        assert self._executor is not None
+        return self._executor.submit(self._preprocess, image)
+
+    def _preprocess(self, image: np.ndarray) -> torch.Tensor:
+        r"""
+        Returns: The resized and normalized pixel values of `image`.
+        """
+        image_processor = (
+            getattr(self.extractor, "image_processor", None)
+            or self.extractor.feature_extractor
+        )
+        return image_processor(
+            images=PIL.Image.fromarray(image), return_tensors="pt"
+        )["pixel_values"][0]
+
+    def _process(self, input_pack: DataPack):
+        if self._start is None:
+            self._start = time.perf_counter()
+        super()._process(input_pack)
+
+    def predict(self, data_batch: Dict) -> Dict[str, List[Any]]:
+        r"""
+        Classify the images of `data_batch` in one forward pass.
+
+        Args:
+            data_batch: the futures of the preprocessed `pixel_values` of
+                the images.
+
+        Returns: The `classification_result` of each image, mapping the
+        `top_k` most likely labels to their scores.
+        """
+        model = self.extractor.model
+        pixel_values = torch.stack(
+            [future.result() for future in data_batch["pixel_values"]]
+        ).to(model.device)
+        with torch.no_grad():
+            probs = model(pixel_values=pixel_values).logits.softmax(-1)
+        scores, ids = probs.topk(min(self.configs.top_k, probs.size(-1)))
+        id2label = model.config.id2label
+        results = [
+            {
+                id2label[label_id]: score
+                for label_id, score in zip(
+                    row_ids.tolist(), row_scores.tolist()
+                )
+            }
+            for row_ids, row_scores in zip(ids, scores)
+        ]
+        self._images += len(results)
+        self._end = time.perf_counter()
+        return {"classification_result": results}
+
+    def pack(
+        self,
+        pack: DataPack,
+        predict_results: Dict[str, List[Any]],
+        context: Optional[Annotation] = None,
+    ):
+        for result in predict_results["classification_result"]:
+            class_labels: Classification = Classification(pack=pack)
+            class_labels.classification_result = result
+
+    @property
+    def throughput_stats(self) -> Dict[str, float]:
+        r"""
+        The number of classified `images`, the `seconds` from the arrival
+        of the first pack to the end of the last forward pass, and the
+        `images_per_second`.
+        """
+        seconds = (
+            self._end - self._start
+            if self._start is not None and self._end is not None
+            else 0.0
+        )
+        return {
+            "images": self._images,
+            "seconds": seconds,
+            "images_per_second": self._images / seconds if seconds else 0.0,
+        }
+
+    def finish(self, resource: Resources):
+        logging.info(
+            "BatchedXrayImageProcessor throughput: %s", self.throughput_stats
+        )
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        model_registry.release(self)
+        super().finish(resource)
+
+    @classmethod
+    def default_configs(cls):
+        r"""
+        This defines a basic config structure for
+        `BatchedXrayImageProcessor`.
+
+        Following are the keys for this dictionary:
+         - `model_name`, `cuda_devices`: as for
+                         :class:`XrayImageProcessor`,
+         - `top_k`: the number of most likely labels stored in the
+                    `classification_result`,
+         - `num_workers`: the number of threads preprocessing the images,
+         - `batcher`: the configuration of :class:`XrayImageBatcher`, with
+                      the number of images of a forward pass.
+
+        Returns: A dictionary with the default config for this processor.
+        """
+        return {
+            "model_name": "nickmuchi/vit-finetuned-chest-xray-pneumonia",
+            "cuda_devices": -1,
+            "top_k": 5,
+            "num_workers": 2,
+            "batcher": XrayImageBatcher.default_configs(),
+        }
+
+    def expected_types_and_attributes(self):
+        r"""
+        Method to add user specified expected type which would be checked
+        before running the processor if the pipeline is initialized with
+        `enforce_consistency=True` or
+        :meth:`~forte.pipeline.Pipeline.enforce_consistency` was enabled for
+        the pipeline.
+        """
+        return {
+            "ft.onto.base_ontology.ImagePayload": [],
+        }
+
+    def record(self, record_meta: Dict[str, Set[str]]):
+        r"""
+        Method to add output type record of `BatchedXrayImageProcessor`,
+        the same as :class:`XrayImageProcessor`.
+
+        Args:
+            record_meta: the field in the datapack for type record that need to
+                fill in for consistency checking.
+        """
+        record_meta["ft.onto.base_ontology.Classification"] = {
+            "classification_result",
+        }
@@ -17,7 +17,11 @@
       https://data.mendeley.com/datasets/jctsfj2sfn/1
     """
 import os
-from typing import Any, Iterator
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator
+from forte.common import Resources
+from forte.common.configuration import Config
 from forte.data.data_pack import DataPack
 from forte.data.base_reader import PackReader
 from forte.data.data_utils_io import dataset_path_iterator
@@ -31,6 +35,14 @@ class XrayImageReader(PackReader):
     def __init__(self):
         super().__init__()
         self.Image = Image
+        self._resample: Any = None
+        self._decoding: Dict[str, Future] = {}
+
+    def initialize(self, resources: Resources, configs: Config):
+        super().initialize(resources, configs)
+        # Pillow 9.1 moved the resampling filters to `Image.Resampling`, and
+        # Pillow 10 removed them from `Image`.
+        self._resample = getattr(self.Image, "Resampling", self.Image).BILINEAR
 
     def _collect(self, image_directory) -> Iterator[Any]:
         r"""Should be called with param ``image_directory`` which is a path to a
@@ -41,19 +53,59 @@ class XrayImageReader(PackReader):
 
         Returns: Iterator over paths to image files
         """
-        return dataset_path_iterator(image_directory, self.configs.file_ext)
+        paths = dataset_path_iterator(image_directory, self.configs.file_ext)
+        if self.configs.prefetch > 0:
+            return self._prefetch(paths)
+        return paths
+
+    def _prefetch(self, paths: Iterator[str]) -> Iterator[str]:
+        r"""Yield ``paths`` while the next ``prefetch`` images are decoded
+        by ``num_workers`` worker threads, so that decoding overlaps with the
+        processing of the previous packs.
+        """
+        pending: Deque[str] = deque()
+        with ThreadPoolExecutor(max_workers=self.configs.num_workers) as pool:
+            try:
+                for path in paths:
+                    self._decoding[path] = pool.submit(self._decode, path)
+                    pending.append(path)
+                    if len(pending) > self.configs.prefetch:
+                        yield pending.popleft()
+                while pending:
+                    yield pending.popleft()
+            finally:
+                for future in self._decoding.values():
+                    future.cancel()
+                self._decoding.clear()
 
     def _cache_key_function(self, image_file: str) -> str:
         return os.path.basename(image_file)
 
+    def _decode(self, file_path: str) -> np.ndarray:
+        img = self.Image.open(file_path, **(self.configs.read_kwargs or {}))
+        target_size = self.configs.target_size
+        if target_size:
+            if isinstance(target_size, int):
+                target_size = (target_size, target_size)
+            size = (target_size[0], target_size[1])
+            # JPEG images are decoded at the smallest of 1/8, 1/4, 1/2 or
+            # full scale that is still larger than the target size.
+            img.draft(img.mode, size)
+            img = img.resize(size, self._resample)
+        if img.mode == "L":
+            img = img.convert("RGB")
+        return np.array(img)
+
     def _parse_pack(self, file_path: str) -> Iterator[DataPack]:
         pack: DataPack = DataPack()
 
         # Read in image data and store in DataPack
-        img = self.Image.open(file_path, **(self.configs.read_kwargs or {}))
-        if img.mode == "L":
-            img = img.convert("RGB")
-        pack.add_image(image=np.array(img))
+        future = self._decoding.pop(file_path, None)
+        if future is not None:
+            image = future.result()
+        else:
+            image = self._decode(file_path)
+        pack.add_image(image=image)
         pack.pack_name = file_path
 
         yield pack
@@ -72,6 +124,27 @@ class XrayImageReader(PackReader):
              https://pillow.readthedocs.io/en/stable/reference/Image.html
              Default value is None.
 
+          - target_size (int or list): The ``[width, height]`` images are
+             resized to, or the side of square images, such as ``224``
+             for the ViT of the X-ray image processors.
+             JPEG images are decoded at a reduced scale before being
+             resized, which is much faster and lighter than decoding large
+             films at full resolution. Default value is None, keeping the
+             full resolution.
+
+          - prefetch (int): The number of upcoming images decoded in
+             worker threads while the current packs are processed. Default
+             value is 0, decoding each image when its pack is read.
+
+          - num_workers (int): The number of threads decoding the prefetched
+             images. Default value is 2.
+
         Returns: The default configuration of Image reader.
         """
-        return {"file_ext": ".jpeg", "read_kwargs": None}
+        return {
+            "file_ext": ".jpeg",
+            "read_kwargs": None,
+            "target_size": None,
+            "prefetch": 0,
+            "num_workers": 2,
+        }
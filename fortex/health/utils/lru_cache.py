@@ -0,0 +1,105 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A bounded least-recently-used cache with usage counters.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+__all__ = [
+    "LRUCache",
+]
+
+
+class LRUCache:
+    r"""
+    A dictionary-like cache holding at most `max_size` entries. When it is
+    full, adding an entry evicts the least recently used one.
+
+    The number of hits, misses and evictions is counted, and can be read
+    with :meth:`stats`.
+
+    Args:
+        max_size: the maximum number of entries. A cache with `max_size` 0
+            does not store anything.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        r"""
+        Return the value cached for `key`, or `default` if there is none.
+        A found entry becomes the most recently used one.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        r"""
+        Cache `value` for `key`, evicting the least recently used entry if
+        the cache is full.
+        """
+        if self.max_size <= 0:
+            return
+        if key in self._data:
+            self._data.move_to_end(key)
+        elif len(self._data) >= self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        self._data[key] = value
+
+    def clear(self):
+        r"""
+        Remove all entries. The counters are kept.
+        """
+        self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        r"""
+        The fraction of lookups that found an entry, 0 before any lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        r"""
+        Returns: A dictionary with the `hits`, `misses`, `evictions`,
+        `hit_rate`, current `size` and `max_size` of the cache.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+            "size": len(self._data),
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,177 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Coalesce concurrent asynchronous requests into micro-batches.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+__all__ = [
+    "MicroBatcher",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    r"""
+    Gathers the items submitted concurrently with :meth:`submit` into
+    batches, and runs `process_batch` once per batch.
+
+    A batch is started by the first waiting item, and closed when it holds
+    `max_batch_size` items or `max_wait` seconds after it was started.
+    Batches run one at a time in a worker thread, so `process_batch` does
+    not need to be thread-safe, and the event loop keeps accepting requests
+    meanwhile. The requests arriving during a batch make up the next one.
+
+    The latency of the last `window` requests, from :meth:`submit` to their
+    result, and the size of the batches are kept for :meth:`stats`.
+
+    Args:
+        process_batch: a function mapping a list of items to the list of
+            their results, in the same order.
+        max_batch_size: the maximum number of items of a batch.
+        max_wait: the maximum number of seconds a batch waits for items.
+        window: the number of latest requests the latency is computed on.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait: float = 0.01,
+        window: int = 10000,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(
+                f"max_batch_size must be at least 1, got {max_batch_size}."
+            )
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Future] = None
+
+    async def submit(self, item: Any) -> Any:
+        r"""
+        Add `item` to the next batch.
+
+        Returns: The result of `item`.
+
+        Raises:
+            Exception: the error raised by `process_batch` on the batch of
+                `item`.
+        """
+        loop = asyncio.get_event_loop()
+        if (
+            self._worker is None
+            or self._worker.done()
+            or self._loop is not loop
+        ):
+            # Started lazily, in the event loop serving the requests.
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._run(self._queue))
+        assert self._queue is not None
+        future = loop.create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _run(self, queue: asyncio.Queue):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._process(loop, batch)
+
+    async def _process(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        batch: List[Tuple[Any, asyncio.Future, float]],
+    ):
+        items = [item for item, _, _ in batch]
+        try:
+            results = await loop.run_in_executor(
+                self._executor, self.process_batch, items
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("Failed to process a batch of %d.", len(items))
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        end = time.perf_counter()
+        self.batches += 1
+        self.requests += len(batch)
+        for (_, future, start), result in zip(batch, results):
+            self._latencies.append(end - start)
+            # The request may have been cancelled by its client.
+            if not future.done():
+                future.set_result(result)
+
+    def close(self):
+        r"""
+        Stop the batching worker, and wait for the running batch to finish.
+        Requests still waiting in the queue are not processed.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        r"""
+        Returns: A dictionary with the number of processed `requests` and
+        `batches`, the `mean_batch_size`, and the `p50_latency` and
+        `p99_latency` of the latest requests, in seconds.
+        """
+        latencies = sorted(self._latencies)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": (
+                self.requests / self.batches if self.batches else 0.0
+            ),
+            "p50_latency": _percentile(latencies, 0.5),
+            "p99_latency": _percentile(latencies, 0.99),
+        }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    r"""
+    Returns: The nearest-rank percentile of the sorted `values`, 0 if there
+    are none.
+    """
+    if not values:
+        return 0.0
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
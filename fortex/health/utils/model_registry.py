@@ -0,0 +1,192 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A process-wide, reference-counted registry of loaded models.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+__all__ = [
+    "ModelRegistry",
+    "model_registry",
+]
+
+logger = logging.getLogger(__name__)
+
+# The `(kind, name, device)` of a registered model.
+ModelKey = Tuple[str, str, str]
+
+
+class _Entry:
+    def __init__(self, model: Any, rss_bytes: Optional[int], seconds: float):
+        self.model = model
+        self.references = 0
+        self.parameter_bytes = _parameter_bytes(model)
+        self.rss_bytes = rss_bytes
+        self.load_seconds = seconds
+
+
+class ModelRegistry:
+    r"""
+    Shares loaded models, tokenizers and spaCy pipelines between processors.
+
+    A model is identified by its `kind`, e.g. `"tokenizer"` or
+    `"spacy+timexy"`, its `name`, e.g. the model name and revision, and the
+    `device` it lives on. The first :meth:`acquire` of a model loads it,
+    later ones return the same instance, and the model is dropped once every
+    owner that acquired it has called :meth:`release`. Processors acquire
+    their models in `initialize` and release them in `finish`, so two
+    processors, or two pipelines of a process, with the same model hold a
+    single copy.
+
+    Shared models must be treated as read-only: an owner must not train,
+    move or otherwise modify them, as the change would be seen by all
+    owners. Anything that changes the model, such as the pipes added to a
+    spaCy pipeline, belongs in its `kind`.
+
+    The memory of each model is reported by :meth:`stats`, see there.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._owners: Dict[int, List[ModelKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def acquire(
+        self,
+        owner: Any,
+        kind: str,
+        name: str,
+        loader: Callable[[], Any],
+        device: str = "cpu",
+    ) -> Any:
+        r"""
+        Get the shared instance of a model, loading it with `loader` if it
+        is not loaded yet.
+
+        Args:
+            owner: the object holding the model, usually the processor.
+            kind: the kind of model.
+            name: the name of the model.
+            loader: a function without arguments loading the model on
+                `device`.
+            device: the device of the model.
+
+        Returns: The shared model.
+        """
+        key = (kind, name, device)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+                model = loader()
+                seconds = time.perf_counter() - start
+                rss_after = _rss_bytes()
+                rss_bytes = (
+                    max(rss_after - rss_before, 0)
+                    if rss_before is not None and rss_after is not None
+                    else None
+                )
+                entry = _Entry(model, rss_bytes, seconds)
+                self._entries[key] = entry
+                logger.info("Loaded %s in %.2f seconds.", key, seconds)
+            entry.references += 1
+            self._owners.setdefault(id(owner), []).append(key)
+            return entry.model
+
+    def release(self, owner: Any):
+        r"""
+        Release all models acquired by `owner`. A model that is no longer
+        used by any owner is dropped from the registry.
+        """
+        with self._lock:
+            for key in self._owners.pop(id(owner), []):
+                entry = self._entries[key]
+                entry.references -= 1
+                if entry.references == 0:
+                    del self._entries[key]
+                    logger.info("Released %s.", key)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        r"""
+        Returns: For each loaded model, named `"kind:name@device"`, its
+        number of `references`, its `load_seconds`, its `parameter_bytes`,
+        the size of the weights of PyTorch modules and spaCy pipelines, and
+        its `rss_bytes`, the growth of the resident memory of the process
+        while it was loaded. Sizes that cannot be measured are `None`.
+        """
+        with self._lock:
+            return {
+                f"{kind}:{name}@{device}": {
+                    "references": entry.references,
+                    "load_seconds": entry.load_seconds,
+                    "parameter_bytes": entry.parameter_bytes,
+                    "rss_bytes": entry.rss_bytes,
+                }
+                for (kind, name, device), entry in self._entries.items()
+            }
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    r"""
+    Returns: The size of the parameters and buffers of a PyTorch module, of
+    the module of a HuggingFace pipeline, or of the weights and vectors of a
+    spaCy pipeline, or `None` for other models.
+    """
+    if hasattr(model, "parameters") and hasattr(model, "buffers"):
+        tensors = {}
+        for tensor in list(model.parameters()) + list(model.buffers()):
+            tensors[tensor.data_ptr()] = tensor.numel() * tensor.element_size()
+        return sum(tensors.values())
+    if hasattr(model, "model") and hasattr(model.model, "parameters"):
+        return _parameter_bytes(model.model)
+    if hasattr(model, "pipeline") and hasattr(model, "vocab"):
+        size = model.vocab.vectors.data.nbytes
+        # Components may share layers, such as a `tok2vec`.
+        nodes: Dict[int, Any] = {}
+        for _, component in model.pipeline:
+            if hasattr(component, "model"):
+                nodes.update(
+                    (id(node), node) for node in component.model.walk()
+                )
+        for node in nodes.values():
+            for param_name in node.param_names:
+                if node.has_param(param_name):
+                    size += node.get_param(param_name).nbytes
+        return size
+    return None
+
+
+def _rss_bytes() -> Optional[int]:
+    r"""
+    Returns: The resident memory of the process, `None` where it is not
+    available from `/proc`.
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+# The registry shared by all processors of the process.
+model_registry = ModelRegistry()
@@ -0,0 +1,148 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+An HTTP server running a pipeline on micro-batches of concurrent requests.
+"""
+import asyncio
+from typing import List
+
+from forte.data.data_pack import DataPack
+from forte.pipeline import Pipeline
+from forte.utils import create_import_error_msg
+
+from fortex.health.utils.micro_batcher import MicroBatcher
+
+__all__ = [
+    "create_app",
+    "serve",
+]
+
+
+def create_app(
+    pipeline: Pipeline[DataPack],
+    max_batch_size: int = 32,
+    max_wait: float = 0.01,
+):
+    r"""
+    Build a FastAPI app serving `pipeline`, for example a spaCy processor,
+    :class:`~fortex.health.processors.negation_context_analyzer.NegationContextAnalyzer`
+    and
+    :class:`~fortex.health.processors.icd_coding_processor.BatchedICDCodingProcessor`.
+
+    The notes of concurrent requests are gathered with a
+    :class:`~fortex.health.utils.micro_batcher.MicroBatcher`, and each
+    micro-batch goes through the pipeline with one
+    :meth:`~forte.pipeline.Pipeline.process_dataset` call, so batching
+    processors code the notes of many requests together.
+
+    The app has the following routes:
+
+        - `POST /process`: process the note `{"text": ...}`, and return the
+          serialized data pack as `result`.
+        - `POST /process_batch`: process the notes `{"texts": [...]}`, and
+          return the serialized data packs as `results`.
+        - `GET /stats`: the number of requests and batches, the mean batch
+          size and the p50 and p99 latency of the server.
+
+    Args:
+        pipeline: an initialized pipeline, whose reader takes a list of
+            strings, such as a
+            :class:`~forte.data.readers.StringReader`.
+        max_batch_size: the maximum number of notes of a micro-batch.
+        max_wait: the maximum number of seconds a micro-batch waits for
+            notes.
+
+    Returns: The FastAPI app. Its micro-batcher is `app.state.batcher`.
+
+    Raises:
+        ImportError: An error occurred importing `fastapi` module.
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        from fastapi import FastAPI
+        from pydantic import BaseModel
+    except ImportError as e:
+        raise ImportError(
+            create_import_error_msg("fastapi", "server", "the pipeline server")
+        ) from e
+
+    def process_batch(texts: List[str]) -> List[str]:
+        return [pack.to_string() for pack in pipeline.process_dataset(texts)]
+
+    batcher = MicroBatcher(process_batch, max_batch_size, max_wait)
+    app = FastAPI()
+    app.state.batcher = batcher
+
+    class Note(BaseModel):
+        text: str
+
+    class Notes(BaseModel):
+        texts: List[str]
+
+    # pylint: disable=unused-variable
+    @app.post("/process")
+    async def process(note: Note):
+        return {"status": "OK", "result": await batcher.submit(note.text)}
+
+    @app.post("/process_batch")
+    async def process_notes(notes: Notes):
+        results = await asyncio.gather(
+            *(batcher.submit(text) for text in notes.texts)
+        )
+        return {"status": "OK", "results": list(results)}
+
+    @app.get("/stats")
+    def stats():
+        return {"status": "OK", "stats": batcher.stats()}
+
+    # pylint: enable=unused-variable
+
+    return app
+
+
+def serve(
+    pipeline: Pipeline[DataPack],
+    host: str = "localhost",
+    port: int = 8008,
+    max_batch_size: int = 32,
+    max_wait: float = 0.01,
+):
+    r"""
+    Serve `pipeline` with the app of :func:`create_app` until the server is
+    stopped, then finish the pipeline.
+
+    Args:
+        pipeline: an initialized pipeline, see :func:`create_app`.
+        host: the host name of the server.
+        port: the port of the server.
+        max_batch_size: the maximum number of notes of a micro-batch.
+        max_wait: the maximum number of seconds a micro-batch waits for
+            notes.
+
+    Raises:
+        ImportError: An error occurred importing `uvicorn` module.
+    """
+    try:
+        import uvicorn  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            create_import_error_msg("uvicorn", "server", "the pipeline server")
+        ) from e
+
+    app = create_app(pipeline, max_batch_size, max_wait)
+    try:
+        uvicorn.run(app, host=host, port=port)
+    finally:
+        app.state.batcher.close()
+        pipeline.finish()
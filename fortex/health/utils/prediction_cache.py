@@ -0,0 +1,179 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A persistent, content-addressed cache of model predictions backed by SQLite.
+"""
+import hashlib
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List
+
+__all__ = [
+    "PredictionCache",
+]
+
+# SQLite limits the number of parameters of a statement.
+_CHUNK_SIZE = 500
+
+
+class PredictionCache:
+    r"""
+    An on-disk cache of JSON-serializable predictions, keyed by a hash of
+    the model identity and the input, see :meth:`make_key`. It holds at
+    most `max_size` entries, and adding entries to a full cache evicts the
+    least recently used ones.
+
+    Lookups and insertions work on many keys at once, so that a batch of
+    inputs is checked with a few queries. The number of hits, misses and
+    evictions since the cache was opened is counted, and can be read with
+    :meth:`stats`.
+
+    Args:
+        path: the SQLite database file, created if it does not exist.
+        max_size: the maximum number of entries. 0 means unbounded.
+    """
+
+    def __init__(self, path: str, max_size: int = 0):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_last_used "
+            "ON predictions (last_used)"
+        )
+        self._conn.commit()
+        # A logical clock ordering the uses of the entries.
+        (clock,) = self._conn.execute(
+            "SELECT MAX(last_used) FROM predictions"
+        ).fetchone()
+        self._clock = (clock or 0) + 1
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        r"""
+        Returns: The hash of the given strings, e.g. the model name, its
+        revision and the input text.
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def __len__(self) -> int:
+        (size,) = self._conn.execute(
+            "SELECT COUNT(*) FROM predictions"
+        ).fetchone()
+        return size
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        r"""
+        Look up many keys at once. The found entries become the most
+        recently used ones.
+
+        Returns: The cached value of each key found in the cache.
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, Any] = {}
+        for chunk in _chunks(unique_keys):
+            rows = self._conn.execute(
+                "SELECT key, value FROM predictions WHERE key IN "
+                f"({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+        if found:
+            self._conn.executemany(
+                "UPDATE predictions SET last_used = ? WHERE key = ?",
+                ((self._clock, key) for key in found),
+            )
+            self._clock += 1
+            self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, Any]):
+        r"""
+        Cache many values at once, then evict the least recently used
+        entries beyond `max_size`.
+        """
+        if not items:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)",
+            (
+                (key, json.dumps(value), self._clock)
+                for key, value in items.items()
+            ),
+        )
+        self._clock += 1
+        if self.max_size > 0:
+            excess = len(self) - self.max_size
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM predictions WHERE key IN (SELECT key FROM "
+                    "predictions ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+        self._conn.commit()
+
+    def clear(self):
+        r"""
+        Remove all entries. The counters are kept.
+        """
+        self._conn.execute("DELETE FROM predictions")
+        self._conn.commit()
+
+    def close(self):
+        r"""
+        Close the database connection.
+        """
+        self._conn.close()
+
+    @property
+    def hit_rate(self) -> float:
+        r"""
+        The fraction of looked up keys that were found, 0 before any lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        r"""
+        Returns: A dictionary with the `hits`, `misses`, `evictions`,
+        `hit_rate`, current `size` and `max_size` of the cache.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+            "size": len(self),
+            "max_size": self.max_size,
+        }
+
+
+def _chunks(keys: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(keys), _CHUNK_SIZE):
+        yield keys[start : start + _CHUNK_SIZE]
@@ -0,0 +1,79 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Load spaCy pipelines with only the components a task depends on.
+"""
+import logging
+from pathlib import Path
+from typing import Iterable, List
+
+import spacy
+
+__all__ = [
+    "pipeline_components",
+    "load_pruned_pipeline",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def pipeline_components(model_name: str) -> List[str]:
+    r"""
+    Read the components of a spaCy pipeline from its meta, without loading
+    it.
+
+    Args:
+        model_name: the name of an installed spaCy pipeline package, or the
+            path of a pipeline directory.
+
+    Returns: The names of all the components of the pipeline, including the
+    disabled ones, in pipeline order.
+    """
+    if spacy.util.is_package(model_name):
+        path = spacy.util.get_package_path(model_name)
+    else:
+        path = Path(model_name)
+    meta = spacy.util.get_model_meta(path)
+    return list(meta.get("components", meta.get("pipeline", [])))
+
+
+def load_pruned_pipeline(model_name: str, required: Iterable[str]):
+    r"""
+    Load the spaCy pipeline `model_name` with only the `required`
+    components, excluding all the others, so that they are neither loaded
+    nor run. The excluded components are logged.
+
+    Components are often chained, for example a `tagger` or `parser` reads
+    the embeddings of the `tok2vec` component, so `required` must list the
+    components they listen to as well. The tokenizer is always loaded.
+
+    Args:
+        model_name: the name of an installed spaCy pipeline package, or the
+            path of a pipeline directory.
+        required: the components the task depends on. Components missing
+            from the pipeline are ignored.
+
+    Returns: The loaded spaCy `Language`.
+    """
+    required = set(required)
+    excluded = [
+        name for name in pipeline_components(model_name) if name not in required
+    ]
+    if excluded:
+        logger.info(
+            "Excluded the unused components %s of %s.",
+            ", ".join(excluded),
+            model_name,
+        )
+    return spacy.load(model_name, exclude=excluded)
@@ -0,0 +1,238 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A hashed n-gram TF-IDF and one-vs-rest linear ICD coder on sparse matrices.
+"""
+import logging
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import normalize
+
+__all__ = [
+    "SparseICDModel",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class SparseICDModel:
+    r"""
+    A linear ICD coder much cheaper than a transformer, for coding large
+    backlogs of notes on CPU.
+
+    Notes are turned into hashed word n-gram counts, weighted with a
+    sublinear TF-IDF and normalized to unit length. Each code has its own
+    binary logistic regression on these features (one-vs-rest), and the
+    weights of all codes form one sparse matrix, so a batch of notes is
+    scored with a single sparse matrix product. Weights smaller than
+    `min_weight` are dropped when training, which keeps the saved model
+    small.
+
+    Args:
+        labels: the ICD codes, one per row of `coef`.
+        coef: the sparse `(len(labels), n_features)` weight matrix.
+        intercept: the bias of each code.
+        idf: the inverse document frequency of each hashed feature.
+        ngram_range: the smallest and largest n-gram sizes.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        coef: sparse.csr_matrix,
+        intercept: np.ndarray,
+        idf: np.ndarray,
+        ngram_range: Tuple[int, int] = (1, 2),
+    ):
+        self.labels = list(labels)
+        self.coef = sparse.csr_matrix(coef, dtype=np.float32)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.ngram_range = (ngram_range[0], ngram_range[1])
+        self.vectorizer = _make_vectorizer(len(self.idf), self.ngram_range)
+
+    @property
+    def n_features(self) -> int:
+        r"""
+        The number of hashed features.
+        """
+        return len(self.idf)
+
+    @classmethod
+    def fit(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        *,
+        n_features: int = 2**20,
+        ngram_range: Tuple[int, int] = (1, 2),
+        C: float = 10.0,
+        min_weight: float = 1e-3,
+    ) -> "SparseICDModel":
+        r"""
+        Train a model on labeled notes.
+
+        Args:
+            texts: the notes.
+            labels: the ICD code of each note.
+            n_features: the number of hashed features.
+            ngram_range: the smallest and largest n-gram sizes.
+            C: the inverse regularization strength of the classifiers.
+            min_weight: the weights with a smaller absolute value are
+                dropped.
+
+        Returns: The trained model.
+        """
+        if len(texts) != len(labels):
+            raise ValueError(
+                f"Got {len(texts)} notes but {len(labels)} labels."
+            )
+        codes = sorted(set(labels))
+        if len(codes) < 2:
+            raise ValueError("At least two distinct ICD codes are needed.")
+
+        counts = _make_vectorizer(n_features, ngram_range).transform(texts)
+        counts = sparse.csr_matrix(counts)
+        document_frequency = np.bincount(counts.indices, minlength=n_features)
+        # The smoothed idf of scikit-learn's `TfidfTransformer`.
+        idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+        features = _tfidf(counts, idf)
+
+        targets = np.asarray(labels)
+        rows = []
+        intercept = np.zeros(len(codes))
+        for i, code in enumerate(codes):
+            classifier = LogisticRegression(C=C, solver="liblinear")
+            classifier.fit(features, targets == code)
+            weights = classifier.coef_[0]
+            weights[np.abs(weights) < min_weight] = 0
+            rows.append(sparse.csr_matrix(weights))
+            intercept[i] = classifier.intercept_[0]
+            logger.debug("Trained the classifier of %s.", code)
+
+        return cls(codes, sparse.vstack(rows), intercept, idf, ngram_range)
+
+    def decision_function(self, texts: Sequence[str]) -> np.ndarray:
+        r"""
+        Returns: The `(len(texts), len(labels))` scores of every code for
+        every text, before the sigmoid.
+        """
+        features = _tfidf(self.vectorizer.transform(texts), self.idf)
+        # Multiplying in this order is faster with scipy, the result is
+        # transposed back to one row per text.
+        scores = self.coef @ features.T
+        return scores.T.toarray() + self.intercept
+
+    def rank(
+        self, texts: Sequence[str], top_k: int = 1
+    ) -> List[List[Tuple[str, float]]]:
+        r"""
+        Code a batch of texts.
+
+        Returns: The `top_k` `(code, probability)` pairs of each text, best
+        first.
+        """
+        if not texts:
+            return []
+        probabilities = 1 / (1 + np.exp(-self.decision_function(texts)))
+        top_k = min(top_k, len(self.labels))
+        # Only the `top_k` best codes of each text are sorted.
+        top = np.argpartition(-probabilities, top_k - 1, axis=1)[:, :top_k]
+        order = np.argsort(
+            -np.take_along_axis(probabilities, top, axis=1),
+            axis=1,
+            kind="stable",
+        )
+        best = np.take_along_axis(top, order, axis=1)
+        return [
+            [(self.labels[j], float(row[j])) for j in indices]
+            for row, indices in zip(probabilities, best)
+        ]
+
+    def save(self, path: str):
+        r"""
+        Save the model to a compressed `.npz` archive at `path`, keeping the
+        weights and the idf of the seen features only. The archive is
+        written to `path` as is, without adding a `.npz` suffix.
+        """
+        # The features not seen in training share the largest idf.
+        unseen_idf = self.idf.max()
+        seen = np.flatnonzero(self.idf != unseen_idf)
+        # numpy adds a `.npz` suffix to paths but not to open files.
+        with open(path, "wb") as model_file:
+            np.savez_compressed(
+                model_file,
+                labels=np.asarray(self.labels),
+                coef_data=self.coef.data,
+                coef_indices=self.coef.indices,
+                coef_indptr=self.coef.indptr,
+                intercept=self.intercept,
+                idf_indices=seen,
+                idf_values=self.idf[seen],
+                idf_default=unseen_idf,
+                n_features=self.n_features,
+                ngram_range=np.asarray(self.ngram_range),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "SparseICDModel":
+        r"""
+        Load a model saved with :meth:`save`.
+        """
+        with np.load(path) as saved:
+            n_features = int(saved["n_features"])
+            labels = saved["labels"].tolist()
+            coef = sparse.csr_matrix(
+                (
+                    saved["coef_data"],
+                    saved["coef_indices"],
+                    saved["coef_indptr"],
+                ),
+                shape=(len(labels), n_features),
+            )
+            idf = np.full(n_features, saved["idf_default"], dtype=np.float32)
+            idf[saved["idf_indices"]] = saved["idf_values"]
+            return cls(
+                labels,
+                coef,
+                saved["intercept"],
+                idf,
+                tuple(saved["ngram_range"].tolist()),
+            )
+
+
+def _make_vectorizer(
+    n_features: int, ngram_range: Tuple[int, int]
+) -> HashingVectorizer:
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=ngram_range,
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32,
+    )
+
+
+def _tfidf(counts: sparse.spmatrix, idf: np.ndarray) -> sparse.csr_matrix:
+    r"""
+    Returns: The unit length sublinear TF-IDF of the hashed `counts`.
+    """
+    features = sparse.csr_matrix(counts, dtype=np.float32, copy=True)
+    np.log1p(features.data, out=features.data)
+    features.data *= idf[features.indices]
+    return normalize(features, copy=False)
@@ -0,0 +1,243 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Multi-pattern matcher for trigger phrases, such as the NegEx rules.
+"""
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+__all__ = [
+    "TriggerMatcher",
+    "tokenize_with_spans",
+]
+
+# Same notion of a word as the `\b` boundaries used by the NegEx rule
+# patterns: a run of word characters, or a single punctuation character.
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Marks the `(rank, tag)` stored at the end of a phrase in the trie, where
+# `rank` is the number of phrases added before it.
+_TAG_KEY = None
+
+
+def tokenize_with_spans(text: str) -> List[Tuple[int, int]]:
+    r"""
+    Split `text` into word and punctuation tokens.
+
+    Args:
+        text: the text to be tokenized.
+
+    Returns: A list of `(begin, end)` character offsets, one per token.
+    """
+    return [match.span() for match in TOKEN_PATTERN.finditer(text)]
+
+
+class TriggerMatcher:
+    r"""
+    A token trie holding all trigger phrases of a rule set, which finds every
+    trigger of a text in a single left-to-right pass.
+
+    Trigger phrases are tokenized with :func:`tokenize_with_spans`. Tokens of
+    a phrase that are separated by whitespace in the rule must be separated
+    by whitespace in the text as well, and tokens that are adjacent in the
+    rule (e.g. ``r/o``) must be adjacent in the text, so a phrase matches
+    exactly where the pattern ``\b<phrase words joined by \s+>\b`` would.
+
+    With `word_tokens` set, phrases are split on whitespace only, and are
+    matched against a sequence of already tokenized words with
+    :meth:`find_tokens`, such as the `Token` entries of a pack.
+
+    Triggers never overlap. Overlapping candidates are resolved in favor of
+    the phrase added first, and then of the leftmost one, as if every phrase
+    was substituted over the whole text in the order it was added, the way
+    NegEx applies its rules sorted longest first. When the same phrase is
+    added more than once, the first tag added for it is kept.
+
+    Args:
+        rules: an iterable of `(phrase, tag)` pairs.
+        lowercase: if `True`, phrases and texts are matched
+            case-insensitively.
+        word_tokens: if `True`, the matcher works on word sequences with
+            :meth:`find_tokens` instead of texts with :meth:`find`.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[Tuple[str, str]] = (),
+        lowercase: bool = False,
+        word_tokens: bool = False,
+    ):
+        self.lowercase = lowercase
+        self.word_tokens = word_tokens
+        self._trie: Dict[Any, Any] = {}
+        self._num_rules = 0
+        for phrase, tag in rules:
+            self.add(phrase, tag)
+
+    def __len__(self) -> int:
+        return self._num_rules
+
+    def add(self, phrase: str, tag: str):
+        r"""
+        Add a trigger phrase to the matcher.
+
+        Args:
+            phrase: the trigger phrase, e.g. `"absence of"`.
+            tag: the tag reported for matches of this phrase, e.g.
+                `"[PREN]"`.
+        """
+        if self.lowercase:
+            phrase = phrase.lower()
+        if self.word_tokens:
+            keys: Iterable[str] = phrase.split()
+        else:
+            spans = tokenize_with_spans(phrase)
+            keys = self._keys(phrase, spans, 0, len(spans))
+        node = self._trie
+        for key in keys:
+            node = node.setdefault(key, {})
+        if node is self._trie:
+            return
+        if _TAG_KEY not in node:
+            node[_TAG_KEY] = (self._num_rules, tag)
+            self._num_rules += 1
+
+    def may_match(self, text: str) -> bool:
+        r"""
+        Check whether any token of `text` is the first token of a trigger
+        phrase. This is cheaper than :meth:`find`, and when it is `False`,
+        :meth:`find` would not find any trigger.
+
+        Args:
+            text: the text to check.
+        """
+        if self.lowercase:
+            text = text.lower()
+        return not self._trie.keys().isdisjoint(TOKEN_PATTERN.findall(text))
+
+    def may_match_tokens(self, tokens: Sequence[str]) -> bool:
+        r"""
+        The same as :meth:`may_match`, for a matcher with `word_tokens`.
+
+        Args:
+            tokens: the words to check.
+        """
+        if self.lowercase:
+            tokens = [token.lower() for token in tokens]
+        return not self._trie.keys().isdisjoint(tokens)
+
+    def find(
+        self,
+        text: str,
+        spans: Optional[List[Tuple[int, int]]] = None,
+    ) -> List[Tuple[int, int, str]]:
+        r"""
+        Find all non-overlapping triggers in `text`, preferring the phrases
+        added first.
+
+        Args:
+            text: the text to search.
+            spans: the token offsets of `text`, if they are already known.
+                Computed with :func:`tokenize_with_spans` otherwise.
+
+        Returns: A list of `(begin, end, tag)` tuples in text order.
+        """
+        if self.lowercase:
+            text = text.lower()
+        if spans is None:
+            spans = tokenize_with_spans(text)
+
+        return [
+            (spans[start][0], spans[end - 1][1], tag)
+            for start, end, tag in self._match(
+                len(spans),
+                lambda start: self._keys(text, spans, start, len(spans)),
+            )
+        ]
+
+    def find_tokens(self, tokens: Sequence[str]) -> List[Tuple[int, int, str]]:
+        r"""
+        Find all non-overlapping triggers in a sequence of words, preferring
+        the phrases added first. Used by a matcher with `word_tokens`.
+
+        Args:
+            tokens: the words to search.
+
+        Returns: A list of `(start, end, tag)` tuples in word order, where
+        the trigger covers `tokens[start:end]`.
+        """
+        if self.lowercase:
+            tokens = [token.lower() for token in tokens]
+        return self._match(
+            len(tokens),
+            lambda start: (tokens[k] for k in range(start, len(tokens))),
+        )
+
+    def _match(
+        self, num_tokens: int, keys_from: Callable[[int], Iterable[str]]
+    ) -> List[Tuple[int, int, str]]:
+        r"""
+        Walk the trie from every token position, where `keys_from(i)` gives
+        the keys of the tokens from position `i` on, and keep the candidate
+        matches by rank, then position, skipping those overlapping a match
+        already kept.
+
+        Returns: `(start, end, tag)` of the kept matches in token order, in
+        token positions.
+        """
+        candidates: List[Tuple[int, int, int, str]] = []
+        for i in range(num_tokens):
+            node = self._trie
+            for j, key in enumerate(keys_from(i), start=i + 1):
+                node = node.get(key)
+                if node is None:
+                    break
+                if _TAG_KEY in node:
+                    rank, tag = node[_TAG_KEY]
+                    candidates.append((rank, i, j, tag))
+        candidates.sort()
+
+        taken = [False] * num_tokens
+        matches: List[Tuple[int, int, str]] = []
+        for _, start, end, tag in candidates:
+            if not any(taken[start:end]):
+                taken[start:end] = [True] * (end - start)
+                matches.append((start, end, tag))
+        matches.sort()
+        return matches
+
+    @staticmethod
+    def _keys(
+        text: str, spans: List[Tuple[int, int]], start: int, stop: int
+    ) -> Iterable[str]:
+        r"""
+        Yield the trie keys of the tokens `spans[start:stop]`. Every token
+        but the first is prefixed with a space when it is separated from the
+        previous token by whitespace.
+        """
+        for k in range(start, stop):
+            begin, end = spans[k]
+            if k > start and begin > spans[k - 1][1]:
+                yield " " + text[begin:end]
+            else:
+                yield text[begin:end]
@@ -388,13 +388,22 @@ class NegationContext(Annotation):
     A span based annotation `NegationContext`, used to represent the negation context of a named entity.
     Attributes:
         polarity (Optional[bool]):
+        historical (Optional[bool]):	Whether the entity is mentioned as part of the patient's history.
+        hypothetical (Optional[bool]):	Whether the entity is mentioned as a hypothetical or conditional finding.
+        experiencer (Optional[str]):	Who experiences the entity, `patient` or `other`.
     """
 
     polarity: Optional[bool]
+    historical: Optional[bool]
+    hypothetical: Optional[bool]
+    experiencer: Optional[str]
 
     def __init__(self, pack: DataPack, begin: int, end: int):
         super().__init__(pack, begin, end)
         self.polarity: Optional[bool] = None
+        self.historical: Optional[bool] = None
+        self.hypothetical: Optional[bool] = None
+        self.experiencer: Optional[str] = None
 
 
 @dataclass
@@ -452,15 +461,21 @@ class MedicalArticle(Annotation):
     Attributes:
         icd_version (Optional[int]):	The version of ICD-Coding being used.
         icd_code (Optional[str]):	The ICD code assigned to current medical article.
+        icd_codes (List[str]):	The most likely ICD codes of current medical article, best first.
+        icd_scores (List[float]):	The scores of the codes in `icd_codes`.
     """
 
     icd_version: Optional[int]
     icd_code: Optional[str]
+    icd_codes: List[str]
+    icd_scores: List[float]
 
     def __init__(self, pack: DataPack, begin: int, end: int):
         super().__init__(pack, begin, end)
         self.icd_version: Optional[int] = None
         self.icd_code: Optional[str] = None
+        self.icd_codes: List[str] = []
+        self.icd_scores: List[float] = []
 
 
 @dataclass
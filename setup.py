@@ -31,12 +31,24 @@ setuptools.setup(
             "transformers==4.2.2",
             "protobuf==3.19.4",
             "numpy==1.21.6",
+            "scikit-learn>=0.24",
+            "scipy>=1.5",
+            "fastapi",
+            "httpx",
             'forte @ git+https://github.com/asyml/forte',
         ],
         "scispacy_processor": [
             "scispacy==0.5.0",
             "en-core-sci-sm @ https://s3-us-west-2.amazonaws.com/ai2-s2-scispacy/releases/v0.5.0/en_core_sci_sm-0.5.0.tar.gz"
         ],
+        "server": [
+            "fastapi",
+            "uvicorn",
+        ],
+        "sparse_icd_coding_processor": [
+            "scikit-learn>=0.24",
+            "scipy>=1.5",
+        ],
         "xray_image_processor": [
             "Pillow==8.4.0",
             "transformers==4.18.0",
@@ -14,17 +14,28 @@
 """
 Unit tests for ICDCodingProcessor
 """
+import os
+import tempfile
 import unittest
 
+from forte.common.configuration import Config
 from forte.data.data_pack import DataPack
 from forte.data.readers import StringReader
 from forte.pipeline import Pipeline
+import torch
+from transformers import AutoConfig
 
+from ft.onto.base_ontology import Document
 from ftx.medical.clinical_ontology import MedicalArticle
 
 from fortex.health.processors.icd_coding_processor import (
+    BatchedICDCodingProcessor,
+    ClassificationHead,
     ICDCodingProcessor,
+    _model_key,
+    _pool_windows,
 )
+from fortex.health.utils.model_registry import model_registry
 
 
 class TestICDCodeProcessor(unittest.TestCase):
@@ -52,6 +63,220 @@ class TestICDCodeProcessor(unittest.TestCase):
 
         for idx, icd_coding_item in enumerate(pack.get(MedicalArticle)):
             self.assertEqual(icd_coding_item.icd_code, expected_code)
+            self.assertEqual(icd_coding_item.icd_codes[0], expected_code)
+            self.assertEqual(len(icd_coding_item.icd_codes), 5)
+            self.assertEqual(
+                icd_coding_item.icd_scores,
+                sorted(icd_coding_item.icd_scores, reverse=True),
+            )
+
+    def test_shared_model(self):
+        config = {"model_name": "AkshatSurolia/ICD-10-Code-Prediction"}
+        first, second = ICDCodingProcessor(), ICDCodingProcessor()
+        for processor in (first, second):
+            nlp = Pipeline[DataPack]()
+            nlp.set_reader(StringReader())
+            nlp.add(processor, config=config)
+            nlp.initialize()
+
+        self.assertIs(first.model, second.model)
+        self.assertIs(first.tokenizer, second.tokenizer)
+        self.assertTrue(
+            any(
+                stats["references"] >= 2
+                for stats in model_registry.stats().values()
+            )
+        )
+
+    def test_long_document(self):
+        document = " ".join(
+            ["subarachnoid hemorrhage scalp laceration service: surgery"] * 200
+        )
+        pack = self.nlp.process(document)
+
+        # Long documents are coded over token windows instead of skipped.
+        self.assertEqual(len(list(pack.get(MedicalArticle))), 1)
+
+    def test_quantized_model(self):
+        document = "subarachnoid hemorrhage scalp laceration service: surgery major surgical or invasive"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = {
+                "model_name": "AkshatSurolia/ICD-10-Code-Prediction",
+                "quantize": True,
+                "quantized_model_path": os.path.join(tmp_dir, "icd.pt"),
+            }
+            for _ in range(2):
+                processor = ICDCodingProcessor()
+                nlp = Pipeline[DataPack]()
+                nlp.set_reader(StringReader())
+                nlp.add(processor, config=config)
+                nlp.initialize()
+                self.assertTrue(os.path.exists(config["quantized_model_path"]))
+
+                pack = nlp.process(document)
+                self.assertEqual(len(list(pack.get(MedicalArticle))), 1)
+                # Unload the shared model, so that the next run loads it
+                # from `quantized_model_path`.
+                nlp.finish()
+
+            report = processor.quantization_agreement([document, "fever"])
+            self.assertEqual(report["samples"], 2)
+            self.assertEqual(
+                report["agreement"], 1 - len(report["disagreements"]) / 2
+            )
+
+    def test_prediction_cache(self):
+        document = "subarachnoid hemorrhage scalp laceration service: surgery major surgical or invasive"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = {
+                "model_name": "AkshatSurolia/ICD-10-Code-Prediction",
+                "cache_path": os.path.join(tmp_dir, "icd.sqlite"),
+            }
+            processor = ICDCodingProcessor()
+            nlp = Pipeline[DataPack]()
+            nlp.set_reader(StringReader())
+            nlp.add(processor, config=config)
+            nlp.initialize()
+
+            packs = list(nlp.process_dataset([document, document]))
+            self.assertEqual(processor.cache.hits, 1)
+            self.assertEqual(processor.cache.misses, 1)
+            for pack in packs:
+                for article in pack.get(MedicalArticle):
+                    self.assertEqual(article.icd_code, "H59.11")
+            nlp.finish()
+
+    def test_classification_heads(self):
+        document = "subarachnoid hemorrhage scalp laceration service: surgery major surgical or invasive"
+        model_name = "AkshatSurolia/ICD-10-Code-Prediction"
+        hidden_size = AutoConfig.from_pretrained(model_name).hidden_size
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            heads = {
+                "note_type": ClassificationHead(
+                    ["discharge", "radiology"], hidden_size
+                ),
+                "readmission": ClassificationHead(
+                    ["no", "yes"], hidden_size, representation="cls"
+                ),
+            }
+            for name, head in heads.items():
+                head.save(os.path.join(tmp_dir, name + ".pt"))
+
+            for processor in (
+                ICDCodingProcessor(),
+                BatchedICDCodingProcessor(),
+            ):
+                nlp = Pipeline[DataPack](enforce_consistency=True)
+                nlp.set_reader(StringReader())
+                nlp.add(
+                    processor,
+                    config={
+                        "entry_type": "ft.onto.base_ontology.Document",
+                        "model_name": model_name,
+                        "heads": {
+                            name: os.path.join(tmp_dir, name + ".pt")
+                            for name in heads
+                        },
+                    },
+                )
+                nlp.initialize()
+                pack = nlp.process(document)
+
+                # The ICD codes are unchanged by the heads.
+                article = pack.get_single(MedicalArticle)
+                self.assertEqual(article.icd_code, "H59.11")
+                classifications = pack.get_single(Document).classifications
+                self.assertEqual(set(classifications), set(heads))
+                for name, head in heads.items():
+                    scores = classifications[name].classification_result
+                    self.assertEqual(list(scores), head.labels)
+                    self.assertAlmostEqual(sum(scores.values()), 1, places=5)
+
+
+class TestBatchedICDCodeProcessor(unittest.TestCase):
+    def setUp(self):
+        self.nlp = Pipeline[DataPack](enforce_consistency=True)
+        self.nlp.set_reader(StringReader())
+        config = {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "AkshatSurolia/ICD-10-Code-Prediction",
+            "bucket_size": 2,
+            "batcher": {"batch_size": 3},
+        }
+
+        self.nlp.add(BatchedICDCodingProcessor(), config=config)
+        self.nlp.initialize()
+
+    def test_batched_ICDCode_processor(self):
+        document = "subarachnoid hemorrhage scalp laceration service: surgery major surgical or invasive"
+        documents = [document, "fever", document, document, "fever"]
+
+        packs = list(self.nlp.process_dataset(documents))
+
+        self.assertEqual(len(packs), len(documents))
+        for pack, text in zip(packs, documents):
+            articles = list(pack.get(MedicalArticle))
+            self.assertEqual(len(articles), 1)
+            self.assertEqual(articles[0].text, text)
+            if text == document:
+                self.assertEqual(articles[0].icd_code, "H59.11")
+
+
+class TestModelKey(unittest.TestCase):
+    def test_retrained_head(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "note_type.pt")
+            configs = Config(
+                {"heads": {"note_type": path}},
+                ICDCodingProcessor.default_configs(),
+            )
+            head = ClassificationHead(["discharge", "radiology"], 4)
+            head.save(path)
+            key = _model_key(configs)
+            self.assertEqual(_model_key(configs), key)
+
+            # A head retrained to the same path changes the key.
+            with torch.no_grad():
+                head.linear.weight.add_(1)
+            head.save(path)
+            self.assertNotEqual(_model_key(configs), key)
+
+            loaded = ClassificationHead.load(path)
+            self.assertTrue(
+                torch.equal(loaded.linear.weight, head.linear.weight)
+            )
+
+
+class TestPoolWindows(unittest.TestCase):
+    def setUp(self):
+        # Text 0 has two windows, text 1 a single window, text 2 three.
+        self.window_logits = torch.tensor(
+            [
+                [1.0, -2.0],
+                [3.0, -4.0],
+                [5.0, 6.0],
+                [0.0, 1.0],
+                [2.0, 0.0],
+                [-2.0, 2.0],
+            ]
+        )
+        self.sample_ids = [0, 0, 1, 2, 2, 2]
+
+    def test_max_pooling(self):
+        pooled = _pool_windows(self.window_logits, self.sample_ids, 3, "max")
+        self.assertTrue(
+            torch.equal(
+                pooled, torch.tensor([[3.0, -2.0], [5.0, 6.0], [2.0, 2.0]])
+            )
+        )
+
+    def test_mean_pooling(self):
+        pooled = _pool_windows(self.window_logits, self.sample_ids, 3, "mean")
+        self.assertTrue(
+            torch.allclose(
+                pooled, torch.tensor([[2.0, -3.0], [5.0, 6.0], [0.0, 1.0]])
+            )
+        )
 
 
 if __name__ == "__main__":
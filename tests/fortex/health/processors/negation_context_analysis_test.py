@@ -14,22 +14,41 @@
 """
 Unit tests for NegationContextAnalyzer
 """
-
+import os
+import pickle
+import re
+import shutil
+import tempfile
 import unittest
-from ddt import data, ddt
+from ddt import data, ddt, unpack
 
 from forte.common import ProcessExecutionException
 from forte.data.data_pack import DataPack
 from forte.data.readers import StringReader
 from forte.pipeline import Pipeline
+from forte.processors.base import PackProcessor
 from ft.onto.base_ontology import Sentence, EntityMention
 from fortex.spacy import SpacyProcessor
 from fortex.health.processors.negation_context_analyzer import (
+    RULES_ARTIFACT_VERSION,
     NegationContextAnalyzer,
+    _load_artifact,
+    compile_negation_rules,
 )
 from ftx.medical.clinical_ontology import NegationContext
 
 
+class RashAnnotator(PackProcessor):
+    r"""
+    Annotates the text as one sentence, with every "rash" as an entity.
+    """
+
+    def _process(self, input_pack: DataPack):
+        Sentence(input_pack, 0, len(input_pack.text))
+        for match in re.finditer("rash", input_pack.text):
+            EntityMention(input_pack, match.start(), match.end())
+
+
 @ddt
 class TestNegationContextAnalyzer(unittest.TestCase):
     @data(
@@ -143,6 +162,425 @@ class TestNegationContextAnalyzer(unittest.TestCase):
 
             assert negation_contexts == check
 
+    @data(
+        (
+            "Abdominal CT showed no lesions of "
+            "T10 and sacrum most likely secondary to osteoporosis. These can "
+            "be followed by repeat imaging as an outpatient.",
+            [("lesions", True), ("T10", True), ("sacrum", True)],
+        ),
+        (
+            "Abdominal CT shows lesions exist but "
+            "no sacrum most likely secondary to osteoporosis. These can "
+            "be followed by repeat imaging as an outpatient.",
+            [("lesions", False), ("sacrum", True)],
+        ),
+    )
+    @unpack
+    def test_offset_scoping(self, input_data, check):
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(
+                SpacyProcessor(),
+                config={
+                    "processors": ["sentence", "tokenize", "ner"],
+                    "lang": "en_ner_bionlp13cg_md",
+                },
+            )
+            .add(
+                NegationContextAnalyzer(),
+                config={"scoping_mode": "offset"},
+            )
+            .initialize()
+        )
+
+        for pack in self.pl.process_dataset(input_data):
+            sentence = pack.get_single(Sentence)
+            negation_contexts = [
+                (negations.text, negations.polarity)
+                for negations in pack.get(NegationContext, sentence)
+            ]
+
+            assert negation_contexts == check
+
+    @data("Abdominal CT showed no lesions of T10. Patient denies chest pain.")
+    def test_sentence_cache(self, input_data):
+        analyzer = NegationContextAnalyzer()
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(
+                SpacyProcessor(),
+                config={
+                    "processors": ["sentence", "tokenize", "ner"],
+                    "lang": "en_ner_bionlp13cg_md",
+                },
+            )
+            .add(analyzer, config={"cache_size": 16})
+            .initialize()
+        )
+
+        negation_contexts = []
+        for pack in self.pl.process_dataset([input_data, input_data]):
+            negation_contexts.append(
+                [
+                    (negations.text, negations.polarity)
+                    for negations in pack.get(NegationContext)
+                ]
+            )
+
+        # The second pack is answered from the cache.
+        assert negation_contexts[0] == negation_contexts[1]
+        assert analyzer.cache_stats["hits"] > 0
+        assert analyzer.cache_stats["hits"] == analyzer.cache_stats["misses"]
+
+    @data(
+        "Abdominal CT showed a history of lesions of T10 but no sacrum "
+        "lesions. These can be followed by repeat imaging as an outpatient."
+    )
+    def test_context_analysis(self, input_data):
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(
+                SpacyProcessor(),
+                config={
+                    "processors": ["sentence", "tokenize", "ner"],
+                    "lang": "en_ner_bionlp13cg_md",
+                },
+            )
+            .add(
+                NegationContextAnalyzer(),
+                config={"scoping_mode": "offset", "context_analysis": True},
+            )
+            .initialize()
+        )
+
+        for pack in self.pl.process_dataset(input_data):
+            sentence = next(pack.get(Sentence))
+            negation_contexts = [
+                (
+                    negations.text,
+                    negations.polarity,
+                    negations.historical,
+                    negations.hypothetical,
+                    negations.experiencer,
+                )
+                for negations in pack.get(NegationContext, sentence)
+            ]
+
+            check = [
+                ("lesions", False, True, False, "patient"),
+                ("T10", False, True, False, "patient"),
+                ("sacrum", True, False, False, "patient"),
+            ]
+
+            assert negation_contexts[:3] == check
+
+    def test_scope_context(self):
+        # "history of A but if B develops, mother has C"
+        triggers = [
+            (0, 10, "[PREH]"),
+            (13, 16, "[CONJ]"),
+            (17, 19, "[PREC]"),
+            (22, 30, "[POSC]"),
+            (32, 38, "[PREE]"),
+        ]
+        entity_spans = [(11, 12), (20, 21), (43, 44)]
+        scopes = NegationContextAnalyzer.scope_context(
+            triggers,
+            entity_spans,
+            [
+                ("[PREN]", "[POST]"),
+                ("[PREH]", "[POSH]"),
+                ("[PREC]", "[POSC]"),
+                ("[PREE]", "[POSE]"),
+            ],
+        )
+        assert scopes == [
+            [False, False, False],
+            [True, False, False],
+            [False, True, False],
+            [False, False, True],
+        ]
+
+    def test_scope_window(self):
+        # "no A B C D E is ruled out", in token positions
+        triggers = [(0, 1, "[PREN]"), (6, 9, "[POST]")]
+        entity_spans = [(1, 2), (3, 4), (5, 6)]
+        tags = [("[PREN]", "[POST]")]
+        assert NegationContextAnalyzer.scope_context(
+            triggers, entity_spans, tags
+        ) == [[True, True, True]]
+        # C is 2 tokens away from "no" and from "is ruled out".
+        assert NegationContextAnalyzer.scope_context(
+            triggers, entity_spans, tags, window=2
+        ) == [[True, True, True]]
+        assert NegationContextAnalyzer.scope_context(
+            triggers, entity_spans, tags, window=1
+        ) == [[True, False, True]]
+
+    def test_scope_window_boundary(self):
+        # "no A B C D", in token positions
+        triggers = [(0, 1, "[PREN]")]
+        entity_spans = [(1, 2), (4, 5)]
+        tags = [("[PREN]", "[POST]")]
+        # D is exactly 3 tokens away from "no".
+        assert NegationContextAnalyzer.scope_context(
+            triggers, entity_spans, tags, window=3
+        ) == [[True, True]]
+        assert NegationContextAnalyzer.scope_context(
+            triggers, entity_spans, tags, window=2
+        ) == [[True, False]]
+        # "A B C D is ruled out"
+        triggers = [(4, 7, "[POST]")]
+        entity_spans = [(0, 1), (3, 4)]
+        assert NegationContextAnalyzer.scope_context(
+            triggers, entity_spans, tags, window=3
+        ) == [[True, True]]
+        assert NegationContextAnalyzer.scope_context(
+            triggers, entity_spans, tags, window=2
+        ) == [[False, True]]
+
+    @data(
+        (
+            "No evidence of lesions of T10 and sacrum most likely secondary "
+            "to osteoporosis.",
+            [("lesions", True), ("T10", True), ("sacrum", True)],
+        ),
+    )
+    @unpack
+    def test_token_scoping(self, input_data, check):
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(
+                SpacyProcessor(),
+                config={
+                    "processors": ["sentence", "tokenize", "ner"],
+                    "lang": "en_ner_bionlp13cg_md",
+                },
+            )
+            .add(
+                NegationContextAnalyzer(),
+                config={"scoping_mode": "token"},
+            )
+            .initialize()
+        )
+
+        for pack in self.pl.process_dataset(input_data):
+            sentence = pack.get_single(Sentence)
+            negation_contexts = [
+                (negations.text, negations.polarity)
+                for negations in pack.get(NegationContext, sentence)
+            ]
+
+            assert negation_contexts[:3] == check
+
+    @data(
+        (
+            "Abdominal CT showed no lesions. T10 and sacrum most likely "
+            "secondary to osteoporosis.",
+            [("lesions", True), ("T10", False), ("sacrum", False)],
+        ),
+    )
+    @unpack
+    def test_window_scoping(self, input_data, check):
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(
+                SpacyProcessor(),
+                config={
+                    "processors": ["sentence", "tokenize", "ner"],
+                    "lang": "en_ner_bionlp13cg_md",
+                },
+            )
+            .add(
+                NegationContextAnalyzer(),
+                config={"scoping_mode": "window"},
+            )
+            .initialize()
+        )
+
+        for pack in self.pl.process_dataset(input_data):
+            negation_contexts = [
+                (negations.text, negations.polarity)
+                for negations in pack.get(NegationContext)
+                if negations.text in ("lesions", "T10", "sacrum")
+            ]
+
+            # The period ends the scope of "no".
+            assert negation_contexts == check
+
+    def test_window_scoping_uncached(self):
+        analyzer = NegationContextAnalyzer()
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(RashAnnotator())
+            .add(analyzer, config={"scoping_mode": "window"})
+            .initialize()
+        )
+
+        documents = ["no rash on the arm. Itchy rash on the leg."] * 2
+        for pack in self.pl.process_dataset(documents):
+            negation_contexts = [
+                (negations.begin, negations.polarity)
+                for negations in pack.get(NegationContext)
+            ]
+            assert negation_contexts == [(3, True), (26, False)]
+
+        # Whole documents are neither cached nor counted as sentences.
+        assert analyzer.cache_stats["size"] == 0
+        assert analyzer.cache_stats["misses"] == 0
+        assert analyzer.sentence_stats["sentences"] == 0
+
+    @data("Abdominal CT showed lesions of T10 and sacrum.")
+    def test_prefilter(self, input_data):
+        analyzer = NegationContextAnalyzer()
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(
+                SpacyProcessor(),
+                config={
+                    "processors": ["sentence", "tokenize", "ner"],
+                    "lang": "en_ner_bionlp13cg_md",
+                },
+            )
+            .add(analyzer, config={"scoping_mode": "offset"})
+            .initialize()
+        )
+
+        for pack in self.pl.process_dataset(input_data):
+            sentence = pack.get_single(Sentence)
+            negation_contexts = [
+                (negations.text, negations.polarity)
+                for negations in pack.get(NegationContext, sentence)
+            ]
+
+            check = [("lesions", False), ("T10", False), ("sacrum", False)]
+
+            assert negation_contexts == check
+            assert analyzer.sentence_stats["no_trigger"] == 1
+            assert analyzer.cache_stats["misses"] == 0
+
+    @data("text", "offset")
+    def test_repeated_mention(self, scoping_mode):
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(RashAnnotator())
+            .add(
+                NegationContextAnalyzer(),
+                config={"scoping_mode": scoping_mode},
+            )
+            .initialize()
+        )
+
+        # The same mentions, without and with a rule phrase, each at its
+        # own offset.
+        negation_contexts = [
+            [
+                (negations.begin, negations.polarity)
+                for negations in pack.get(NegationContext)
+            ]
+            for pack in self.pl.process_dataset(
+                [
+                    "Itchy rash on the arm and rash on the leg.",
+                    "Itchy rash on the arm and no rash on the leg.",
+                ]
+            )
+        ]
+        assert negation_contexts == [
+            [(6, False), (26, False)],
+            [(6, False), (29, True)],
+        ]
+
+    @data(
+        "Abdominal CT shows lesions exist but "
+        "no sacrum most likely secondary to osteoporosis. These can "
+        "be followed by repeat imaging as an outpatient."
+    )
+    def test_compiled_rules(self, input_data):
+        temp_dir = tempfile.mkdtemp()
+        rules_path = os.path.join(temp_dir, "negex_triggers.txt")
+        artifact_path = os.path.join(temp_dir, "negex_triggers.bin")
+        shutil.copy(
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "../../../../fortex/health/resources/negex_triggers.txt",
+            ),
+            rules_path,
+        )
+        compile_negation_rules(rules_path, artifact_path)
+
+        self.pl = (
+            Pipeline[DataPack]()
+            .set_reader(StringReader())
+            .add(
+                SpacyProcessor(),
+                config={
+                    "processors": ["sentence", "tokenize", "ner"],
+                    "lang": "en_ner_bionlp13cg_md",
+                },
+            )
+            .add(
+                NegationContextAnalyzer(),
+                config={
+                    "negation_rules_path": rules_path,
+                    "compiled_rules_path": artifact_path,
+                    "watch_rules": True,
+                    "watch_interval": 0,
+                },
+            )
+            .initialize()
+        )
+
+        for pack in self.pl.process_dataset(input_data):
+            sentence = pack.get_single(Sentence)
+            negation_contexts = [
+                (negations.text, negations.polarity)
+                for negations in pack.get(NegationContext, sentence)
+            ]
+            assert negation_contexts == [("lesions", False), ("sacrum", True)]
+
+        # Turn "exist" into a post negation rule, which is picked up without
+        # re-initializing the pipeline.
+        with open(rules_path, "a", encoding="utf8") as rules_file:
+            rules_file.write("\nexist\t\t[POST]\n")
+        os.utime(rules_path, (0, 0))
+
+        for pack in self.pl.process_dataset(input_data):
+            sentence = pack.get_single(Sentence)
+            negation_contexts = [
+                (negations.text, negations.polarity)
+                for negations in pack.get(NegationContext, sentence)
+            ]
+            assert negation_contexts == [("lesions", True), ("sacrum", True)]
+
+        shutil.rmtree(temp_dir)
+
+    def test_stale_artifact(self):
+        temp_dir = tempfile.mkdtemp()
+        artifact_path = os.path.join(temp_dir, "negex_triggers.bin")
+        # Artifacts without a usable matcher are rebuilt instead of loaded.
+        for artifact in (
+            {"version": RULES_ARTIFACT_VERSION, "rules_hash": "rules"},
+            {
+                "version": RULES_ARTIFACT_VERSION,
+                "rules_hash": "rules",
+                "matcher": "corrupt",
+            },
+        ):
+            with open(artifact_path, "wb") as artifact_file:
+                pickle.dump(artifact, artifact_file)
+            assert _load_artifact(artifact_path, "rules", False) is None
+
+        shutil.rmtree(temp_dir)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -15,19 +15,37 @@
 Unit tests for ScispaCyProcessor
 """
 
+import re
 import unittest
+from typing import Dict, Set
 
 from forte.data.data_pack import DataPack
 from forte.data.readers import StringReader
 from forte.pipeline import Pipeline
+from forte.processors.base import PackProcessor
+from ft.onto.base_ontology import Sentence
 
 from ftx.medical.clinical_ontology import Hyponym, Abbreviation
 
 from fortex.health.processors.scispacy_processor import (
+    BatchedScispaCyProcessor,
     ScispaCyProcessor,
 )
 
 
+class SentenceSplitter(PackProcessor):
+    r"""
+    Adds a `Sentence` for every period-terminated span of the text.
+    """
+
+    def _process(self, input_pack: DataPack):
+        for match in re.finditer(r"[^\s.][^.]*\.?", input_pack.text):
+            Sentence(input_pack, match.start(), match.end())
+
+    def record(self, record_meta: Dict[str, Set[str]]):
+        record_meta["ft.onto.base_ontology.Sentence"] = set()
+
+
 class TestScispaCyAbvProcessor(unittest.TestCase):
     def setUp(self):
         self.nlp = Pipeline[DataPack](enforce_consistency=True)
@@ -95,5 +113,81 @@ class TestScispaCyHyponymProcessor(unittest.TestCase):
             self.assertEqual(detected.specific, expected_value["specific"])
 
 
+class TestScispaCyCombinedProcessor(unittest.TestCase):
+    def setUp(self):
+        self.nlp = Pipeline[DataPack](enforce_consistency=True)
+        self.nlp.set_reader(StringReader())
+        config = {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "en_core_sci_sm",
+            "pipe_name": ["abbreviation_detector", "hyponym_detector"],
+        }
+        self.nlp.add(ScispaCyProcessor(), config=config)
+        self.nlp.initialize()
+
+    def test_ScispaCy_combined_processor(self):
+        document = (
+            "Keystone plant species such as fig trees are good for the "
+            "soil, as chronic kidney disease (CKD) is bad for patients."
+        )
+        pack = self.nlp.process(document)
+
+        abbreviations = list(pack.get(Abbreviation))
+        self.assertEqual(len(abbreviations), 1)
+        self.assertEqual(abbreviations[0].text, "CKD")
+        self.assertEqual(
+            abbreviations[0].long_form.text, "chronic kidney disease"
+        )
+
+        hyponyms = list(pack.get(Hyponym))
+        self.assertEqual(len(hyponyms), 1)
+        self.assertEqual(hyponyms[0].hyponym_link, "such_as")
+        self.assertEqual(hyponyms[0].specific, "fig trees")
+
+
+class TestBatchedScispaCyProcessor(unittest.TestCase):
+    def setUp(self):
+        self.nlp = Pipeline[DataPack](enforce_consistency=True)
+        self.nlp.set_reader(StringReader())
+        config = {
+            "entry_type": "ft.onto.base_ontology.Sentence",
+            "model_name": "en_core_sci_sm",
+            "pipe_name": "abbreviation_detector",
+            "batcher": {"batch_size": 3},
+        }
+        self.nlp.add(SentenceSplitter())
+        self.nlp.add(BatchedScispaCyProcessor(), config=config)
+        self.nlp.initialize()
+
+    def test_batched_ScispaCy_Abv_processor(self):
+        documents = [
+            "Spinal and bulbar muscular atrophy (SBMA) is an inherited "
+            "motor neuron disease. It is caused by the androgen receptor "
+            "(AR).",
+            "No abbreviation here.",
+            "The patient has chronic kidney disease (CKD).",
+        ]
+        expected_results = [
+            [
+                ("SBMA", "Spinal and bulbar muscular atrophy"),
+                ("AR", "androgen receptor"),
+            ],
+            [],
+            [("CKD", "chronic kidney disease")],
+        ]
+
+        packs = list(self.nlp.process_dataset(documents))
+
+        self.assertEqual(len(packs), len(documents))
+        for pack, expected_result in zip(packs, expected_results):
+            self.assertEqual(
+                [
+                    (abv_item.text, abv_item.long_form)
+                    for abv_item in pack.get(Abbreviation)
+                ],
+                expected_result,
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,87 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for SparseICDCodingProcessor
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from forte.data.data_pack import DataPack
+from forte.data.readers import StringReader
+from forte.pipeline import Pipeline
+
+from ftx.medical.clinical_ontology import MedicalArticle
+
+from forte_health_cli import train
+from fortex.health.processors.sparse_icd_coding_processor import (
+    SparseICDCodingProcessor,
+)
+
+NOTES = [
+    ("acute myocardial infarction with chest pain", "I21.4"),
+    ("chest pain, troponin elevated, myocardial infarction", "I21.4"),
+    ("type 2 diabetes mellitus, elevated glucose", "E11.9"),
+    ("poorly controlled diabetes mellitus on insulin", "E11.9"),
+    ("community acquired pneumonia with fever and cough", "J18.9"),
+    ("cough, fever and consolidation, pneumonia", "J18.9"),
+]
+
+
+class TestSparseICDCodingProcessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        data_path = os.path.join(self.tmp_dir.name, "notes.jsonl")
+        with open(data_path, "w", encoding="utf-8") as notes:
+            for text, code in NOTES:
+                notes.write(json.dumps({"text": text, "icd_code": code}))
+                notes.write("\n")
+        model_path = os.path.join(self.tmp_dir.name, "icd.npz")
+        train.main([data_path, model_path, "--n-features", "4096"])
+
+        self.nlp = Pipeline[DataPack](enforce_consistency=True)
+        self.nlp.set_reader(StringReader())
+        self.nlp.add(
+            SparseICDCodingProcessor(),
+            config={
+                "model_path": model_path,
+                "top_k": 2,
+                "batcher": {"batch_size": 2},
+            },
+        )
+        self.nlp.initialize()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_sparse_icd_coding_processor(self):
+        documents = [
+            "myocardial infarction",
+            "diabetes mellitus",
+            "pneumonia",
+        ]
+        packs = list(self.nlp.process_dataset(documents))
+
+        self.assertEqual(len(packs), len(documents))
+        for pack, expected_code in zip(packs, ["I21.4", "E11.9", "J18.9"]):
+            article = pack.get_single(MedicalArticle)
+            self.assertEqual(article.icd_version, 10)
+            self.assertEqual(article.icd_code, expected_code)
+            self.assertEqual(article.icd_codes[0], expected_code)
+            self.assertEqual(len(article.icd_scores), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,7 @@ from forte.pipeline import Pipeline
 
 from ftx.medical.clinical_ontology import NormalizedTemporalForm
 from fortex.health.processors.temporal_mention_normalizing_processor import (
+    BatchedTemporalMentionNormalizingProcessor,
     TemporalMentionNormalizingProcessor,
 )
 
@@ -36,9 +37,34 @@ class TestTemporalMentionNormalizingProcessor(unittest.TestCase):
             "model_name": "en_core_web_sm",
             "pipe_name": "timexy",
         }
-        self.nlp.add(TemporalMentionNormalizingProcessor(), config=config)
+        self.processor = TemporalMentionNormalizingProcessor()
+        self.nlp.add(self.processor, config=config)
         self.nlp.initialize()
 
+    def test_excluded_components(self):
+        # Only the rules of timexy run after the tokenizer.
+        self.assertEqual(self.processor.extractor.pipe_names, ["timexy"])
+
+    def test_cache(self):
+        documents = [
+            "Fever since 10 days ago. No cough.",
+            "Seen by the team. Fever since 10 days ago.",
+        ]
+        entry_forms = []
+        for pack in self.nlp.process_dataset(documents):
+            entry_forms.append(
+                [
+                    (item.text, item.value, item.type)
+                    for item in pack.get(NormalizedTemporalForm)
+                ]
+            )
+        # The sentence of the first note is reused in the second one, at
+        # its own offset.
+        self.assertTrue(entry_forms[0])
+        self.assertEqual(entry_forms[0], entry_forms[1])
+        self.assertEqual(self.processor.cache_stats["hits"], 1)
+        self.assertEqual(self.processor.cache_stats["misses"], 3)
+
     def test_TemporalMentionNormalizingProcessor(self):
         sentences = ["10 days ago", "5 years later", "10.10.2010"]
         document = " ".join(sentences)
@@ -59,3 +85,44 @@ class TestTemporalMentionNormalizingProcessor(unittest.TestCase):
                 )
         for exp, pred in zip(expected_normalization, pred_normalization):
             self.assertEqual(exp, pred)
+
+
+class TestBatchedTemporalMentionNormalizingProcessor(unittest.TestCase):
+    def setUp(self):
+        self.nlp = Pipeline[DataPack](enforce_consistency=True)
+        self.nlp.set_reader(StringReader())
+        config = {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "en_core_web_sm",
+            "pipe_name": "timexy",
+            "batcher": {"batch_size": 2},
+        }
+        self.nlp.add(
+            BatchedTemporalMentionNormalizingProcessor(), config=config
+        )
+        self.nlp.initialize()
+
+    def test_BatchedTemporalMentionNormalizingProcessor(self):
+        documents = [
+            "Admitted 10 days ago.",
+            "Seen on 10.10.2010, back 5 years later.",
+            "No temporal mention here.",
+        ]
+        expected_normalization = [
+            [("10 days", "P10D", "DURATION")],
+            [
+                ("10.10.2010", "2010-10-10T00:00:00", "DATE"),
+                ("5 years", "P5Y", "DURATION"),
+            ],
+            [],
+        ]
+
+        pred_normalization = []
+        for pack in self.nlp.process_dataset(documents):
+            pred_normalization.append(
+                [
+                    (item.text, item.value, item.type)
+                    for item in pack.get(NormalizedTemporalForm)
+                ]
+            )
+        self.assertEqual(pred_normalization, expected_normalization)
@@ -23,6 +23,7 @@ from forte.pipeline import Pipeline
 
 from ftx.medical.clinical_ontology import TemporalTag
 from fortex.health.processors.temporal_mention_tagging_processor import (
+    BatchedTemporalMentionTaggingProcessor,
     TemporalMentionTaggingProcessor,
 )
 
@@ -58,3 +59,47 @@ class TestTemporalMentionTaggingProcessor(unittest.TestCase):
 
         for idx, tag in enumerate(pack.get(TemporalTag)):
             self.assertEqual(tag.entity, expected_mention[idx])
+
+
+class TestBatchedTemporalMentionTaggingProcessor(unittest.TestCase):
+    def setUp(self):
+        self.nlp = Pipeline[DataPack](enforce_consistency=False)
+        self.nlp.set_reader(StringReader())
+        config = {
+            "entry_type": "ft.onto.base_ontology.Document",
+            "model_name": "satyaalmasian/temporal_tagger_BERT_tokenclassifier",
+            "cuda_devices": -1,
+            "max_length": 64,
+            "stride": 16,
+            "batcher": {"batch_size": 2},
+        }
+
+        self.nlp.add(BatchedTemporalMentionTaggingProcessor(), config=config)
+        self.nlp.initialize()
+
+    def test_huggingface_BatchedTemporalMentionTaggingProcessor(self):
+        documents = [
+            "Due to lockdown restrictions, 2020 might go down as the worst economic year in over a decade.",
+            "Is the the final year of the man behind the tomorrows killing at 2 pm in morning",
+            "No temporal mention.",
+        ]
+        expected_mentions = [
+            ["2020", "over a decade"],
+            ["final year", "2 pm", "morning"],
+            [],
+        ]
+
+        for pack, expected in zip(
+            self.nlp.process_dataset(documents), expected_mentions
+        ):
+            tags = list(pack.get(TemporalTag))
+            self.assertEqual([tag.entity for tag in tags], expected)
+            self.assertEqual([tag.text for tag in tags], expected)
+
+    def test_long_note(self):
+        # A note far longer than a window is tagged in full.
+        sentence = "The patient was admitted in 2020 and discharged in 2021. "
+        pack = self.nlp.process(sentence * 50)
+        tags = list(pack.get(TemporalTag))
+
+        self.assertEqual([tag.text for tag in tags], ["2020", "2021"] * 50)
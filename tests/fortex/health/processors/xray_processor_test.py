@@ -22,7 +22,10 @@ from ddt import ddt, data
 from forte.pipeline import Pipeline
 from forte.data.data_pack import DataPack
 from fortex.health.readers.xray_image_reader import XrayImageReader
-from fortex.health.processors.xray_image_processor import XrayImageProcessor
+from fortex.health.processors.xray_image_processor import (
+    BatchedXrayImageProcessor,
+    XrayImageProcessor,
+)
 from ft.onto.base_ontology import Classification
 
 import numpy as np
@@ -61,5 +64,41 @@ class XrayImageProcessorPipelineTest(unittest.TestCase):
                     )
 
 
+class BatchedXrayImageProcessorPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.orig_image_pth: str = os.path.abspath(
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                os.pardir,
+                os.pardir,
+                os.pardir,
+                os.pardir,
+                "examples/xray/sample_data/",
+            )
+        )
+
+        self.processor = BatchedXrayImageProcessor()
+        self.pl = Pipeline[DataPack]()
+        self.pl.set_reader(XrayImageReader(), config={"prefetch": 2})
+        self.pl.add(self.processor, config={"batcher": {"batch_size": 2}})
+        self.pl.initialize()
+
+    def test_processor(self):
+        num_packs = 0
+        for pack in self.pl.process_dataset(self.orig_image_pth):
+            num_packs += 1
+            outputs = list(pack.get(Classification))
+            self.assertEqual(len(outputs), 1)
+            result = outputs[0].classification_result
+            if "pneumonia" in pack.pack_name:
+                self.assertTrue(result["PNEUMONIA"] >= 0.5)
+            elif "normal" in pack.pack_name:
+                self.assertTrue(result["NORMAL"] >= 0.5)
+
+        stats = self.processor.throughput_stats
+        self.assertEqual(stats["images"], num_packs)
+        self.assertGreater(stats["images_per_second"], 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -52,6 +52,29 @@ class XrayImageReaderDirPipelineTest(unittest.TestCase):
                 pack.pack_name.split("/")[-1] in self.expected_image_path
             )
 
+    def test_prefetch(self):
+        expected = {
+            pack.pack_name: pack.image
+            for pack in self.pl.process_dataset(self.orig_image_pth)
+        }
+
+        pl = Pipeline[DataPack]()
+        pl.set_reader(XrayImageReader(), config={"prefetch": 1})
+        pl.initialize()
+        packs = list(pl.process_dataset(self.orig_image_pth))
+
+        self.assertEqual(len(packs), len(expected))
+        for pack in packs:
+            np.testing.assert_array_equal(pack.image, expected[pack.pack_name])
+
+    def test_target_size(self):
+        pl = Pipeline[DataPack]()
+        pl.set_reader(XrayImageReader(), config={"target_size": [224, 160]})
+        pl.initialize()
+
+        for pack in pl.process_dataset(self.orig_image_pth):
+            self.assertEqual(pack.image.shape, (160, 224, 3))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,54 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for LRUCache
+"""
+import unittest
+
+from fortex.health.utils.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction_order(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.get("b", -1), -1)
+        self.assertEqual(
+            cache.stats(),
+            {
+                "hits": 1,
+                "misses": 1,
+                "evictions": 1,
+                "hit_rate": 0.5,
+                "size": 2,
+                "max_size": 2,
+            },
+        )
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        cache.put("a", 1)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.hit_rate, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for MicroBatcher
+"""
+import asyncio
+import unittest
+
+from fortex.health.utils.micro_batcher import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def process_batch(self, items):
+        self.batches.append(items)
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    def test_batching(self):
+        self.batcher = MicroBatcher(
+            self.process_batch, max_batch_size=3, max_wait=0.1
+        )
+
+        async def run():
+            return await asyncio.gather(
+                *(self.batcher.submit(item) for item in "abcde")
+            )
+
+        self.assertEqual(asyncio.run(run()), list("ABCDE"))
+        self.assertEqual(self.batches, [list("abc"), list("de")])
+
+        stats = self.batcher.stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["batches"], 2)
+        self.assertEqual(stats["mean_batch_size"], 2.5)
+        self.assertLessEqual(stats["p50_latency"], stats["p99_latency"])
+
+    def test_error(self):
+        self.batcher = MicroBatcher(self.process_batch, max_wait=0.05)
+
+        async def run():
+            return await asyncio.gather(
+                self.batcher.submit("bad"),
+                self.batcher.submit("good"),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(self.batcher.stats()["requests"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for ModelRegistry
+"""
+import unittest
+
+import torch
+
+from fortex.health.utils.model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ModelRegistry()
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return torch.nn.Linear(4, 2)
+
+    def test_sharing(self):
+        owner_a, owner_b = object(), object()
+        model = self.registry.acquire(owner_a, "linear", "m", self.load)
+        self.assertIs(
+            self.registry.acquire(owner_b, "linear", "m", self.load), model
+        )
+        self.assertIsNot(
+            self.registry.acquire(owner_b, "linear", "m", self.load, "cuda:0"),
+            model,
+        )
+        self.assertEqual(self.loads, 2)
+
+        stats = self.registry.stats()
+        self.assertEqual(stats["linear:m@cpu"]["references"], 2)
+        # The float32 weight and bias.
+        self.assertEqual(stats["linear:m@cpu"]["parameter_bytes"], 40)
+
+    def test_release(self):
+        owner_a, owner_b = object(), object()
+        self.registry.acquire(owner_a, "linear", "m", self.load)
+        self.registry.acquire(owner_b, "linear", "m", self.load)
+
+        self.registry.release(owner_a)
+        self.registry.release(owner_a)
+        self.assertEqual(len(self.registry), 1)
+        self.registry.release(owner_b)
+        self.assertEqual(len(self.registry), 0)
+
+        self.registry.acquire(owner_a, "linear", "m", self.load)
+        self.assertEqual(self.loads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
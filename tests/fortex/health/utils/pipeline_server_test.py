@@ -0,0 +1,62 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for the pipeline server
+"""
+import unittest
+
+from fastapi.testclient import TestClient
+from forte.data.data_pack import DataPack
+from forte.data.readers import StringReader
+from forte.pipeline import Pipeline
+
+from fortex.health.processors.negation_context_analyzer import (
+    NegationContextAnalyzer,
+)
+from fortex.health.utils.pipeline_server import create_app
+
+
+class TestPipelineServer(unittest.TestCase):
+    def setUp(self):
+        pipeline = Pipeline[DataPack]()
+        pipeline.set_reader(StringReader())
+        pipeline.add(NegationContextAnalyzer())
+        pipeline.initialize()
+        self.app = create_app(pipeline, max_batch_size=4, max_wait=0.01)
+
+    def tearDown(self):
+        self.app.state.batcher.close()
+
+    def test_process(self):
+        notes = ["no fever", "chest pain", "denies cough"]
+        with TestClient(self.app) as client:
+            response = client.post("/process", json={"text": notes[0]})
+            self.assertEqual(response.status_code, 200)
+            pack = DataPack.from_string(response.json()["result"])
+            self.assertEqual(pack.text, notes[0])
+
+            response = client.post("/process_batch", json={"texts": notes})
+            packs = [
+                DataPack.from_string(result)
+                for result in response.json()["results"]
+            ]
+            self.assertEqual([pack.text for pack in packs], notes)
+
+            stats = client.get("/stats").json()["stats"]
+            self.assertEqual(stats["requests"], 4)
+            self.assertLessEqual(stats["batches"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for PredictionCache
+"""
+import os
+import tempfile
+import unittest
+
+from fortex.health.utils.prediction_cache import PredictionCache
+
+
+class TestPredictionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_eviction_order(self):
+        cache = PredictionCache(self.path, max_size=2)
+        cache.put_many({"a": [["A01", 0.9]], "b": [["B01", 0.8]]})
+        self.assertEqual(cache.get_many(["a", "x"]), {"a": [["A01", 0.9]]})
+        cache.put_many({"c": [["C01", 0.7]]})
+
+        self.assertEqual(sorted(cache.get_many(["a", "b", "c"])), ["a", "c"])
+        self.assertEqual(
+            cache.stats(),
+            {
+                "hits": 3,
+                "misses": 2,
+                "evictions": 1,
+                "hit_rate": 0.6,
+                "size": 2,
+                "max_size": 2,
+            },
+        )
+        cache.close()
+
+    def test_persistence(self):
+        key = PredictionCache.make_key("model", "rev", "some text")
+        self.assertNotEqual(key, PredictionCache.make_key("model", "rev2"))
+        cache = PredictionCache(self.path)
+        cache.put_many({key: [["A01", 0.5]]})
+        cache.close()
+
+        cache = PredictionCache(self.path)
+        self.assertEqual(cache.get_many([key, key]), {key: [["A01", 0.5]]})
+        self.assertEqual(cache.hits, 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
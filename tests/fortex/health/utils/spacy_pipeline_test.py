@@ -0,0 +1,66 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for the pruned loading of spaCy pipelines
+"""
+import tempfile
+import unittest
+
+import spacy
+
+from fortex.health.utils.spacy_pipeline import (
+    load_pruned_pipeline,
+    pipeline_components,
+)
+
+
+class TestSpacyPipeline(unittest.TestCase):
+    def setUp(self):
+        self.model_dir = tempfile.TemporaryDirectory()
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        ruler = nlp.add_pipe("entity_ruler")
+        ruler.add_patterns([{"label": "DRUG", "pattern": "aspirin"}])
+        nlp.to_disk(self.model_dir.name)
+
+    def tearDown(self):
+        self.model_dir.cleanup()
+
+    def test_pipeline_components(self):
+        self.assertEqual(
+            pipeline_components(self.model_dir.name),
+            ["sentencizer", "entity_ruler"],
+        )
+
+    def test_load_pruned_pipeline(self):
+        with self.assertLogs(
+            "fortex.health.utils.spacy_pipeline", level="INFO"
+        ) as logs:
+            nlp = load_pruned_pipeline(
+                self.model_dir.name, ["sentencizer", "parser"]
+            )
+        self.assertEqual(nlp.pipe_names, ["sentencizer"])
+        self.assertIn("entity_ruler", logs.output[0])
+        self.assertEqual(len(nlp("Take aspirin. Then rest.").ents), 0)
+
+    def test_load_full_pipeline(self):
+        nlp = load_pruned_pipeline(
+            self.model_dir.name, ["sentencizer", "entity_ruler"]
+        )
+        self.assertEqual(nlp.pipe_names, ["sentencizer", "entity_ruler"])
+        self.assertEqual(len(nlp("Take aspirin. Then rest.").ents), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for SparseICDModel
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fortex.health.utils.sparse_icd_model import SparseICDModel
+
+NOTES = [
+    ("acute myocardial infarction with chest pain", "I21.4"),
+    ("chest pain, troponin elevated, myocardial infarction", "I21.4"),
+    ("type 2 diabetes mellitus, elevated glucose", "E11.9"),
+    ("poorly controlled diabetes mellitus on insulin", "E11.9"),
+    ("community acquired pneumonia with fever and cough", "J18.9"),
+    ("cough, fever and consolidation, pneumonia", "J18.9"),
+]
+
+
+class TestSparseICDModel(unittest.TestCase):
+    def setUp(self):
+        texts, labels = zip(*NOTES)
+        self.model = SparseICDModel.fit(texts, labels, n_features=2**12)
+
+    def test_rank(self):
+        rankings = self.model.rank(
+            ["myocardial infarction", "diabetes mellitus", "pneumonia"],
+            top_k=2,
+        )
+        self.assertEqual(
+            [ranking[0][0] for ranking in rankings],
+            ["I21.4", "E11.9", "J18.9"],
+        )
+        for ranking in rankings:
+            self.assertEqual(len(ranking), 2)
+            self.assertGreaterEqual(ranking[0][1], ranking[1][1])
+        self.assertEqual(self.model.rank([]), [])
+
+    def test_rank_all(self):
+        texts = ["myocardial infarction", "pneumonia"]
+        probabilities = 1 / (1 + np.exp(-self.model.decision_function(texts)))
+        for ranking, row in zip(
+            self.model.rank(texts, top_k=10), probabilities
+        ):
+            self.assertEqual(
+                [code for code, _ in ranking],
+                [self.model.labels[j] for j in np.argsort(-row)],
+            )
+
+    def test_save_load(self):
+        texts = ["fever and cough", "chest pain", "unrelated words"]
+        for file_name in ("icd.npz", "icd"):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, file_name)
+                self.model.save(path)
+                loaded = SparseICDModel.load(path)
+
+            self.assertEqual(loaded.labels, self.model.labels)
+            self.assertEqual(loaded.ngram_range, self.model.ngram_range)
+            np.testing.assert_allclose(
+                loaded.decision_function(texts),
+                self.model.decision_function(texts),
+            )
+
+    def test_invalid_labels(self):
+        with self.assertRaises(ValueError):
+            SparseICDModel.fit(["fever", "cough"], ["J18.9", "J18.9"])
+        with self.assertRaises(ValueError):
+            SparseICDModel.fit(["fever"], ["J18.9", "E11.9"])
+
+
+if __name__ == "__main__":
+    unittest.main()
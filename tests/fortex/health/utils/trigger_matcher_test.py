@@ -0,0 +1,158 @@
+# Copyright 2022 The Forte Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unit tests for TriggerMatcher
+"""
+import os
+import random
+import re
+import unittest
+
+from fortex.health.processors.negation_context_analyzer import _build_matcher
+from fortex.health.utils.trigger_matcher import TriggerMatcher
+
+NEGEX_TRIGGERS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "../../../../fortex/health/resources/negex_triggers.txt",
+)
+
+
+def tag_with_re_sub(sentence, rules):
+    r"""
+    Tag the rule phrases of `sentence` the way NegEx does, by substituting
+    each rule over the whole sentence, longest rule first.
+    """
+    for rule in sorted(rules, key=len, reverse=True):
+        rule_tokens = rule.strip().split("\t")
+        pattern = (
+            r"\b("
+            + r"\s+".join(rule_tokens[0].split())
+            + r")(?!(\[PREN\])|(\[POST\]))\b"
+        )
+        tag = rule_tokens[-1].strip()
+        sentence = re.sub(
+            pattern,
+            tag + re.sub(r"\s+", "_", rule_tokens[0].strip()) + tag,
+            sentence,
+        )
+    return sentence
+
+
+def tag_with_matcher(sentence, matcher):
+    tagged = []
+    last = 0
+    for begin, end, tag in matcher.find(sentence):
+        tagged.append(sentence[last:begin])
+        tagged.append(tag + re.sub(r"\s+", "_", sentence[begin:end]) + tag)
+        last = end
+    tagged.append(sentence[last:])
+    return "".join(tagged)
+
+
+class TestTriggerMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = TriggerMatcher(
+            [
+                ("no evidence of", "[PREN]"),
+                ("no", "[PREN]"),
+                ("r/o", "[PREP]"),
+                ("is ruled out", "[POST]"),
+                ("but", "[CONJ]"),
+                ("no", "[POST]"),
+            ]
+        )
+
+    def test_longest_match(self):
+        text = "no evidence of  fever but no rash"
+        self.assertEqual(
+            self.matcher.find(text),
+            [(0, 14, "[PREN]"), (22, 25, "[CONJ]"), (26, 28, "[PREN]")],
+        )
+
+    def test_word_boundaries(self):
+        self.assertEqual(self.matcher.find("nothing noted, butter"), [])
+        self.assertEqual(
+            self.matcher.find("MI is ruled out."), [(3, 15, "[POST]")]
+        )
+
+    def test_token_separation(self):
+        self.assertEqual(self.matcher.find("r/o MI"), [(0, 3, "[PREP]")])
+        self.assertEqual(self.matcher.find("r / o MI"), [])
+        self.assertEqual(self.matcher.find("isruled out"), [])
+
+    def test_case(self):
+        self.assertEqual(self.matcher.find("No rash"), [])
+        matcher = TriggerMatcher([("no", "[PREN]")], lowercase=True)
+        self.assertEqual(matcher.find("No rash"), [(0, 2, "[PREN]")])
+
+    def test_may_match(self):
+        self.assertTrue(self.matcher.may_match("MI is unlikely"))
+        self.assertFalse(self.matcher.may_match("nothing noted"))
+
+    def test_first_tag_kept(self):
+        self.assertEqual(len(self.matcher), 5)
+        self.assertEqual(self.matcher.find("no"), [(0, 2, "[PREN]")])
+
+    def test_rule_priority(self):
+        # The rule added first wins over an overlapping rule, even when the
+        # latter starts earlier.
+        matcher = TriggerMatcher(
+            [("no evidence", "[PREN]"), ("with no", "[PREN]")]
+        )
+        self.assertEqual(
+            matcher.find("Patient with no evidence of pneumonia"),
+            [(13, 24, "[PREN]")],
+        )
+
+    def test_negex_rules(self):
+        with open(NEGEX_TRIGGERS_PATH, encoding="utf8") as rules_file:
+            rules = rules_file.readlines()
+        matcher = _build_matcher(list(rules), word_tokens=False)
+
+        sentences = [
+            "He did not have been ruled out for MI",
+            "Patient with no evidence of pneumonia",
+        ]
+        words = sorted(
+            {word for rule in rules for word in rule.split("\t")[0].split()}
+        ) + ["MI", "pneumonia", "fever", "the", ",", "."]
+        rng = random.Random(0)
+        for _ in range(500):
+            sentences.append(
+                " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+            )
+
+        for sentence in sentences:
+            self.assertEqual(
+                tag_with_matcher(sentence, matcher),
+                tag_with_re_sub(sentence, rules),
+            )
+
+    def test_find_tokens(self):
+        matcher = TriggerMatcher(
+            [("no evidence of", "[PREN]"), ("no", "[PREN]"), ("but", "[CONJ]")],
+            lowercase=True,
+            word_tokens=True,
+        )
+        tokens = ["No", "evidence", "of", "fever", "but", "no", "rash"]
+        self.assertTrue(matcher.may_match_tokens(tokens))
+        self.assertFalse(matcher.may_match_tokens(["nothing", "noted"]))
+        self.assertEqual(
+            matcher.find_tokens(tokens),
+            [(0, 3, "[PREN]"), (4, 5, "[CONJ]"), (5, 6, "[PREN]")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()